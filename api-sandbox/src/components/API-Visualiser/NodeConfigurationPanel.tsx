@@ -44,6 +44,7 @@ import {
   extractPathParameters, 
   getHeaderValueSuggestions 
 } from '../../constants/apiConstants';
+import { applyJsonPatch } from '../../utils/jsonPatch';
 import JsonTreeView from './JsonTreeView';
 import InputMappingPanel from './InputMappingPanel';
 
@@ -468,13 +469,23 @@ const NodeConfigurationPanel: React.FC<NodeConfigurationPanelProps> = ({ nodeId,
           headers: config.headers || {},
           query_params: queryParams,
           path_params: pathParams,
-          body: requestBody
+          body: requestBody,
+          // Delta mode: reuse the last run's session so the backend can diff against its body
+          session_id: testResult?.sessionId,
+          previous_hash: testResult?.success ? testResult.responseHash : undefined
         })
       });
 
       const result = await response.json();
       console.log(result);
       if (result.success) {
+        let responseData = result.response_data;
+        if (result.delta === 'unchanged') {
+          responseData = testResult?.response;
+        } else if (result.delta === 'patch') {
+          responseData = applyJsonPatch(testResult?.response, result.patch);
+        }
+
         // Store the resolved path parameters for code generation
         dispatch({
           type: 'UPDATE_CONFIGURATION',
@@ -490,13 +501,14 @@ const NodeConfigurationPanel: React.FC<NodeConfigurationPanelProps> = ({ nodeId,
           result: {
             nodeId,
             success: true,
-            response: result.response_data,
+            response: responseData,
             statusCode: result.status_code,
             timestamp: Date.now(),
             executionTime: result.execution_time,
             requestUrl: result.request_url,
             responseHeaders: result.response_headers,
-            sessionId: result.session_id
+            sessionId: result.session_id,
+            responseHash: result.response_hash
           }
         });
       } else {
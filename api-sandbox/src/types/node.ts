@@ -25,9 +25,25 @@ export interface DataProcessingConfiguration {
   outputFieldSelections: string[];
 }
 
+// Fan-out configuration: issue one API request per element of the input array
+export interface MapConfiguration {
+  itemsPath?: string; // Field path to the array in the input data (defaults to the input itself)
+  request: {
+    type: 'GET' | 'POST' | 'PUT' | 'DELETE' | 'PATCH';
+    url: string;
+    headers?: Record<string, string>;
+    query_params?: Record<string, string>; // Values like "{login}" are bound from each item
+    path_params?: Record<string, string>;
+    body?: string;
+  };
+  concurrency?: number;
+  retries?: number;
+  ordered?: boolean; // Keep results in input order (otherwise completion order)
+}
+
 export interface NodeConfiguration {
   id: string;
-  type: 'GET' | 'POST' | 'PUT' | 'DELETE' | 'PATCH' | 'DATA_PROCESSING';
+  type: 'GET' | 'POST' | 'PUT' | 'DELETE' | 'PATCH' | 'DATA_PROCESSING' | 'MAP';
   endpoint?: Endpoint;
   url?: string;
   headers?: Record<string, string>;
@@ -40,6 +56,17 @@ export interface NodeConfiguration {
   
   // Data processing specific configuration
   dataProcessing?: DataProcessingConfiguration;
+
+  // MAP node specific configuration
+  mapConfig?: MapConfiguration;
+
+  // Follow Link: rel="next" pagination for GET list endpoints
+  pagination?: {
+    enabled: boolean;
+    perPage?: number;
+    maxItems?: number;
+    prefetch?: boolean;
+  };
 }
 
 export interface NodeTestResult {
@@ -54,6 +81,7 @@ export interface NodeTestResult {
   requestUrl?: string;
   responseHeaders?: Record<string, string>;
   sessionId?: string;
+  responseHash?: string; // Sent back as previous_hash so re-runs can return a delta
   generatedCode?: string;
   fullCode?: string;
 }
@@ -0,0 +1,52 @@
+// Applies the RFC 6902 JSON Patches returned by /api/test-node in delta mode
+// (add, remove and replace operations only).
+
+export interface JsonPatchOperation {
+  op: 'add' | 'remove' | 'replace';
+  path: string;
+  value?: any;
+}
+
+const unescapeToken = (token: string): string =>
+  token.replace(/~1/g, '/').replace(/~0/g, '~');
+
+export const applyJsonPatch = (document: any, patch: JsonPatchOperation[]): any => {
+  let result = structuredClone(document);
+
+  for (const operation of patch) {
+    if (operation.path === '') {
+      if (operation.op === 'remove') {
+        throw new Error('Cannot remove the whole document');
+      }
+      result = structuredClone(operation.value);
+      continue;
+    }
+
+    const tokens = operation.path.slice(1).split('/').map(unescapeToken);
+    const last = tokens.pop() as string;
+    let parent = result;
+    for (const token of tokens) {
+      parent = Array.isArray(parent) ? parent[Number(token)] : parent?.[token];
+      if (parent === undefined) {
+        throw new Error(`Path not found: ${operation.path}`);
+      }
+    }
+
+    if (Array.isArray(parent)) {
+      const index = last === '-' ? parent.length : Number(last);
+      if (operation.op === 'add') {
+        parent.splice(index, 0, structuredClone(operation.value));
+      } else if (operation.op === 'remove') {
+        parent.splice(index, 1);
+      } else {
+        parent[index] = structuredClone(operation.value);
+      }
+    } else if (operation.op === 'remove') {
+      delete parent[last];
+    } else {
+      parent[last] = structuredClone(operation.value);
+    }
+  }
+
+  return result;
+};
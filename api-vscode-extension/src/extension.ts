@@ -72,11 +72,15 @@ export function activate(context: vscode.ExtensionContext) {
 
 export function deactivate() {}
 
+// Older calls are dropped from the tree once a session has recorded more than this
+const MAX_TRACKED_CALLS = 1000;
+
 class ApiTrackerProvider implements vscode.TreeDataProvider<ApiCallItem> {
     private _onDidChangeTreeData: vscode.EventEmitter<ApiCallItem | undefined | void> = new vscode.EventEmitter<ApiCallItem | undefined | void>();
     readonly onDidChangeTreeData: vscode.Event<ApiCallItem | undefined | void> = this._onDidChangeTreeData.event;
 
     private apiCalls: ApiCall[] = [];
+    private lastCallId = -1;
     private currentSessionId: string | null = null;
     private backendUrl: string;
     private statusBarItem: vscode.StatusBarItem;
@@ -93,6 +97,8 @@ class ApiTrackerProvider implements vscode.TreeDataProvider<ApiCallItem> {
         try {
             const response = await axios.get(`${this.backendUrl}/api-proxy/create-session`);
             this.currentSessionId = response.data.session_id;
+            this.apiCalls = [];
+            this.lastCallId = -1;
             this.statusBarItem.text = `$(globe) API Tracker: Session ${this.currentSessionId?.substring(0, 8)}`;
         } catch (error) {
             vscode.window.showErrorMessage(`Failed to create session: ${error}`);
@@ -177,9 +183,23 @@ class ApiTrackerProvider implements vscode.TreeDataProvider<ApiCallItem> {
         }
         vscode.window.showInformationMessage(`Refreshing API calls for session ${this.currentSessionId?.substring(0, 8)}`); 
         try {
-            const response = await axios.get(`${this.backendUrl}/api-proxy/calls/${this.currentSessionId}`);
+            // Only fetch calls recorded since the last refresh
+            let hasMore = true;
+            while (hasMore) {
+                const response = await axios.get(`${this.backendUrl}/api-proxy/calls/${this.currentSessionId}`, {
+                    params: { after_id: this.lastCallId, limit: 200 }
+                });
+                if (response.data.next_after_id < this.lastCallId) {
+                    // The server's ids restarted (e.g. the session expired); start over
+                    this.apiCalls = [];
+                    this.lastCallId = -1;
+                    continue;
+                }
+                this.apiCalls = this.apiCalls.concat(response.data.calls || []).slice(-MAX_TRACKED_CALLS);
+                this.lastCallId = response.data.next_after_id;
+                hasMore = response.data.has_more;
+            }
             vscode.window.showInformationMessage(`Refreshed API calls for session ${this.currentSessionId?.substring(0, 8)}`);
-            this.apiCalls = response.data || [];
             this._onDidChangeTreeData.fire();
             this.statusBarItem.text = `$(globe) API Tracker: ${this.apiCalls.length} calls`;
         } catch (error) {
@@ -195,6 +215,7 @@ class ApiTrackerProvider implements vscode.TreeDataProvider<ApiCallItem> {
         try {
             await axios.post(`${this.backendUrl}/api-proxy/clear/${this.currentSessionId}`);
             this.apiCalls = [];
+            this.lastCallId = -1;
             this._onDidChangeTreeData.fire();
             this.statusBarItem.text = "$(globe) API Tracker: Cleared";
             vscode.window.showInformationMessage('API calls cleared');
@@ -1,10 +1,14 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 from pydantic import BaseModel
 from app.services.executor import executor
-from app.services.proxy import api_proxy
+from app.services.proxy import api_proxy, build_recorded_call, summarize_call
+from app.services.call_events import call_event_broker
+from app.services.har import HAR_PAGE_SIZE, HarFilter, iter_har
 import sqlite3
 import json
 import uuid
@@ -13,9 +17,26 @@ import base64
 
 from app.services.security_analysis import run_security_scan
 from app.services.data_processor import DataProcessorCodeGenerator
-from app.services.code_generator import WorkflowCodeGenerator
+from app.services.code_cache import code_generation_cache
 from app.services.endpoint_explorer import fetch_endpoints
-import requests
+from app.services.map_executor import MapExecutor
+from app.services.upstream import GITHUB_API_BASE, build_request_params, send_request, upstream_client
+from app.services.cassettes import UPSTREAM_MODE, cassette_store
+from app.services.timing import response_timing, timing_stats
+from app.services.pagination import iter_pages
+from app.services.response_spill import spill_store
+from app.services.fingerprint import body_hash, canonical_json
+from app.services.json_patch import make_patch
+from app.services.docs_db import docs_db
+from app.services.docs_migrations import migrate_file
+from app.services.docs_structure import docs_structure, etag_matches
+from app.services.docs_search import search_docs
+from app.services.rate_limiter import upstream_scheduler, RateLimitExceeded
+from app.services.response_cache import response_cache
+from app.services.coalescing import single_flight
+from app.services.workflow_executor import workflow_executor, node_output_cache
+import httpx
+import os
 from typing import Dict, Any, Optional, List, Union
 
 app = FastAPI(
@@ -47,17 +68,40 @@ class TestNodeRequest(BaseModel):
     path_params: Dict[str, str] = {}
     body: Optional[str] = None
     session_id: Optional[str] = None
+    paginate: bool = False  # Follow Link: rel="next" headers (GET only)
+    per_page: int = 100
+    max_items: Optional[int] = None  # Defaults to PAGINATION_MAX_ITEMS
+    prefetch: bool = False  # Fetch the next page while the current one is processed
+    previous_hash: Optional[str] = None  # response_hash of the caller's last run; enables delta mode
+
+class TestMapNodeRequest(BaseModel):
+    items: List[Any]  # Input array, one request is issued per element
+    method: str = "GET"
+    url: str
+    headers: Dict[str, str] = {}
+    query_params: Dict[str, str] = {}  # Values like "{field}" are bound from each item
+    path_params: Dict[str, str] = {}
+    body: Optional[str] = None
+    concurrency: int = 4
+    retries: int = 2
+    ordered: bool = True
+    session_id: Optional[str] = None
 
 class DataProcessingRequest(BaseModel):
     data: Any  # Input data to process
     operation: str  # filter_fields, map_array, filter_array, etc.
     config: Dict[str, Any]  # Operation-specific configuration
 
+# Stand-in base URL as seen from sandbox containers (they share the host network)
+SANDBOX_GITHUB_STANDIN_URL = os.getenv("SANDBOX_GITHUB_STANDIN_URL", "http://localhost:8000/github-standin")
+
 @app.post("/run")
 async def run_code(code_input: CodeInput):
     try:
         # Create a session ID for tracking API calls
-        session_id = code_input.session_id or api_proxy.create_session_id()
+        session_id = code_input.session_id or await run_in_threadpool(api_proxy.create_session_id)
+        # When recording or replaying, sandbox GitHub calls go through the backend's stand-in
+        standin_url = SANDBOX_GITHUB_STANDIN_URL if UPSTREAM_MODE != "live" else ""
         
         # Add custom requests wrapper to intercept API calls
         proxy_code = f"""
@@ -68,6 +112,7 @@ from functools import partial
 from urllib.parse import urlparse
 import json
 import base64
+import time
 
 # Store original requests functions
 original_get = requests.get
@@ -83,6 +128,39 @@ SESSION_ID = "{session_id}"
 # Store intercepted calls locally
 intercepted_calls = []
 
+# Base URL standing in for https://api.github.com (empty to call GitHub directly)
+GITHUB_STANDIN = "{standin_url}"
+
+def route_url(url):
+    if GITHUB_STANDIN and isinstance(url, str) and url.startswith("https://api.github.com"):
+        return GITHUB_STANDIN + url[len("https://api.github.com"):]
+    return url
+
+def body_size(body):
+    # File and generator bodies cannot be measured without consuming them
+    if isinstance(body, bytes):
+        return len(body)
+    if isinstance(body, str):
+        return len(body.encode('utf-8'))
+    return 0
+
+def call_timing(response, total):
+    # Timing is best effort and must never raise into the caller's code
+    try:
+        # requests exposes time-to-headers as response.elapsed; the body is read after that
+        ttfb = response.elapsed.total_seconds()
+        return {{
+            'connect_ms': None,
+            'tls_ms': None,
+            'ttfb_ms': round(ttfb * 1000, 3),
+            'transfer_ms': round(max(0.0, total - ttfb) * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+            'request_bytes': sum(len(k) + len(v) + 4 for k, v in response.request.headers.items()) + body_size(response.request.body),
+            'response_bytes': sum(len(k) + len(v) + 4 for k, v in response.headers.items()) + len(response.content)
+        }}
+    except Exception:
+        return {{'total_ms': round(total * 1000, 3)}}
+
 # Custom function to intercept requests
 def intercept_request(original_func, *args, **kwargs):
     # Get the URL from args or kwargs
@@ -93,23 +171,18 @@ def intercept_request(original_func, *args, **kwargs):
     if original_func == original_request:
         method = kwargs.get('method', args[0] if args else 'GET').upper()
     
+    # Send GitHub calls to the stand-in; the recorded URL stays the original one
+    if 'url' in kwargs:
+        kwargs['url'] = route_url(kwargs['url'])
+    elif original_func == original_request and len(args) > 1:
+        args = (args[0], route_url(args[1])) + args[2:]
+    elif args and original_func != original_request:
+        args = (route_url(args[0]),) + args[1:]
+    
     # Make the original request
+    started = time.perf_counter()
     try:
         response = original_func(*args, **kwargs)
-        
-        # Store the intercepted request locally
-        call_data = {{
-            'method': method,
-            'url': url,
-            'headers': dict(response.headers),
-            'response': response.text,
-            'status': response.status_code,
-            'request_headers': kwargs.get('headers', {{}}),
-            'request_data': kwargs.get('json') or kwargs.get('data')
-        }}
-        intercepted_calls.append(call_data)
-        
-        return response
     except Exception as e:
         # Log even failed requests
         error_data = {{
@@ -118,12 +191,29 @@ def intercept_request(original_func, *args, **kwargs):
             'error': str(e),
             'status': 0,
             'request_headers': kwargs.get('headers', {{}}),
-            'request_data': kwargs.get('json') or kwargs.get('data')
+            'request_data': kwargs.get('json') or kwargs.get('data'),
+            'timing': {{'total_ms': round((time.perf_counter() - started) * 1000, 3)}}
         }}
         intercepted_calls.append(error_data)
         
         # Re-raise the original exception
         raise
+    timing = call_timing(response, time.perf_counter() - started)
+    
+    # Store the intercepted request locally
+    call_data = {{
+        'method': method,
+        'url': url,
+        'headers': dict(response.headers),
+        'response': response.text,
+        'status': response.status_code,
+        'request_headers': kwargs.get('headers', {{}}),
+        'request_data': kwargs.get('json') or kwargs.get('data'),
+        'timing': timing
+    }}
+    intercepted_calls.append(call_data)
+    
+    return response
     
 # Replace request methods with interceptors
 requests.get = partial(intercept_request, original_get)
@@ -157,7 +247,8 @@ if intercepted_calls:
                     'response': str(call.get('response', '')),
                     'headers': dict(call.get('headers', {{}})),
                     'request_headers': dict(call.get('request_headers', {{}})),
-                    'request_data': call.get('request_data')
+                    'request_data': call.get('request_data'),
+                    'timing': call.get('timing')
                 }}
                 safe_calls.append(safe_call)
             json_data = json.dumps(safe_calls, ensure_ascii=False, separators=(',', ':'))
@@ -208,7 +299,8 @@ if intercepted_calls:
                             "timestamp": time.time(),
                             "request_headers": call.get("request_headers", {}),
                             "request_data": call.get("request_data"),
-                            "error": call.get("error")
+                            "error": call.get("error"),
+                            "timing": call.get("timing")
                         })
                 except json.JSONDecodeError as e:
                     print(f"Error parsing API calls: {e}")
@@ -238,46 +330,120 @@ if intercepted_calls:
         import traceback
         raise HTTPException(status_code=500, detail=str(e))
 
+# Upper bound on items collected by a paginated test-node run
+PAGINATION_MAX_ITEMS = int(os.getenv("PAGINATION_MAX_ITEMS", "1000"))
+# GitHub accepts per_page values from 1 to 100
+GITHUB_MAX_PER_PAGE = 100
+
+async def test_node_paginated(request: TestNodeRequest, request_params: Dict[str, Any], session_id: str):
+    """Run a GET node across every page of a list endpoint, up to max_items."""
+    per_page = min(max(request.per_page, 1), GITHUB_MAX_PER_PAGE)
+    request_params["params"] = {**request.query_params, "per_page": str(per_page)}
+    max_items = min(request.max_items or PAGINATION_MAX_ITEMS, PAGINATION_MAX_ITEMS)
+    start_time = time.time()
+    
+    # Items past the inline cap go to disk as they arrive; only the preview is held in memory
+    body = spill_store.array()
+    pages_fetched = 0
+    last_response = None
+    try:
+        async for response, page_items in iter_pages(request_params, send_request, max_items, request.prefetch):
+            pages_fetched += 1
+            last_response = response
+            # Past the inline cap this writes to disk (and may prune old spills)
+            await run_in_threadpool(body.extend, page_items)
+            # The session keeps the same capped preview and handle for a large page
+            page_data, page_spill = await run_in_threadpool(spill_store.cap, page_items, size=len(response.content))
+            await api_proxy.record_call_async(session_id, {
+                "method": "GET",
+                "url": str(response.url),
+                "status": response.status_code,
+                "response": page_data,
+                "response_spill": page_spill,
+                "headers": dict(response.headers),
+                "timestamp": time.time(),
+                "request_headers": request.headers,
+                "query_params": request_params["params"] if pages_fetched == 1 else {},
+                "timing": response_timing(response),
+                "endpoint_template": request.url
+            })
+    except BaseException:
+        body.discard()
+        raise
+    
+    item_count = body.item_count
+    response_data, spill = await run_in_threadpool(body.finish)
+    
+    return {
+        "success": True,
+        "status_code": last_response.status_code,
+        "response_data": response_data,
+        "response_truncated": spill is not None,
+        "response_handle": spill,
+        "response_headers": dict(last_response.headers),
+        "request_url": request_params["url"],
+        "request_method": "GET",
+        "request_headers": request.headers,
+        "query_params": request_params["params"],
+        "session_id": session_id,
+        "pages_fetched": pages_fetched,
+        "item_count": item_count,
+        "max_items_reached": item_count >= max_items,
+        "execution_time": time.time() - start_time
+    }
+
+async def response_delta(session_id: str, previous_hash: str, response_data: Any,
+                         response_hash: str, body_size: int) -> Dict[str, Any]:
+    """
+    Delta-mode fields for a test-node result: "unchanged", a JSON Patch against
+    the caller's previous body (looked up in the session store by hash), or
+    "full" when the previous body is gone or the patch would not be smaller.
+    """
+    if previous_hash == response_hash:
+        return {"delta": "unchanged", "response_data": None}
+    previous = await run_in_threadpool(api_proxy.find_response, session_id, previous_hash)
+    if previous is not None:
+        patch = make_patch(previous.get("response"), response_data)
+        if len(canonical_json(patch)) < body_size:
+            return {"delta": "patch", "response_data": None, "patch": patch, "base_hash": previous_hash}
+    return {"delta": "full"}
+
 @app.post("/api/test-node")
 async def test_node(request: TestNodeRequest):
     try:
         # Create session ID for API call tracking
-        session_id = request.session_id or api_proxy.create_session_id()
-        
-        # Construct the URL with path parameters
-        url = request.url
-        
-        # If the URL is a relative path (starts with /), prepend the GitHub API base URL
-        if url.startswith('/'):
-            url = f"https://api.github.com{url}"
-        
-        for param_name, param_value in request.path_params.items():
-            url = url.replace(f"{{{param_name}}}", param_value)
+        session_id = request.session_id or await run_in_threadpool(api_proxy.create_session_id)
         
-        # Prepare request parameters
-        request_params = {
-            "method": request.method.upper(),
-            "url": url,
-            "headers": request.headers,
-            "params": request.query_params,
-            "timeout": 30
-        }
+        # Construct the URL with path parameters and prepare request parameters
+        request_params = build_request_params(
+            request.method,
+            request.url,
+            request.headers,
+            request.query_params,
+            request.path_params,
+            request.body
+        )
+        url = request_params["url"]
         
-        # Add body for POST, PUT, PATCH requests
-        if request.method.upper() in ["POST", "PUT", "PATCH"] and request.body:
+        if request.paginate and request_params["method"] == "GET":
             try:
-                # Try to parse as JSON
-                request_params["json"] = json.loads(request.body)
-            except json.JSONDecodeError:
-                # If not JSON, send as text
-                request_params["data"] = request.body
+                return await test_node_paginated(request, request_params, session_id)
+            except httpx.HTTPStatusError as e:
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "error_type": "http_error",
+                }
         
-        # Make the HTTP request
-        response = requests.request(**request_params)
+        # Make the HTTP request through the rate-limit-aware scheduler
+        start_time = time.perf_counter()
+        response = await send_request(request_params)
+        execution_time = time.perf_counter() - start_time
+        timing = response_timing(response)
 
         try:
             response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPStatusError as e:
             return {
                 "success": False,
                 "error": str(e),
@@ -290,6 +456,15 @@ async def test_node(request: TestNodeRequest):
         except json.JSONDecodeError:
             response_data = response.text
         
+        # Large bodies are kept on disk; the caller gets a preview and pages through the rest
+        response_data, spill = await run_in_threadpool(spill_store.cap, response_data, size=len(response.content))
+        # Spilled bodies are only previews, so they cannot serve as a delta base
+        response_hash = body_hash(response_data) if spill is None else None
+        delta = {}
+        if request.previous_hash and response_hash:
+            delta = await response_delta(session_id, request.previous_hash, response_data,
+                                         response_hash, len(response.content))
+        
         # Record the API call in the proxy system
         api_call_data = {
             "method": request.method.upper(),
@@ -304,7 +479,6 @@ async def test_node(request: TestNodeRequest):
         
         # Store in API proxy for tracking
         api_call = {
-            "id": len(api_proxy.get_calls(session_id)),
             "method": request.method.upper(),
             "url": url,
             "status": response.status_code,
@@ -313,19 +487,22 @@ async def test_node(request: TestNodeRequest):
             "timestamp": time.time(),
             "request_headers": request.headers,
             "request_body": request.body,
-            "query_params": request.query_params
+            "query_params": request.query_params,
+            "timing": timing,
+            "endpoint_template": request.url,
+            "response_spill": spill,
+            "response_hash": response_hash
         }
         
-        if session_id in api_proxy.intercepted_calls:
-            api_proxy.intercepted_calls[session_id].append(api_call)
-        else:
-            api_proxy.intercepted_calls[session_id] = [api_call]
+        await api_proxy.record_call_async(session_id, api_call)
         
         # Return comprehensive response
         return {
             "success": True,
             "status_code": response.status_code,
             "response_data": response_data,
+            "response_truncated": spill is not None,
+            "response_handle": spill,
             "response_headers": dict(response.headers),
             "request_url": url,
             "request_method": request.method.upper(),
@@ -333,16 +510,30 @@ async def test_node(request: TestNodeRequest):
             "request_body": request.body,
             "query_params": request.query_params,
             "session_id": session_id,
-            "execution_time": response.elapsed.total_seconds()
+            "execution_time": execution_time,
+            "timing": timing,
+            "cache_status": response.headers.get("x-sandbox-cache", "miss"),
+            "response_hash": response_hash,
+            **delta
+        }
+        
+    except RateLimitExceeded as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": "rate_limited",
+            "retry_at": e.retry_at,
+            "request_url": request.url,
+            "request_method": request.method.upper(),
+            "session_id": session_id
         }
         
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         # Handle network/request errors
         error_message = str(e)
         
         # Record failed request
         api_call = {
-            "id": len(api_proxy.get_calls(session_id)),
             "method": request.method.upper(),
             "url": request.url,
             "status": 0,
@@ -352,10 +543,7 @@ async def test_node(request: TestNodeRequest):
             "error": error_message
         }
         
-        if session_id in api_proxy.intercepted_calls:
-            api_proxy.intercepted_calls[session_id].append(api_call)
-        else:
-            api_proxy.intercepted_calls[session_id] = [api_call]
+        await api_proxy.record_call_async(session_id, api_call)
         
         return {
             "success": False,
@@ -379,6 +567,88 @@ async def test_node(request: TestNodeRequest):
             "session_id": session_id if 'session_id' in locals() else None
         }
 
+# Largest number of array items returned by one slice request
+RESPONSE_SLICE_MAX_ITEMS = 1000
+
+@app.get("/api/responses/{handle}")
+def get_spilled_response(handle: str):
+    """Describe a response that was too large to return inline."""
+    meta = spill_store.describe(handle)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Response not found or expired")
+    return meta
+
+@app.get("/api/responses/{handle}/slice")
+def get_spilled_response_slice(handle: str, start: int = Query(0, ge=0), end: Optional[int] = Query(None, ge=0)):
+    """
+    Read part of a spilled response: array items [start, end) for arrays,
+    otherwise bytes [start, end) of the body text.
+    """
+    meta = spill_store.describe(handle)
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Response not found or expired")
+
+    if meta["kind"] == "array":
+        end = min(end if end is not None else start + 100, start + RESPONSE_SLICE_MAX_ITEMS)
+        items = spill_store.read_items(handle, start, end)
+        if items is None:
+            raise HTTPException(status_code=404, detail="Response not found or expired")
+        return {"handle": handle, "start": start, "end": start + len(items),
+                "item_count": meta["item_count"], "items": items}
+
+    end = min(end if end is not None else meta["size"], start + spill_store.inline_max_bytes, meta["size"])
+    text = spill_store.read_bytes(handle, start, end)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Response not found or expired")
+    return {"handle": handle, "start": start, "end": max(start, end), "size": meta["size"], "text": text}
+
+@app.post("/api/test-map-node")
+async def test_map_node(request: TestMapNodeRequest):
+    """
+    Execute a MAP node: issue the templated request once per input item
+    with bounded concurrency, retries and optional ordering.
+    """
+    session_id = request.session_id or await run_in_threadpool(api_proxy.create_session_id)
+    start_time = time.time()
+    
+    map_executor = MapExecutor(
+        concurrency=request.concurrency,
+        retries=request.retries,
+        ordered=request.ordered
+    )
+    request_template = {
+        "type": request.method,
+        "url": request.url,
+        "headers": request.headers,
+        "query_params": request.query_params,
+        "path_params": request.path_params,
+        "body": request.body
+    }
+    
+    try:
+        outcome = await map_executor.run(
+            request.items,
+            request_template,
+            on_call=lambda call: api_proxy.record_call_async(session_id, call)
+        )
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "error_type": "general_error",
+            "session_id": session_id
+        }
+    
+    return {
+        "success": not outcome["errors"],
+        "response_data": outcome["results"],
+        "item_indices": outcome["indices"],
+        "errors": outcome["errors"],
+        "request_method": request.method.upper(),
+        "session_id": session_id,
+        "execution_time": time.time() - start_time
+    }
+
 @app.post("/api/process-data")
 async def process_data(request: DataProcessingRequest):
     """
@@ -453,52 +723,51 @@ data = {data_python}
         return {"success": False, "error": f"Error processing data: {str(e)}"}
 
 
-DB_PATH = "app/github_api_docs.db"  
-
-def get_db_connection():
-    return sqlite3.connect(DB_PATH)
-
+# Clients revalidate with If-None-Match; an unchanged structure costs a 304
+DOCS_STRUCTURE_CACHE_CONTROL = os.getenv("DOCS_STRUCTURE_CACHE_CONTROL", "public, no-cache")
 
+@app.get("/api-docs/structure")
+def get_api_docs_structure(request: Request):
+    """Return all endpoints grouped by category (precomputed, served with an ETag)."""
+    body, etag = docs_structure.get()
+    headers = {"ETag": etag, "Cache-Control": DOCS_STRUCTURE_CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
-@app.get("/api-docs/structure")
-def get_api_docs_structure():
-    """Return all endpoints grouped by category."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, method, path, summary, category FROM github_api_docs ORDER BY category, path")
-    rows = cursor.fetchall()
-    conn.close()
-
-    structure = {}
-    for id, method, path, summary, category in rows:
-        if category not in structure:
-            structure[category] = []
-        structure[category].append({
-            "id": id,
-            "method": method,
-            "path": path,
-            "summary": summary,
-            "category": category
-        })
-    return structure
+@app.get("/api-docs/search")
+def search_api_docs(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    method: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Full-text search over the API docs, best matches first. Every word in `q`
+    must match (as a prefix) in the path, summary, operation id or documentation.
+    """
+    try:
+        with docs_db.connection() as conn:
+            results = search_docs(conn, q, category=category, method=method, limit=limit, offset=offset)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Docs search is unavailable: {e}")
+    return {"query": q, "results": results}
 
 
 @app.get("/api-docs/{doc_id}")
 def get_api_doc_by_id(doc_id: int):
     """Return full documentation and details for a given doc ID."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT method, path, summary, operation_id, doc_url, documentation, required_params, response_schema, code_examples, category
-        FROM github_api_docs
-        WHERE id = ?
-        """,
-        (doc_id,)
-    )
-    row = cursor.fetchone()
-    conn.close()
+    with docs_db.connection() as conn:
+        row = conn.execute(
+            """
+            SELECT method, path, summary, operation_id, doc_url, documentation, required_params, response_schema, code_examples, category
+            FROM github_api_docs
+            WHERE id = ?
+            """,
+            (doc_id,)
+        ).fetchone()
 
     if not row:
         raise HTTPException(status_code=404, detail="API doc not found")
@@ -528,16 +797,225 @@ def get_api_doc_by_id(doc_id: int):
         raise HTTPException(status_code=500, detail=f"Error decoding stored JSON: {e}")
 
 
+@app.get("/api/upstream/cache")
+def get_upstream_cache_stats():
+    """Return conditional-request cache hit/miss counters and tier usage."""
+    return response_cache.stats()
+
+@app.post("/api/upstream/cache/clear")
+def clear_upstream_cache():
+    """Drop every cached upstream response."""
+    response_cache.clear()
+    return {"status": "success", "message": "Cache cleared"}
+
+@app.get("/api/upstream/cassettes")
+def get_cassette_stats():
+    """Return the upstream mode and record/replay counters."""
+    return {"mode": UPSTREAM_MODE, **cassette_store.stats()}
+
+@app.api_route("/github-standin/{path:path}", methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE"])
+async def github_standin(request: Request, path: str):
+    """
+    Loopback stand-in for api.github.com used by sandbox containers.
+
+    Requests go through the shared upstream stack, so they are served from
+    cassettes in replay mode and recorded in record mode.
+    """
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name.lower() not in ("host", "content-length", "accept-encoding")
+    }
+    body = await request.body()
+    request_params = {
+        "method": request.method,
+        "url": f"{GITHUB_API_BASE}/{path}",
+        "headers": headers,
+        "params": list(request.query_params.multi_items()),
+        "timeout": 30
+    }
+    if body:
+        request_params["data"] = body
+    try:
+        response = await send_request(request_params)
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Upstream request failed: {e}")
+
+    # The body has already been decoded, so drop headers describing the upstream encoding
+    response_headers = {
+        name: value for name, value in response.headers.items()
+        if name.lower() not in ("content-encoding", "content-length", "transfer-encoding", "connection")
+    }
+    return Response(content=response.content, status_code=response.status_code, headers=response_headers)
+
+@app.get("/api/upstream/coalescing")
+def get_coalescing_stats():
+    """Return how many upstream calls were saved by request coalescing."""
+    return single_flight.stats()
+
+@app.on_event("shutdown")
+async def close_upstream_client():
+    """Close pooled upstream connections."""
+    await upstream_client.aclose()
+
+# Migrating writes to the docs database, so the backend only does it when asked to
+DOCS_DB_MIGRATE = os.getenv("DOCS_DB_MIGRATE", "false").lower() == "true"
+
+@app.on_event("startup")
+def migrate_docs_db():
+    """Bring the docs database schema up to date when DOCS_DB_MIGRATE is set."""
+    if DOCS_DB_MIGRATE and os.path.exists(docs_db.path):
+        migrate_file(docs_db.path)
+
+@app.on_event("shutdown")
+def close_docs_db():
+    """Close pooled docs database connections."""
+    docs_db.close()
+
 @app.post("/api-proxy/{session_id}")
-async def proxy_api_request(request: Request, session_id: str):
-    """Proxy API requests and capture them."""
+async def proxy_api_request(request: Request, session_id: str, stream: bool = False):
+    """
+    Proxy API requests and capture them.
+
+    With `stream=true` the upstream response is piped back as-is (status,
+    headers and body) instead of being wrapped in a JSON envelope.
+    """
+    if stream:
+        return await api_proxy.proxy_stream(request, session_id)
     result = await api_proxy.proxy_request(request, session_id)
     return result
 
 @app.get("/api-proxy/calls/{session_id}")
-def get_proxy_calls(session_id: str):
-    """Get all intercepted API calls for a session."""
-    return api_proxy.get_calls(session_id)
+def get_proxy_calls(
+    session_id: str,
+    after_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    summary: bool = False
+):
+    """
+    Get intercepted API calls for a session.
+
+    Without paging parameters every call is returned as a list. With `after_id`,
+    `limit` or `summary` the response is a page of calls after the cursor plus
+    `next_after_id` to poll from; summaries omit bodies (see the body endpoint).
+    """
+    if after_id is None and limit is None and not summary:
+        return api_proxy.get_calls(session_id)
+    return api_proxy.get_calls_page(
+        session_id,
+        after_id=after_id if after_id is not None else -1,
+        limit=limit or 100,
+        summary=summary
+    )
+
+@app.get("/api-proxy/calls/{session_id}/{call_id}/body")
+def get_proxy_call_body(session_id: str, call_id: int):
+    """Get the request/response bodies of a single intercepted call."""
+    body = api_proxy.get_call_body(session_id, call_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Call not found")
+    return body
+
+# Seconds between keep-alives; each one also catches up on calls recorded by other workers
+CALL_FEED_HEARTBEAT = float(os.getenv("CALL_FEED_HEARTBEAT", "15"))
+
+@app.get("/api-proxy/events/{session_id}")
+async def stream_proxy_calls(
+    request: Request,
+    session_id: str,
+    after_id: Optional[int] = None,
+    summary: bool = False
+):
+    """
+    Server-sent event feed of calls recorded for a session.
+
+    Each event carries one call with the call id as its event id, so a
+    reconnecting EventSource resumes through Last-Event-ID (or `after_id`).
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id is not None and last_event_id.lstrip("-").isdigit():
+        after_id = int(last_event_id)
+    cursor = after_id if after_id is not None else -1
+    subscription = call_event_broker.subscribe(session_id)
+
+    async def format_event(call: Dict[str, Any]) -> str:
+        # Resolving a body can read the blob store, so it runs off the event loop
+        payload = summarize_call(call) if summary else await run_in_threadpool(api_proxy.resolve_call, call)
+        return f"id: {call['id']}\nevent: call\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    async def backlog():
+        # Calls missed while disconnected, lagging, or recorded by another worker
+        nonlocal cursor
+        while True:
+            page = await run_in_threadpool(api_proxy.get_calls_page, session_id, cursor, 200)
+            for call in page["calls"]:
+                cursor = call["id"]
+                yield await format_event(call)
+            if not page["has_more"]:
+                return
+
+    async def events():
+        nonlocal cursor
+        try:
+            async for event in backlog():
+                yield event
+            while not await request.is_disconnected():
+                call = await subscription.get(CALL_FEED_HEARTBEAT)
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    async for event in backlog():
+                        yield event
+                elif call is None:
+                    async for event in backlog():
+                        yield event
+                    yield ": keep-alive\n\n"
+                elif call["id"] > cursor:
+                    cursor = call["id"]
+                    yield await format_event(call)
+        finally:
+            call_event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api-proxy/har/{session_id}")
+def export_proxy_har(
+    session_id: str,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    status: Optional[str] = None,
+    url: Optional[str] = None
+):
+    """
+    Export a session's calls as a HAR 1.2 document, streamed page by page.
+
+    Filters: `since`/`until` (Unix timestamps), `status` ("200", "4xx",
+    "500-599" or a comma-separated mix) and `url` (glob pattern, e.g. "*/repos/*").
+    """
+    if not api_proxy.has_session(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        har_filter = HarFilter(since=since, until=until, status=status, url=url)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"Invalid status filter: {status}")
+
+    async def fetch_page(after_id: int) -> Dict[str, Any]:
+        return await run_in_threadpool(api_proxy.get_calls_page, session_id, after_id, HAR_PAGE_SIZE)
+
+    return StreamingResponse(
+        iter_har(fetch_page, har_filter, comment=f"Session {session_id}"),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="{session_id}.har"'}
+    )
+
+@app.get("/api-proxy/events-stats")
+def get_call_feed_stats():
+    """Return live call feed subscriber and delivery counters."""
+    return call_event_broker.stats()
 
 @app.post("/api-proxy/clear/{session_id}")
 def clear_proxy_calls(session_id: str):
@@ -545,6 +1023,16 @@ def clear_proxy_calls(session_id: str):
     api_proxy.clear_calls(session_id)
     return {"status": "success", "message": "Calls cleared"}
 
+@app.get("/api-proxy/timings")
+def get_proxy_timings():
+    """Return network timing percentiles aggregated per endpoint template."""
+    return timing_stats.snapshot()
+
+@app.get("/api-proxy/stats")
+def get_proxy_stats():
+    """Return call storage usage and eviction counters."""
+    return api_proxy.stats()
+
 @app.get("/api-proxy/create-session")
 def create_proxy_session():
     """Create a new session for tracking API calls."""
@@ -552,24 +1040,83 @@ def create_proxy_session():
     return {"session_id": session_id}
 
 @app.post("/api-proxy/record/{session_id}")
-async def record_api_call(session_id: str, call_data: dict):
-    """Record an intercepted API call."""
-    api_call = {
-        "id": len(api_proxy.get_calls(session_id)),
-        "method": call_data.get("method", "UNKNOWN"),
-        "url": call_data.get("url", ""),
-        "status": call_data.get("status", 0),
-        "response": call_data.get("response", ""),
-        "headers": call_data.get("headers", {}),
-        "timestamp": time.time(),
-        "error": call_data.get("error")
-    }
+def record_api_call(session_id: str, call_data: dict):
+    """Record an intercepted API call, creating the session if it does not exist yet."""
+    try:
+        api_call = build_recorded_call(call_data)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
-    if session_id in api_proxy.intercepted_calls:
-        api_proxy.intercepted_calls[session_id].append(api_call)
+    api_proxy.record_call(session_id, api_call)
     
     return {"status": "recorded"}
 
+# Limits for bulk NDJSON ingestion
+BULK_RECORD_MAX_CALLS = int(os.getenv("BULK_RECORD_MAX_CALLS", "10000"))
+BULK_RECORD_MAX_LINE_BYTES = int(os.getenv("BULK_RECORD_MAX_LINE_BYTES", str(10 * 1024 * 1024)))
+# Per-line errors echoed back (the counts always cover every line)
+BULK_RECORD_MAX_ERRORS = 100
+
+@app.post("/api-proxy/record/{session_id}/bulk")
+async def record_api_calls_bulk(request: Request, session_id: str):
+    """
+    Record many intercepted calls from an NDJSON body (one call object per line).
+
+    Lines are validated as the body streams in; all valid calls are then
+    appended in a single store operation. Returns accept/reject counts and
+    the first errors by line number.
+    """
+    accepted: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    rejected = 0
+    line_number = 0
+
+    def handle_line(raw: bytes) -> None:
+        nonlocal rejected, line_number
+        line_number += 1
+        if not raw.strip():
+            return
+        try:
+            if len(raw) > BULK_RECORD_MAX_LINE_BYTES:
+                raise ValueError(f"line exceeds {BULK_RECORD_MAX_LINE_BYTES} bytes")
+            if len(accepted) >= BULK_RECORD_MAX_CALLS:
+                raise ValueError(f"more than {BULK_RECORD_MAX_CALLS} calls in one request")
+            accepted.append(build_recorded_call(json.loads(raw)))
+        except ValueError as e:  # includes json.JSONDecodeError
+            rejected += 1
+            if len(errors) < BULK_RECORD_MAX_ERRORS:
+                errors.append({"line": line_number, "error": str(e)})
+
+    buffer = b""
+    skipping = False  # Discarding the rest of an oversized line
+    async for chunk in request.stream():
+        if skipping:
+            if b"\n" not in chunk:
+                continue
+            chunk = chunk.split(b"\n", 1)[1]
+            skipping = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            handle_line(raw)
+        # An unterminated line that is already too long cannot become valid
+        if len(buffer) > BULK_RECORD_MAX_LINE_BYTES:
+            handle_line(buffer)
+            buffer = b""
+            skipping = True
+    if not skipping:
+        handle_line(buffer)
+
+    if accepted:
+        await run_in_threadpool(api_proxy.record_calls, session_id, accepted)
+
+    return {
+        "status": "recorded",
+        "accepted": len(accepted),
+        "rejected": rejected,
+        "errors": errors
+    }
+
 class SecurityScanRequest(BaseModel):
     code: str
 
@@ -577,6 +1124,15 @@ class GenerateCodeRequest(BaseModel):
     nodes: List[Dict[str, Any]]
     connections: List[Dict[str, Any]]
 
+class ExecuteWorkflowRequest(BaseModel):
+    nodes: List[Dict[str, Any]]
+    connections: List[Dict[str, Any]]
+    session_id: Optional[str] = None
+    use_cache: bool = True  # Reuse outputs of nodes whose config and inputs are unchanged
+
+class InvalidateCacheRequest(BaseModel):
+    fingerprints: Optional[List[str]] = None  # None clears the whole cache
+
 class EndpointGenerationRequest(BaseModel):
     prompt: str
 
@@ -592,8 +1148,8 @@ async def security_scan(request: SecurityScanRequest):
 async def generate_workflow_code(request: GenerateCodeRequest):
     """Generate Python code for a complete workflow."""
     try:
-        # Generate the code using the WorkflowCodeGenerator
-        generated_code = WorkflowCodeGenerator.generate_simple_workflow_code(
+        # Generate the code, reusing cached output when only the layout changed
+        generated_code, fingerprint, cached = code_generation_cache.generate(
             request.nodes, 
             request.connections
         )
@@ -601,6 +1157,8 @@ async def generate_workflow_code(request: GenerateCodeRequest):
         return {
             "success": True,
             "generated_code": generated_code,
+            "fingerprint": fingerprint,
+            "cached": cached,
             "message": "Code generated successfully"
         }
         
@@ -611,6 +1169,49 @@ async def generate_workflow_code(request: GenerateCodeRequest):
             "message": "Failed to generate code"
         }
 
+@app.post("/api/execute-workflow")
+async def execute_workflow(request: ExecuteWorkflowRequest):
+    """
+    Execute a workflow on the backend. Nodes whose configuration and inputs
+    are unchanged since a previous run are served from the output cache.
+    """
+    session_id = request.session_id or await run_in_threadpool(api_proxy.create_session_id)
+    start_time = time.time()
+    
+    try:
+        result = await workflow_executor.run(
+            request.nodes,
+            request.connections,
+            on_call=lambda call: api_proxy.record_call_async(session_id, call),
+            use_cache=request.use_cache
+        )
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "session_id": session_id
+        }
+    
+    result["session_id"] = session_id
+    result["execution_time"] = time.time() - start_time
+    return result
+
+@app.post("/api/workflow-cache/invalidate")
+def invalidate_workflow_cache(request: InvalidateCacheRequest):
+    """Drop cached node outputs by fingerprint, or all of them."""
+    removed = node_output_cache.invalidate(request.fingerprints)
+    return {"status": "success", "removed": removed}
+
+@app.get("/api/workflow-cache/stats")
+def get_workflow_cache_stats():
+    """Return node output cache usage."""
+    return node_output_cache.stats()
+
+@app.get("/api/upstream/rate-limits")
+def get_rate_limit_budgets():
+    """Return the remaining upstream quota per credential and host."""
+    return upstream_scheduler.budgets()
+
 @app.post("/api/endpoints/generate")
 async def generate_endpoints(request: EndpointGenerationRequest):
     """Generate API endpoints based on natural language description."""
@@ -0,0 +1,154 @@
+"""
+Content-addressed storage for recorded response bodies.
+
+Bodies are keyed by the SHA-256 of their encoded bytes, compressed once
+(zstd when the zstandard package is installed, zlib otherwise) and shared
+by every call that references them, so repeated identical GitHub responses
+are stored a single time. References are counted and a blob is dropped when
+the last call using it is evicted.
+"""
+import hashlib
+import json
+import threading
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available
+    zstandard = None
+
+# Bodies smaller than this are stored inline in the call record
+MIN_BLOB_BYTES = 256
+
+
+def encode_body(value: Any) -> Tuple[bytes, str]:
+    """Serialise a body to bytes, remembering whether it was text or parsed JSON."""
+    if isinstance(value, str):
+        return value.encode('utf-8'), "text"
+    return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8'), "json"
+
+
+def decode_body(raw: bytes, encoding: str) -> Any:
+    text = raw.decode('utf-8')
+    return json.loads(text) if encoding == "json" else text
+
+
+def compress(raw: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=3).compress(raw)
+    return "zlib", zlib.compress(raw, 6)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob was compressed with zstd but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def prepare_blob(value: Any) -> Optional[Tuple[Dict[str, Any], bytes]]:
+    """
+    Encode and compress a body, returning its reference and stored bytes,
+    or None if it is too small to be worth storing separately.
+    """
+    raw, encoding = encode_body(value)
+    if len(raw) < MIN_BLOB_BYTES:
+        return None
+    codec, data = compress(raw)
+    ref = {
+        "hash": hashlib.sha256(raw).hexdigest(),
+        "encoding": encoding,
+        "codec": codec,
+        "size": len(raw),
+        "stored_size": len(data)
+    }
+    return ref, data
+
+
+def detach_body(call: Dict[str, Any], put: Callable[[Any], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Move a call's response body into blob storage, leaving a `response_ref` behind."""
+    body = call.get("response")
+    if body is None:
+        return call
+    ref = put(body)
+    if ref is None:
+        return call
+    detached = {key: value for key, value in call.items() if key != "response"}
+    detached["response_ref"] = ref
+    return detached
+
+
+def attach_body(call: Dict[str, Any], get: Callable[[Dict[str, Any]], Any]) -> Dict[str, Any]:
+    """Inverse of detach_body(): load the body behind `response_ref` back into the call."""
+    ref = call.get("response_ref")
+    if ref is None:
+        return call
+    attached = {key: value for key, value in call.items() if key != "response_ref"}
+    attached["response"] = get(ref)
+    # The proxy used to keep a second copy of the body under responseData.content
+    if isinstance(attached.get("responseData"), dict) and "content" not in attached["responseData"]:
+        attached["responseData"] = {**attached["responseData"], "content": attached["response"]}
+    return attached
+
+
+class BlobStore:
+    """In-process, reference-counted blob store."""
+
+    def __init__(self):
+        self.blobs: Dict[str, Tuple[str, bytes]] = {}
+        self.refcounts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self.counters = {"puts": 0, "dedup_hits": 0, "raw_bytes_in": 0}
+
+    def put(self, value: Any) -> Optional[Dict[str, Any]]:
+        """Store a body and return its reference, or None if it is too small to be worth it."""
+        prepared = prepare_blob(value)
+        if prepared is None:
+            return None
+        ref, data = prepared
+
+        with self.lock:
+            self.counters["puts"] += 1
+            self.counters["raw_bytes_in"] += ref["size"]
+            digest = ref["hash"]
+            if digest in self.blobs:
+                self.refcounts[digest] += 1
+                self.counters["dedup_hits"] += 1
+            else:
+                self.blobs[digest] = (ref["codec"], data)
+                self.refcounts[digest] = 1
+        return ref
+
+    def get(self, ref: Dict[str, Any]) -> Any:
+        """Load the body behind a reference (None if it is no longer stored)."""
+        with self.lock:
+            blob = self.blobs.get(ref["hash"])
+        if blob is None:
+            return None
+        codec, data = blob
+        return decode_body(decompress(codec, data), ref["encoding"])
+
+    def release(self, ref: Optional[Dict[str, Any]]) -> None:
+        """Drop one reference, deleting the blob once nothing uses it."""
+        if not ref:
+            return
+        with self.lock:
+            digest = ref["hash"]
+            remaining = self.refcounts.get(digest, 0) - 1
+            if remaining > 0:
+                self.refcounts[digest] = remaining
+            else:
+                self.refcounts.pop(digest, None)
+                self.blobs.pop(digest, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.counters,
+                "blobs": len(self.blobs),
+                "references": sum(self.refcounts.values()),
+                "stored_bytes": sum(len(data) for _, data in self.blobs.values()),
+                "codec": "zstd" if zstandard is not None else "zlib"
+            }
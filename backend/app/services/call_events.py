@@ -0,0 +1,93 @@
+"""
+In-process publish/subscribe of intercepted calls, used by the live call feed.
+
+Each subscriber owns a bounded queue. A subscriber that falls behind is not
+allowed to hold up publishers: its queue is emptied and flagged as overflowed,
+and the feed then catches up from the call store using its last delivered id.
+"""
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Subscription:
+    """A single feed consumer for one session."""
+
+    def __init__(self, session_id: str, max_queue: int, on_overflow: Callable[[], None]):
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+        self.on_overflow = on_overflow
+
+    def _deliver(self, call: Dict[str, Any]) -> None:
+        # Runs on the subscriber's event loop
+        try:
+            self.queue.put_nowait(call)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.overflowed = True
+            # Counted here, since the feed clears the flag once it has caught up
+            self.on_overflow()
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the next call, or return None after `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class CallEventBroker:
+    """Fan recorded calls out to the subscribers of their session."""
+
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        self.subscribers: Dict[str, List[Subscription]] = {}
+        self.lock = threading.Lock()
+        self.counters = {"published": 0, "delivered": 0, "overflows": 0}
+
+    def subscribe(self, session_id: str) -> Subscription:
+        """Register a subscriber; must be called from the consumer's event loop."""
+        subscription = Subscription(session_id, self.max_queue, self._count_overflow)
+        with self.lock:
+            self.subscribers.setdefault(session_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.session_id, [])
+            if subscription in subscribers:
+                subscribers.remove(subscription)
+            if not subscribers:
+                self.subscribers.pop(subscription.session_id, None)
+
+    def _count_overflow(self) -> None:
+        with self.lock:
+            self.counters["overflows"] += 1
+
+    def publish(self, session_id: str, call: Dict[str, Any]) -> None:
+        """Hand a stored call to every subscriber of its session. Safe to call from any thread."""
+        with self.lock:
+            subscribers = list(self.subscribers.get(session_id, ()))
+            self.counters["published"] += 1
+            self.counters["delivered"] += len(subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, call)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                self.unsubscribe(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.counters,
+                "sessions": len(self.subscribers),
+                "subscribers": sum(len(subs) for subs in self.subscribers.values())
+            }
+
+
+call_event_broker = CallEventBroker(max_queue=int(os.getenv("CALL_FEED_QUEUE_SIZE", "256")))
@@ -0,0 +1,717 @@
+"""
+Storage for intercepted API calls, grouped by session.
+
+Each session keeps at most `max_calls_per_session` calls in a ring buffer,
+sessions idle for longer than `session_ttl` seconds expire, and the total
+size of stored calls is capped by `max_bytes`, evicting the least recently
+used sessions first. Memory therefore plateaus under sustained traffic.
+
+Response bodies are kept apart from call records in content-addressed,
+compressed blobs (see blob_store), so identical responses are stored once;
+records carry a `response_ref` that `resolve()` turns back into the body.
+
+The in-memory backend only works within a single process. The SQLite (WAL)
+and Redis backends share calls between uvicorn workers and hosts; pick one
+with CALL_STORE_BACKEND.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .blob_store import BlobStore, attach_body, decode_body, decompress, detach_body, prepare_blob
+from .private_dir import make_private_dir
+
+# Shared by all workers whatever their working directory; owner-only, as calls carry response bodies
+DEFAULT_SQLITE_DIR = os.path.join(tempfile.gettempdir(), "api-sandbox-calls")
+
+
+def estimate_size(call: Dict[str, Any]) -> int:
+    """Approximate the memory held by a call record by its JSON size."""
+    return len(json.dumps(call, default=str))
+
+
+class CallStore(ABC):
+    """Interface every call-store backend implements."""
+
+    @abstractmethod
+    def create_session(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def has_session(self, session_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a call (assigning its id), creating the session if needed."""
+
+    def append_many(self, session_id: str, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append several calls; backends override this to batch the writes."""
+        return [self.append(session_id, call) for call in calls]
+
+    @abstractmethod
+    def get_calls(self, session_id: str) -> List[Dict[str, Any]]:
+        ...
+
+    def get_calls_after(self, session_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        """Return up to `limit` calls with an id greater than `after_id`, oldest first."""
+        return [call for call in self.get_calls(session_id) if call["id"] > after_id][:limit]
+
+    def get_call(self, session_id: str, call_id: int) -> Optional[Dict[str, Any]]:
+        """Return a single call by id, or None if it was never stored or has been evicted."""
+        for call in self.get_calls(session_id):
+            if call["id"] == call_id:
+                return call
+        return None
+
+    @abstractmethod
+    def load_body(self, ref: Dict[str, Any]) -> Any:
+        """Load a response body by reference (None if it has been evicted)."""
+
+    def resolve(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a call with its response body loaded back in."""
+        return attach_body(call, self.load_body)
+
+    @abstractmethod
+    def clear(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class SessionCalls:
+    """Ring buffer of calls for a single session."""
+
+    def __init__(self, max_calls: int):
+        self.calls: Deque[Tuple[Dict[str, Any], int]] = deque()
+        self.max_calls = max_calls
+        self.next_id = 0
+        self.bytes = 0
+        self.last_access = time.time()
+
+
+class MemoryCallStore(CallStore):
+    """In-process call store with per-session caps, idle TTL and a global byte budget."""
+
+    def __init__(self, max_calls_per_session: int = 500, session_ttl: float = 3600.0,
+                 max_bytes: int = 256 * 1024 * 1024, sweep_interval: float = 60.0):
+        self.max_calls_per_session = max_calls_per_session
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.sessions: "OrderedDict[str, SessionCalls]" = OrderedDict()
+        self.total_bytes = 0
+        self.last_sweep = time.time()
+        self.lock = threading.Lock()
+        self.blobs = BlobStore()
+        self.counters = {"evicted_calls": 0, "evicted_sessions": 0, "expired_sessions": 0}
+
+    # --- internal helpers (lock held) -----------------------------------------
+
+    def _evict_call(self, session: SessionCalls) -> None:
+        call, size = session.calls.popleft()
+        session.bytes -= size
+        self.total_bytes -= size
+        self.blobs.release(call.get("response_ref"))
+        self.counters["evicted_calls"] += 1
+
+    def _touch(self, session_id: str) -> Optional[SessionCalls]:
+        session = self.sessions.get(session_id)
+        if session is not None:
+            session.last_access = time.time()
+            self.sessions.move_to_end(session_id)
+        return session
+
+    def _drop_session(self, session_id: str) -> None:
+        session = self.sessions.pop(session_id, None)
+        if session is not None:
+            self.total_bytes -= session.bytes
+            for call, _ in session.calls:
+                self.blobs.release(call.get("response_ref"))
+
+    def _sweep_expired(self) -> None:
+        now = time.time()
+        if now - self.last_sweep < self.sweep_interval:
+            return
+        self.last_sweep = now
+        # Sessions are kept in access order, so expired ones are at the front
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.last_access < self.session_ttl:
+                break
+            self._drop_session(session_id)
+            self.counters["expired_sessions"] += 1
+
+    def _enforce_budget(self, current_session_id: str) -> None:
+        while self.total_bytes > self.max_bytes and self.sessions:
+            session_id = next(iter(self.sessions))
+            if session_id != current_session_id:
+                self._drop_session(session_id)
+                self.counters["evicted_sessions"] += 1
+                continue
+            # Only the active session is left: trim its oldest calls instead
+            session = self.sessions[session_id]
+            if not session.calls:
+                break
+            self._evict_call(session)
+
+    def _ensure_session(self, session_id: str) -> SessionCalls:
+        session = self._touch(session_id)
+        if session is None:
+            session = SessionCalls(self.max_calls_per_session)
+            self.sessions[session_id] = session
+        return session
+
+    def _append_locked(self, session: SessionCalls, call: Dict[str, Any]) -> Dict[str, Any]:
+        call["id"] = session.next_id
+        session.next_id += 1
+        # Shared blobs are charged to every call referencing them, an upper bound
+        size = estimate_size(call) + call.get("response_ref", {}).get("stored_size", 0)
+        session.calls.append((call, size))
+        session.bytes += size
+        self.total_bytes += size
+        if len(session.calls) > session.max_calls:
+            self._evict_call(session)
+        return call
+
+    # --- public API -----------------------------------------------------------
+
+    def create_session(self, session_id: str) -> None:
+        with self.lock:
+            self._sweep_expired()
+            self._ensure_session(session_id)
+
+    def has_session(self, session_id: str) -> bool:
+        with self.lock:
+            session = self.sessions.get(session_id)
+            # Expired sessions linger until the next sweep
+            return session is not None and time.time() - session.last_access < self.session_ttl
+
+    def append(self, session_id: str, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a call (assigning its id), creating the session if needed."""
+        call = detach_body(call, self.blobs.put)
+        with self.lock:
+            self._sweep_expired()
+            session = self._ensure_session(session_id)
+            call = self._append_locked(session, call)
+            self._enforce_budget(session_id)
+            return call
+
+    def append_many(self, session_id: str, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append several calls under a single lock acquisition."""
+        calls = [detach_body(call, self.blobs.put) for call in calls]
+        with self.lock:
+            self._sweep_expired()
+            session = self._ensure_session(session_id)
+            stored = [self._append_locked(session, call) for call in calls]
+            self._enforce_budget(session_id)
+            return stored
+
+    def get_calls(self, session_id: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            self._sweep_expired()
+            session = self._touch(session_id)
+            if session is None:
+                return []
+            return [call for call, _ in session.calls]
+
+    def get_calls_after(self, session_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        with self.lock:
+            session = self._touch(session_id)
+            if session is None or not session.calls:
+                return []
+            # Ids are consecutive within the ring buffer, so the cursor maps to an offset
+            start = max(0, after_id + 1 - session.calls[0][0]["id"])
+            return [call for call, _ in islice(session.calls, start, start + limit)]
+
+    def get_call(self, session_id: str, call_id: int) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            session = self._touch(session_id)
+            if session is None or not session.calls:
+                return None
+            offset = call_id - session.calls[0][0]["id"]
+            if 0 <= offset < len(session.calls):
+                return session.calls[offset][0]
+            return None
+
+    def clear(self, session_id: str) -> None:
+        with self.lock:
+            session = self._touch(session_id)
+            if session is not None:
+                self.total_bytes -= session.bytes
+                for call, _ in session.calls:
+                    self.blobs.release(call.get("response_ref"))
+                session.calls.clear()
+                session.bytes = 0
+
+    def load_body(self, ref: Dict[str, Any]) -> Any:
+        return self.blobs.get(ref)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self.sessions),
+                "calls": sum(len(session.calls) for session in self.sessions.values()),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_calls_per_session": self.max_calls_per_session,
+                "session_ttl": self.session_ttl,
+                **self.counters,
+                "blobs": self.blobs.stats()
+            }
+
+
+class SQLiteCallStore(CallStore):
+    """
+    Call store in an SQLite database in WAL mode, safe to share between processes.
+
+    Each thread gets its own connection; writes use BEGIN IMMEDIATE so the
+    id counter, ring-buffer trim and budget checks are atomic across workers.
+    Response blobs live in the same database and a trigger drops a blob when
+    the last call referencing it is deleted. Reads refresh a session's
+    last_access at most once per touch_interval per process, so polling does
+    not take the write lock on every request.
+    """
+
+    # Sessions whose last touch each process remembers
+    MAX_TRACKED_TOUCHES = 10000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS call_sessions (
+            session_id TEXT PRIMARY KEY,
+            next_id INTEGER NOT NULL DEFAULT 0,
+            bytes INTEGER NOT NULL DEFAULT 0,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_call_sessions_last_access ON call_sessions(last_access);
+        CREATE TABLE IF NOT EXISTS calls (
+            session_id TEXT NOT NULL,
+            call_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            blob_hash TEXT,
+            PRIMARY KEY (session_id, call_id)
+        );
+        CREATE TABLE IF NOT EXISTS call_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            data BLOB NOT NULL,
+            refcount INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS call_store_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        );
+    """
+
+    TRIGGERS = """
+        CREATE TRIGGER IF NOT EXISTS calls_release_blob AFTER DELETE ON calls
+        WHEN old.blob_hash IS NOT NULL BEGIN
+            UPDATE call_blobs SET refcount = refcount - 1 WHERE hash = old.blob_hash;
+            DELETE FROM call_blobs WHERE hash = old.blob_hash AND refcount <= 0;
+        END;
+    """
+
+    def __init__(self, path: str, max_calls_per_session: int = 500, session_ttl: float = 3600.0,
+                 max_bytes: int = 256 * 1024 * 1024, touch_interval: float = 60.0):
+        self.path = path
+        self.max_calls_per_session = max_calls_per_session
+        self.session_ttl = session_ttl
+        self.max_bytes = max_bytes
+        # Staying well inside the TTL keeps sessions that are read steadily alive
+        self.touch_interval = min(touch_interval, session_ttl / 10)
+        self.local = threading.local()
+        self.last_touch: "OrderedDict[str, float]" = OrderedDict()
+        self.touch_lock = threading.Lock()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        # Databases created before blobs were split out lack the reference column
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(calls)")}
+        if "blob_hash" not in columns:
+            conn.execute("ALTER TABLE calls ADD COLUMN blob_hash TEXT")
+        conn.executescript(self.TRIGGERS)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self.local.conn = conn
+        return conn
+
+    def _touch(self, conn: sqlite3.Connection, session_id: str) -> None:
+        now = time.time()
+        with self.touch_lock:
+            if now - self.last_touch.get(session_id, 0.0) < self.touch_interval:
+                return
+            self.last_touch[session_id] = now
+            self.last_touch.move_to_end(session_id)
+            while len(self.last_touch) > self.MAX_TRACKED_TOUCHES:
+                self.last_touch.popitem(last=False)
+        conn.execute("UPDATE call_sessions SET last_access = ? WHERE session_id = ?", (now, session_id))
+
+    def _bump(self, conn: sqlite3.Connection, name: str, amount: int) -> None:
+        if amount:
+            conn.execute(
+                "INSERT INTO call_store_counters (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, amount)
+            )
+
+    def _drop_sessions(self, conn: sqlite3.Connection, session_ids: List[str]) -> None:
+        for session_id in session_ids:
+            conn.execute("DELETE FROM calls WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM call_sessions WHERE session_id = ?", (session_id,))
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> None:
+        expired = [row[0] for row in conn.execute(
+            "SELECT session_id FROM call_sessions WHERE last_access < ?", (now - self.session_ttl,)
+        )]
+        self._drop_sessions(conn, expired)
+        self._bump(conn, "expired_sessions", len(expired))
+
+    def _ensure_session(self, conn: sqlite3.Connection, session_id: str, now: float) -> None:
+        conn.execute(
+            "INSERT INTO call_sessions (session_id, last_access) VALUES (?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET last_access = excluded.last_access",
+            (session_id, now)
+        )
+
+    def create_session(self, session_id: str) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(conn, now)
+            self._ensure_session(conn, session_id, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def has_session(self, session_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT last_access FROM call_sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row is not None and time.time() - row[0] < self.session_ttl
+
+    def _append_locked(self, conn: sqlite3.Connection, session_id: str, call: Dict[str, Any],
+                       blobs: Dict[str, bytes]) -> Dict[str, Any]:
+        call_id = conn.execute(
+            "UPDATE call_sessions SET next_id = next_id + 1 WHERE session_id = ? RETURNING next_id - 1",
+            (session_id,)
+        ).fetchone()[0]
+        call["id"] = call_id
+        data = json.dumps(call, default=str)
+        size = len(data)
+
+        ref = call.get("response_ref")
+        if ref is not None:
+            conn.execute(
+                "INSERT INTO call_blobs (hash, codec, data, refcount) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(hash) DO UPDATE SET refcount = refcount + 1",
+                (ref["hash"], ref["codec"], blobs[ref["hash"]])
+            )
+            size += ref["stored_size"]
+
+        conn.execute(
+            "INSERT INTO calls (session_id, call_id, data, size, blob_hash) VALUES (?, ?, ?, ?, ?)",
+            (session_id, call_id, data, size, ref["hash"] if ref else None)
+        )
+        conn.execute("UPDATE call_sessions SET bytes = bytes + ? WHERE session_id = ?", (size, session_id))
+
+        # Ring buffer: drop calls that fell out of the per-session window
+        trimmed = conn.execute(
+            "DELETE FROM calls WHERE session_id = ? AND call_id <= ? RETURNING size",
+            (session_id, call_id - self.max_calls_per_session)
+        ).fetchall()
+        if trimmed:
+            conn.execute(
+                "UPDATE call_sessions SET bytes = bytes - ? WHERE session_id = ?",
+                (sum(row[0] for row in trimmed), session_id)
+            )
+            self._bump(conn, "evicted_calls", len(trimmed))
+        return call
+
+    def _enforce_budget(self, conn: sqlite3.Connection, current_session_id: str) -> None:
+        total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM call_sessions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for session_id, session_bytes in conn.execute(
+            "SELECT session_id, bytes FROM call_sessions WHERE session_id != ? ORDER BY last_access",
+            (current_session_id,)
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append(session_id)
+            total -= session_bytes
+        self._drop_sessions(conn, evicted)
+        self._bump(conn, "evicted_sessions", len(evicted))
+
+    def append(self, session_id: str, call: Dict[str, Any]) -> Dict[str, Any]:
+        return self.append_many(session_id, [call])[0]
+
+    def append_many(self, session_id: str, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append several calls in one transaction."""
+        # Compress bodies before taking the write lock
+        blobs: Dict[str, bytes] = {}
+
+        def put(value: Any) -> Optional[Dict[str, Any]]:
+            prepared = prepare_blob(value)
+            if prepared is None:
+                return None
+            ref, data = prepared
+            blobs[ref["hash"]] = data
+            return ref
+
+        calls = [detach_body(call, put) for call in calls]
+
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire(conn, now)
+            self._ensure_session(conn, session_id, now)
+            stored = [self._append_locked(conn, session_id, call, blobs) for call in calls]
+            self._enforce_budget(conn, session_id)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return stored
+
+    def get_calls(self, session_id: str) -> List[Dict[str, Any]]:
+        conn = self._connection()
+        self._touch(conn, session_id)
+        return [json.loads(row[0]) for row in conn.execute(
+            "SELECT data FROM calls WHERE session_id = ? ORDER BY call_id", (session_id,)
+        )]
+
+    def get_calls_after(self, session_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        conn = self._connection()
+        self._touch(conn, session_id)
+        return [json.loads(row[0]) for row in conn.execute(
+            "SELECT data FROM calls WHERE session_id = ? AND call_id > ? ORDER BY call_id LIMIT ?",
+            (session_id, after_id, limit)
+        )]
+
+    def get_call(self, session_id: str, call_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT data FROM calls WHERE session_id = ? AND call_id = ?", (session_id, call_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def load_body(self, ref: Dict[str, Any]) -> Any:
+        row = self._connection().execute(
+            "SELECT codec, data FROM call_blobs WHERE hash = ?", (ref["hash"],)
+        ).fetchone()
+        if row is None:
+            return None
+        return decode_body(decompress(row[0], row[1]), ref["encoding"])
+
+    def clear(self, session_id: str) -> None:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM calls WHERE session_id = ?", (session_id,))
+            conn.execute("UPDATE call_sessions SET bytes = 0, last_access = ? WHERE session_id = ?",
+                         (time.time(), session_id))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        sessions, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM call_sessions"
+        ).fetchone()
+        counters = dict(conn.execute("SELECT name, value FROM call_store_counters").fetchall())
+        return {
+            "backend": "sqlite",
+            "sessions": sessions,
+            "calls": conn.execute("SELECT COUNT(*) FROM calls").fetchone()[0],
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "max_calls_per_session": self.max_calls_per_session,
+            "session_ttl": self.session_ttl,
+            "evicted_calls": counters.get("evicted_calls", 0),
+            "evicted_sessions": counters.get("evicted_sessions", 0),
+            "expired_sessions": counters.get("expired_sessions", 0),
+            "blobs": dict(zip(
+                ("blobs", "references", "stored_bytes"),
+                conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(LENGTH(data)), 0) FROM call_blobs"
+                ).fetchone()
+            ))
+        }
+
+
+class RedisCallStore(CallStore):
+    """
+    Call store on a Redis-compatible server (Redis, Valkey, KeyDB, ...).
+
+    Sessions are capped lists trimmed with LTRIM and expire through key TTLs.
+    Blobs are not reference counted here: each one carries the session TTL,
+    refreshed whenever it is written or read. The global byte budget is left
+    to the server's maxmemory policy.
+    """
+
+    def __init__(self, url: str, max_calls_per_session: int = 500, session_ttl: float = 3600.0,
+                 prefix: str = "api-sandbox"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("The redis package is required for CALL_STORE_BACKEND=redis") from e
+
+        self.client = redis.Redis.from_url(url)
+        self.max_calls_per_session = max_calls_per_session
+        self.session_ttl = int(session_ttl)
+        self.prefix = prefix
+
+    def _keys(self, session_id: str) -> Tuple[str, str]:
+        return f"{self.prefix}:calls:{session_id}", f"{self.prefix}:session:{session_id}"
+
+    def create_session(self, session_id: str) -> None:
+        _, session_key = self._keys(session_id)
+        self.client.hsetnx(session_key, "next_id", 0)
+        self.client.expire(session_key, self.session_ttl)
+
+    def has_session(self, session_id: str) -> bool:
+        _, session_key = self._keys(session_id)
+        return bool(self.client.exists(session_key))
+
+    def append(self, session_id: str, call: Dict[str, Any]) -> Dict[str, Any]:
+        return self.append_many(session_id, [call])[0]
+
+    def append_many(self, session_id: str, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append several calls in one MULTI/EXEC transaction."""
+        blobs: Dict[str, bytes] = {}
+
+        def put(value: Any) -> Optional[Dict[str, Any]]:
+            prepared = prepare_blob(value)
+            if prepared is None:
+                return None
+            ref, data = prepared
+            blobs[ref["hash"]] = ref["codec"].encode() + b"\n" + data
+            return ref
+
+        calls = [detach_body(call, put) for call in calls]
+        calls_key, session_key = self._keys(session_id)
+        last_id = self.client.hincrby(session_key, "next_id", len(calls))
+        first_id = last_id - len(calls)
+        for offset, call in enumerate(calls):
+            call["id"] = first_id + offset
+
+        pipe = self.client.pipeline(transaction=True)
+        for digest, blob in blobs.items():
+            pipe.set(f"{self.prefix}:blob:{digest}", blob, ex=self.session_ttl)
+        pipe.rpush(calls_key, *[json.dumps(call, default=str) for call in calls])
+        pipe.ltrim(calls_key, -self.max_calls_per_session, -1)
+        pipe.expire(calls_key, self.session_ttl)
+        pipe.expire(session_key, self.session_ttl)
+        pipe.hincrby(f"{self.prefix}:counters", "appended", len(calls))
+        pipe.execute()
+        return calls
+
+    def get_calls(self, session_id: str) -> List[Dict[str, Any]]:
+        calls_key, session_key = self._keys(session_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.lrange(calls_key, 0, -1)
+        pipe.expire(calls_key, self.session_ttl)
+        pipe.expire(session_key, self.session_ttl)
+        raw_calls = pipe.execute()[0]
+        return [json.loads(raw) for raw in raw_calls]
+
+    def _offset_of(self, calls_key: str, call_id: int) -> Optional[int]:
+        first = self.client.lindex(calls_key, 0)
+        if first is None:
+            return None
+        return call_id - json.loads(first)["id"]
+
+    def get_calls_after(self, session_id: str, after_id: int, limit: int) -> List[Dict[str, Any]]:
+        calls_key, _ = self._keys(session_id)
+        offset = self._offset_of(calls_key, after_id + 1)
+        if offset is None or limit <= 0:
+            return []
+        start = max(0, offset)
+        return [json.loads(raw) for raw in self.client.lrange(calls_key, start, start + limit - 1)]
+
+    def get_call(self, session_id: str, call_id: int) -> Optional[Dict[str, Any]]:
+        calls_key, _ = self._keys(session_id)
+        offset = self._offset_of(calls_key, call_id)
+        if offset is None or offset < 0:
+            return None
+        raw = self.client.lindex(calls_key, offset)
+        return json.loads(raw) if raw is not None else None
+
+    def load_body(self, ref: Dict[str, Any]) -> Any:
+        blob_key = f"{self.prefix}:blob:{ref['hash']}"
+        pipe = self.client.pipeline(transaction=False)
+        pipe.get(blob_key)
+        pipe.expire(blob_key, self.session_ttl)
+        blob = pipe.execute()[0]
+        if blob is None:
+            return None
+        codec, _, data = blob.partition(b"\n")
+        return decode_body(decompress(codec.decode(), data), ref["encoding"])
+
+    def clear(self, session_id: str) -> None:
+        calls_key, _ = self._keys(session_id)
+        self.client.delete(calls_key)
+
+    def stats(self) -> Dict[str, Any]:
+        counters = {k.decode(): int(v) for k, v in self.client.hgetall(f"{self.prefix}:counters").items()}
+        return {
+            "backend": "redis",
+            "max_calls_per_session": self.max_calls_per_session,
+            "session_ttl": self.session_ttl,
+            **counters
+        }
+
+
+def create_call_store() -> CallStore:
+    """Build the call store selected by CALL_STORE_BACKEND (memory, sqlite or redis)."""
+    backend = os.getenv("CALL_STORE_BACKEND", "memory").lower()
+    max_calls_per_session = int(os.getenv("CALL_STORE_MAX_CALLS_PER_SESSION", "500"))
+    session_ttl = float(os.getenv("CALL_STORE_SESSION_TTL", "3600"))
+    max_bytes = int(os.getenv("CALL_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+    if backend == "sqlite":
+        path = os.getenv("CALL_STORE_SQLITE_PATH")
+        if not path:
+            path = os.path.join(make_private_dir(DEFAULT_SQLITE_DIR), "calls.db")
+        return SQLiteCallStore(
+            path,
+            max_calls_per_session=max_calls_per_session,
+            session_ttl=session_ttl,
+            max_bytes=max_bytes,
+            touch_interval=float(os.getenv("CALL_STORE_TOUCH_INTERVAL", "60"))
+        )
+    if backend == "redis":
+        return RedisCallStore(
+            os.getenv("CALL_STORE_REDIS_URL", "redis://localhost:6379/0"),
+            max_calls_per_session=max_calls_per_session,
+            session_ttl=session_ttl
+        )
+    if backend != "memory":
+        raise ValueError(f"Unknown CALL_STORE_BACKEND: {backend}")
+    return MemoryCallStore(
+        max_calls_per_session=max_calls_per_session,
+        session_ttl=session_ttl,
+        max_bytes=max_bytes
+    )
@@ -0,0 +1,179 @@
+"""
+Record/replay of upstream HTTP traffic.
+
+With UPSTREAM_MODE=record every upstream exchange is saved to a cassette on
+disk, keyed by the normalised request. With UPSTREAM_MODE=replay the shared
+upstream client is served from those cassettes instead of the network, so
+tests, benchmarks and CI runs are repeatable, work offline and cost no rate
+limit. Both modes plug in as httpx transports beneath the pooled client.
+Cassettes hold response bodies fetched with the caller's credentials, so the
+directory is owner-only (0o700) and cassette files are read and written in
+the threadpool.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from .fingerprint import canonical_json
+from .private_dir import make_private_dir
+
+UPSTREAM_MODES = {"live", "record", "replay"}
+
+
+def cassette_key(request: httpx.Request, body: bytes) -> str:
+    """
+    Key a request by method, normalised URL (sorted query), Accept header and body.
+    Credentials and conditional headers are left out so cassettes replay without tokens.
+    """
+    query = urlencode(sorted(parse_qsl(request.url.query.decode('ascii'), keep_blank_values=True)))
+    payload = {
+        "method": request.method.upper(),
+        "url": f"{request.url.scheme}://{request.url.host.lower()}{request.url.path}?{query}",
+        "accept": request.headers.get("accept", ""),
+        "body": hashlib.sha256(body).hexdigest() if body else ""
+    }
+    return hashlib.sha256(canonical_json(payload).encode('utf-8')).hexdigest()
+
+
+class CassetteStore:
+    """Directory of recorded exchanges, one JSON file per request key."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.counters = {"recorded": 0, "replayed": 0, "misses": 0}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, entry: Dict[str, Any]) -> None:
+        make_private_dir(self.directory)
+        # Write then rename so concurrent readers never see a partial cassette
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+        os.replace(temp_path, self._path(key))
+        with self.lock:
+            self.counters["recorded"] += 1
+
+    def count(self, name: str) -> None:
+        with self.lock:
+            self.counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if os.path.isdir(self.directory):
+            entries = sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+        with self.lock:
+            return {**self.counters, "directory": self.directory, "entries": entries}
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Forward requests to the network and save every response to the cassette store."""
+
+    def __init__(self, store: CassetteStore, inner: httpx.AsyncBaseTransport):
+        self.store = store
+        self.inner = inner
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        try:
+            # Keep the body exactly as sent (e.g. still gzipped), to match its headers
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        elapsed = time.perf_counter() - started
+
+        key = cassette_key(request, body)
+        # A 304 only makes sense next to the full response it revalidates
+        if response.status_code != 304 or await run_in_threadpool(self.store.load, key) is None:
+            await run_in_threadpool(self.store.save, key, {
+                "request": {"method": request.method, "url": str(request.url)},
+                "status_code": response.status_code,
+                # Raw (possibly compressed) body, replayed with its original headers
+                "headers": [[name, value] for name, value in response.headers.multi_items()],
+                "body": base64.b64encode(content).decode('ascii'),
+                "elapsed": elapsed,
+                "recorded_at": time.time()
+            })
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=content,
+            extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Serve requests from the cassette store, optionally with simulated latency."""
+
+    def __init__(self, store: CassetteStore, latency: Optional[float] = 0.0):
+        self.store = store
+        # None replays the latency measured while recording
+        self.latency = latency
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        key = cassette_key(request, body)
+        entry = await run_in_threadpool(self.store.load, key)
+
+        if entry is None:
+            self.store.count("misses")
+            return httpx.Response(
+                404,
+                json={
+                    "message": f"No recorded response for {request.method} {request.url}",
+                    "cassette_key": key
+                },
+                headers={"x-sandbox-replay": "miss"}
+            )
+
+        self.store.count("replayed")
+        delay = entry.get("elapsed", 0.0) if self.latency is None else self.latency
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        headers = httpx.Headers(entry["headers"])
+        headers["x-sandbox-replay"] = "hit"
+        etag = headers.get("etag")
+        if etag and request.headers.get("if-none-match") == etag and entry["status_code"] == 200:
+            headers.pop("content-length", None)
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(entry["status_code"], headers=headers, content=base64.b64decode(entry["body"]))
+
+
+def parse_replay_latency(value: str) -> Optional[float]:
+    """UPSTREAM_REPLAY_LATENCY is a number of seconds, or "recorded"."""
+    return None if value.lower() == "recorded" else float(value)
+
+
+UPSTREAM_MODE = os.getenv("UPSTREAM_MODE", "live").lower()
+if UPSTREAM_MODE not in UPSTREAM_MODES:
+    raise ValueError(f"Unknown UPSTREAM_MODE: {UPSTREAM_MODE}")
+
+cassette_store = CassetteStore(
+    os.getenv("UPSTREAM_CASSETTE_DIR", os.path.join(tempfile.gettempdir(), "api-sandbox-cassettes"))
+)
@@ -0,0 +1,47 @@
+"""
+Single-flight coalescing of identical in-flight upstream requests.
+
+Concurrent idempotent requests with the same method, URL, query and
+credential share one upstream call; every waiter receives the same response.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key."""
+
+    def __init__(self):
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.requests = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn for the first caller with this key; later callers await its result."""
+        self.requests += 1
+        existing = self.in_flight.get(key)
+        if existing is not None:
+            self.coalesced += 1
+            # Shield so one waiter being cancelled does not cancel the shared call
+            return await asyncio.shield(existing)
+
+        self.upstream_calls += 1
+        task = asyncio.ensure_future(fn())
+        self.in_flight[key] = task
+        task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight)
+        }
+
+
+# Only requests without side effects may share a response
+COALESCABLE_METHODS = {"GET", "HEAD"}
+
+single_flight = SingleFlight()
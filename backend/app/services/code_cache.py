@@ -0,0 +1,71 @@
+"""
+Memoization for workflow code generation.
+
+Generated scripts are cached by a canonical workflow fingerprint that ignores
+layout-only fields, and per-node fragments are cached so editing one node only
+regenerates that node's code plus the final assembly.
+"""
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .code_generator import WorkflowCodeGenerator
+from .fingerprint import workflow_fingerprint
+
+
+class LRUCache:
+    """A small least-recently-used cache bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self.entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+class CodeGenerationCache:
+    """Cache generated workflow code by fingerprint, with per-node fragment reuse."""
+
+    def __init__(self, max_workflows: int = 128, max_fragments: int = 20000):
+        self.workflows = LRUCache(max_workflows)
+        self.fragments = LRUCache(max_fragments)
+
+    def generate(self, nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> Tuple[str, str, bool]:
+        """Return (generated_code, fingerprint, cached)."""
+        fingerprint = workflow_fingerprint(nodes, connections)
+        cached_code = self.workflows.get(fingerprint)
+        if cached_code is not None:
+            return cached_code, fingerprint, True
+
+        generated_code = WorkflowCodeGenerator.generate_simple_workflow_code(
+            nodes, connections, fragment_cache=self.fragments
+        )
+        self.workflows.put(fingerprint, generated_code)
+        return generated_code, fingerprint, False
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workflows": self.workflows.stats(), "fragments": self.fragments.stats()}
+
+
+code_generation_cache = CodeGenerationCache(
+    max_workflows=int(os.getenv("CODEGEN_CACHE_SIZE", "128")),
+    max_fragments=int(os.getenv("CODEGEN_FRAGMENT_CACHE_SIZE", "20000"))
+)
@@ -4,6 +4,63 @@ Code generation service that converts node workflows into executable Python code
 import json
 from typing import Any, Dict, List, Union, Optional
 from .data_processor import DataProcessorCodeGenerator
+from .fingerprint import node_fingerprint
+from .pagination import is_paginated
+
+# Emitted ahead of the request in API nodes that receive input connections
+INPUT_SUBSTITUTION_TEMPLATE = """# Substitute input data into parameters
+if input_data:
+    for key, value in input_data.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                if isinstance(sub_value, (str, int, float)):
+                    # Replace in path params
+                    for param_key in list(path_params.keys()):
+                        if path_params[param_key] == f'{{{sub_key}}}':
+                            path_params[param_key] = str(sub_value)
+                    # Replace in query params
+                    for param_key in list(params.keys()):
+                        if params[param_key] == f'{{{sub_key}}}':
+                            params[param_key] = str(sub_value)
+"""
+
+# Emitted once after the imports when any API node has pagination enabled
+PAGINATION_HELPER = """def iter_pages(url, headers, params, max_items=None, prefetch=False):
+    \"\"\"Lazily yield items from every page of a list endpoint, following Link: rel="next".\"\"\"
+    from concurrent.futures import ThreadPoolExecutor
+    pool = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def fetch(page_url, page_params):
+        page_response = request_with_rate_limit('GET', page_url, headers=headers, params=page_params, timeout=30)
+        page_response.raise_for_status()
+        return page_response
+
+    yielded = 0
+    pending = None
+    page_response = fetch(url, params)
+    try:
+        while True:
+            page = page_response.json()
+            items = page.get('items', [page]) if isinstance(page, dict) else page
+            next_url = page_response.links.get('next', {}).get('url')
+            if max_items is not None and yielded + len(items) >= max_items:
+                items = items[:max_items - yielded]
+                next_url = None
+            # Start downloading the next page while this one is consumed
+            if pool and next_url:
+                pending = pool.submit(fetch, next_url, None)
+            for item in items:
+                yield item
+            yielded += len(items)
+            if not next_url:
+                return
+            page_response = pending.result() if pending else fetch(next_url, None)
+            pending = None
+    finally:
+        if pool:
+            pool.shutdown(wait=False)
+
+"""
 
 class WorkflowCodeGenerator:
     """Generate complete Python code for node workflows."""
@@ -13,17 +70,44 @@ class WorkflowCodeGenerator:
         """Generate the imports section for the Python code."""
         return """import requests
 import json
+import random
+import time
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
 # GitHub API base URL
 GITHUB_API_BASE = "https://api.github.com"
 
+def request_with_rate_limit(method, url, max_retries=3, **kwargs):
+    \"\"\"Send a request, waiting out GitHub primary and secondary rate limits.\"\"\"
+    for attempt in range(max_retries + 1):
+        response = requests.request(method, url, **kwargs)
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        retry_after = response.headers.get('Retry-After')
+        rate_limited = response.status_code == 429 or (
+            response.status_code == 403 and (retry_after is not None or remaining == '0')
+        )
+        if not rate_limited or attempt == max_retries:
+            return response
+        if retry_after is not None:
+            delay = float(retry_after)
+        elif remaining == '0':
+            delay = int(response.headers.get('X-RateLimit-Reset', 0)) - time.time()
+        else:
+            delay = 2 ** attempt
+        # Add jitter so parallel callers do not retry in lockstep
+        time.sleep(min(max(delay, 0), 60) + random.uniform(0, 1))
+    return response
+
 """
 
     @staticmethod
-    def generate_api_call_code(node_config: Dict[str, Any], step_number: int) -> str:
-        """Generate Python code for an API call node."""
+    def generate_api_call_code(node_config: Dict[str, Any], step_number: int, substitute_inputs: bool = False) -> str:
+        """
+        Generate Python code for an API call node.
+        With substitute_inputs, path parameters are kept in a path_params dict and
+        "{field}" values are filled from input_data before the request is made.
+        """
         method = node_config.get('type', 'GET').upper()
         url = node_config.get('url', '')
         headers = node_config.get('headers', {})
@@ -38,12 +122,12 @@ GITHUB_API_BASE = "https://api.github.com"
         # Add path parameters as variables if they exist
         # Use resolved path params if available (from successful tests), otherwise use configured params
         resolved_params = node_config.get('resolvedPathParams', path_params)
-        if resolved_params:
-            code_parts.append(f"# Step {step_number}: {method} request")
+        code_parts.append(f"# Step {step_number}: {method} request")
+        if substitute_inputs:
+            code_parts.append(f"path_params = {json.dumps(resolved_params, indent=4)}")
+        else:
             for param_name, param_value in resolved_params.items():
                 code_parts.append(f"{param_name} = '{param_value}'")
-        else:
-            code_parts.append(f"# Step {step_number}: {method} request")
         
         # Prepare headers
         if headers:
@@ -76,26 +160,161 @@ GITHUB_API_BASE = "https://api.github.com"
         if url.startswith('/'):
             # For relative URLs, construct with path parameters
             url_template = url
-            for param_name in resolved_params.keys():
-                url_template = url_template.replace(f"{{{param_name}}}", f"{{{param_name}}}")
-            code_parts.append(f'url = f"{{GITHUB_API_BASE}}{url_template}"')
+            if substitute_inputs:
+                for param_name in resolved_params.keys():
+                    url_template = url_template.replace(f"{{{param_name}}}", f"{{path_params['{param_name}']}}")
         else:
             # For absolute URLs, use as is
+            url_template = None
+        
+        if substitute_inputs:
+            code_parts.append(INPUT_SUBSTITUTION_TEMPLATE)
+        
+        if url_template is not None:
+            code_parts.append(f'url = f"{{GITHUB_API_BASE}}{url_template}"')
+        else:
             code_parts.append(f'url = "{url}"')
         
         # Make the API call
-        code_parts.append(f"response = requests.{method.lower()}(url, headers=headers, params=params, json=data if data else None)")
-        code_parts.append("response.raise_for_status()")
-        code_parts.append("response_data = response.json()")
-        
-        # Filter output fields if specified
-        if output_fields:
-            code_parts.append(WorkflowCodeGenerator._generate_clean_field_filtering_code(output_fields, "response_data"))
+        if WorkflowCodeGenerator._is_paginated(node_config):
+            pagination = node_config.get('pagination', {})
+            max_items = pagination.get('maxItems')
+            code_parts.append(f"params['per_page'] = {int(pagination.get('perPage', 100))}")
+            code_parts.append("# Follow Link: rel=\"next\" headers until every page (or max_items) is read,")
+            code_parts.append("# handling one item at a time so only the selected fields are kept")
+            code_parts.append("response_items = []")
+            code_parts.append(f"for response_data in iter_pages(url, headers, params, max_items={repr(max_items)}, prefetch={bool(pagination.get('prefetch', False))}):")
+            item_code = WorkflowCodeGenerator._generate_clean_field_filtering_code(output_fields, "response_data")
+            code_parts.append("\n".join(f"    {line}" for line in item_code.splitlines()))
+            code_parts.append("    response_items.append(data)")
+            code_parts.append("data = response_items")
         else:
-            code_parts.append("data = response_data")
+            code_parts.append(f"response = request_with_rate_limit('{method}', url, headers=headers, params=params, json=data if data else None)")
+            code_parts.append("response.raise_for_status()")
+            code_parts.append("response_data = response.json()")
+            
+            # Filter output fields if specified
+            if output_fields:
+                code_parts.append(WorkflowCodeGenerator._generate_clean_field_filtering_code(output_fields, "response_data"))
+            else:
+                code_parts.append("data = response_data")
         
         return "\n".join(code_parts)
     
+    @staticmethod
+    def _is_paginated(node_config: Dict[str, Any]) -> bool:
+        """Whether an API node should follow pagination links."""
+        return is_paginated(node_config)
+    
+    @staticmethod
+    def _generate_helpers(nodes: List[Dict[str, Any]]) -> str:
+        """Generate helper functions required by any of the nodes."""
+        if any(WorkflowCodeGenerator._is_paginated(node.get('data', {})) for node in nodes):
+            return PAGINATION_HELPER
+        return ""
+    
+    @staticmethod
+    def generate_map_code(node_config: Dict[str, Any], step_number: int) -> str:
+        """Generate Python code for a MAP node that fans an API call out over an input array."""
+        map_config = node_config.get('mapConfig', {})
+        request_config = map_config.get('request', {})
+        method = request_config.get('type', 'GET').upper()
+        url = request_config.get('url', '')
+        headers = request_config.get('headers', {})
+        query_params = request_config.get('query_params', {})
+        path_params = request_config.get('path_params', {})
+        body = request_config.get('body')
+        items_path = map_config.get('itemsPath', '')
+        concurrency = max(1, int(map_config.get('concurrency', 4)))
+        retries = max(0, int(map_config.get('retries', 2)))
+        ordered = map_config.get('ordered', True)
+        output_fields = node_config.get('outputFieldSelections', [])
+
+        code_parts = []
+        code_parts.append(f"# Step {step_number}: {method} request for every input item")
+        code_parts.append("from concurrent.futures import ThreadPoolExecutor, as_completed")
+
+        if items_path:
+            bracket_access = WorkflowCodeGenerator._convert_field_path_to_bracket_notation(items_path)
+            code_parts.append(f"map_items = data{bracket_access}")
+        else:
+            code_parts.append("map_items = data")
+        code_parts.append("if not isinstance(map_items, list):")
+        code_parts.append("    raise ValueError('MAP node input must be an array')")
+
+        code_parts.append(f"map_headers = {json.dumps(headers, indent=4)}")
+        code_parts.append(f"map_path_params = {json.dumps(path_params, indent=4)}")
+        code_parts.append(f"map_params = {json.dumps(query_params, indent=4)}")
+
+        if method in ['POST', 'PUT', 'PATCH'] and body:
+            try:
+                body_data = json.loads(body)
+                code_parts.append(f"map_body = {json.dumps(body_data, indent=4)}")
+            except json.JSONDecodeError:
+                code_parts.append(f"map_body = {repr(body)}")
+        else:
+            code_parts.append("map_body = None")
+
+        if url.startswith('/'):
+            code_parts.append(f'map_url_template = GITHUB_API_BASE + "{url}"')
+        else:
+            code_parts.append(f'map_url_template = "{url}"')
+
+        code_parts.append("""
+def bind_item(template, item):
+    # Values of the form "{field}" are taken from the current item ("{item}" is the item itself)
+    bound = {}
+    for key, value in template.items():
+        if isinstance(value, str) and value.startswith('{') and value.endswith('}'):
+            field_path = value[1:-1]
+            current = item
+            if field_path != 'item':
+                for part in field_path.replace('[', '.').replace(']', '').split('.'):
+                    if part:
+                        current = current[int(part)] if isinstance(current, list) else current[part]
+            bound[key] = str(current)
+        else:
+            bound[key] = value
+    return bound
+""")
+        code_parts.append("def call_item(item):")
+        code_parts.append("    url = map_url_template")
+        code_parts.append("    for param_name, param_value in bind_item(map_path_params, item).items():")
+        code_parts.append("        url = url.replace('{' + param_name + '}', param_value)")
+        code_parts.append(f"    for attempt in range({retries + 1}):")
+        code_parts.append("        try:")
+        code_parts.append(f"            response = request_with_rate_limit('{method}', url, headers=map_headers, params=bind_item(map_params, item), json=map_body, timeout=30)")
+        code_parts.append("            response.raise_for_status()")
+        code_parts.append("            return response.json()")
+        code_parts.append("        except requests.exceptions.RequestException as error:")
+        code_parts.append("            # Client errors other than rate limiting will not succeed on retry")
+        code_parts.append("            status = error.response.status_code if error.response is not None else 0")
+        code_parts.append(f"            if attempt == {retries} or (400 <= status < 500 and status != 429):")
+        code_parts.append("                raise")
+        code_parts.append("            time.sleep(0.5 * (2 ** attempt))")
+        code_parts.append("")
+
+        code_parts.append(f"with ThreadPoolExecutor(max_workers={concurrency}) as pool:")
+        if ordered:
+            code_parts.append("    # Results keep the order of the input items")
+            code_parts.append("    map_results = list(pool.map(call_item, map_items))")
+        else:
+            code_parts.append("    # Results are collected in completion order")
+            code_parts.append("    futures = [pool.submit(call_item, item) for item in map_items]")
+            code_parts.append("    map_results = [future.result() for future in as_completed(futures)]")
+        if output_fields:
+            # Like paginated items, the selected fields are taken from each mapped response
+            code_parts.append("selected_results = []")
+            code_parts.append("for response_data in map_results:")
+            item_code = WorkflowCodeGenerator._generate_clean_field_filtering_code(output_fields, "response_data")
+            code_parts.append("\n".join(f"    {line}" for line in item_code.splitlines()))
+            code_parts.append("    selected_results.append(data)")
+            code_parts.append("data = selected_results")
+        else:
+            code_parts.append("data = map_results")
+
+        return "\n".join(code_parts)
+
     @staticmethod
     def _generate_field_filtering_code(selected_fields: List[str], input_var: str, output_var: str) -> str:
         """Generate code to filter specific fields from the response."""
@@ -240,7 +459,7 @@ processed_data = process_data(data)
         # For now, we'll process them in the order they appear
         sorted_nodes = sorted(nodes, key=lambda x: x.get('position', {}).get('x', 0))
         
-        code_parts = [WorkflowCodeGenerator.generate_imports()]
+        code_parts = [WorkflowCodeGenerator.generate_imports() + WorkflowCodeGenerator._generate_helpers(nodes)]
         code_parts.append("# Generated workflow code")
         code_parts.append("# This code performs the exact same operations as your visual workflow")
         code_parts.append("")
@@ -256,6 +475,8 @@ processed_data = process_data(data)
             if node_type == 'DATA_PROCESSING':
                 # Use the clean data processing code generator
                 node_code = WorkflowCodeGenerator.generate_data_processing_code(node_config, 1)
+            elif node_type == 'MAP':
+                node_code = WorkflowCodeGenerator.generate_map_code(node_config, 1)
             else:
                 # Use the clean API call code generator
                 node_code = WorkflowCodeGenerator.generate_api_call_code(node_config, 1)
@@ -273,15 +494,46 @@ processed_data = process_data(data)
         return "\n".join(code_parts)
     
     @staticmethod
-    def generate_simple_workflow_code(nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> str:
-        """Generate code for a simple workflow with basic node processing."""
+    def _index_input_sources(connections: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Map each target node ID to its source node IDs, in connection order."""
+        input_sources: Dict[str, List[str]] = {}
+        for conn in connections:
+            input_sources.setdefault(conn['targetNodeId'], []).append(conn['sourceNodeId'])
+        return input_sources
+    
+    @staticmethod
+    def _generate_node_code(node_config: Dict[str, Any], step_number: int, has_inputs: bool) -> str:
+        """Generate the code fragment for a single node."""
+        node_type = node_config.get('type')
+        if node_type == 'DATA_PROCESSING':
+            return WorkflowCodeGenerator.generate_data_processing_code(node_config, step_number)
+        if node_type == 'MAP':
+            # MAP nodes fan out over the array produced by the previous step
+            return WorkflowCodeGenerator.generate_map_code(node_config, step_number)
+        # API nodes with inputs fill "{field}" path/query params from input_data
+        return WorkflowCodeGenerator.generate_api_call_code(node_config, step_number, substitute_inputs=has_inputs)
+    
+    @staticmethod
+    def generate_simple_workflow_code(
+        nodes: List[Dict[str, Any]],
+        connections: List[Dict[str, Any]],
+        fragment_cache: Optional[Any] = None
+    ) -> str:
+        """
+        Generate code for a simple workflow with basic node processing.
+        If a fragment_cache (an object with get/put) is given, per-node code is
+        reused for nodes whose configuration, step number and inputs are unchanged.
+        """
         if not nodes:
             return "# No nodes in workflow"
         
-        code_parts = [WorkflowCodeGenerator.generate_imports()]
+        code_parts = [WorkflowCodeGenerator.generate_imports() + WorkflowCodeGenerator._generate_helpers(nodes)]
         code_parts.append("# Generated workflow code")
         code_parts.append("")
         
+        # Index connections once so each node's inputs are a dict lookup
+        input_sources = WorkflowCodeGenerator._index_input_sources(connections)
+        
         # Create a mapping of node IDs to their processed data variables
         node_data_vars = {}
         
@@ -289,18 +541,16 @@ processed_data = process_data(data)
         for i, node in enumerate(nodes):
             node_id = node['id']
             node_config = node['data']
-            node_type = node_config.get('type')
             
             # Check if this node has input connections
-            input_connections = [conn for conn in connections if conn['targetNodeId'] == node_id]
+            sources = input_sources.get(node_id, [])
             
-            if input_connections:
+            if sources:
                 # This node has inputs, so we need to prepare input data
                 code_parts.append(f"# Prepare input data for node {node_id}")
                 code_parts.append("input_data = {}")
                 
-                for conn in input_connections:
-                    source_node_id = conn['sourceNodeId']
+                for source_node_id in sources:
                     if source_node_id in node_data_vars:
                         source_var = node_data_vars[source_node_id]
                         code_parts.append(f"input_data['{source_node_id}'] = {source_var}")
@@ -308,45 +558,14 @@ processed_data = process_data(data)
                 code_parts.append("")
             
             # Generate node-specific code
-            if node_type == 'DATA_PROCESSING':
-                # For data processing nodes, we need to modify the code to use input_data
-                node_code = WorkflowCodeGenerator.generate_data_processing_code(node_config, i + 1)
-                if input_connections:
-                    # Replace the data variable with input_data
-                    node_code = node_code.replace("data = response_data", "data = input_data")
+            if fragment_cache is not None:
+                fragment_key = f"{node_fingerprint(node_config)}:{i + 1}:{int(bool(sources))}"
+                node_code = fragment_cache.get(fragment_key)
+                if node_code is None:
+                    node_code = WorkflowCodeGenerator._generate_node_code(node_config, i + 1, bool(sources))
+                    fragment_cache.put(fragment_key, node_code)
             else:
-                # For API nodes, we need to modify the code to use input_data for path/query params
-                node_code = WorkflowCodeGenerator.generate_api_call_code(node_config, i + 1)
-                if input_connections:
-                    # Add code to substitute input data into path and query parameters
-                    substitution_code = []
-                    substitution_code.append("# Substitute input data into parameters")
-                    substitution_code.append("if input_data:")
-                    substitution_code.append("    for key, value in input_data.items():")
-                    substitution_code.append("        if isinstance(value, dict):")
-                    substitution_code.append("            for sub_key, sub_value in value.items():")
-                    substitution_code.append("                if isinstance(sub_value, (str, int, float)):")
-                    substitution_code.append("                    # Replace in path params")
-                    substitution_code.append("                    for param_key in list(path_params.keys()):")
-                    substitution_code.append("                        if path_params[param_key] == f'{{{sub_key}}}':")
-                    substitution_code.append("                            path_params[param_key] = str(sub_value)")
-                    substitution_code.append("                    # Replace in query params")
-                    substitution_code.append("                    for param_key in list(params.keys()):")
-                    substitution_code.append("                        if params[param_key] == f'{{{sub_key}}}':")
-                    substitution_code.append("                            params[param_key] = str(sub_value)")
-                    substitution_code.append("")
-                    
-                    # Insert the substitution code before the API call
-                    lines = node_code.split('\n')
-                    api_call_index = -1
-                    for j, line in enumerate(lines):
-                        if 'response = requests.' in line:
-                            api_call_index = j
-                            break
-                    
-                    if api_call_index != -1:
-                        lines.insert(api_call_index, '\n'.join(substitution_code))
-                        node_code = '\n'.join(lines)
+                node_code = WorkflowCodeGenerator._generate_node_code(node_config, i + 1, bool(sources))
             
             code_parts.append(node_code)
             code_parts.append("")
@@ -364,4 +583,4 @@ processed_data = process_data(data)
         else:
             code_parts.append("print(data)")
         
-        return "\n".join(code_parts) 
\ No newline at end of file
+        return "\n".join(code_parts)
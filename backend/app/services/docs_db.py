@@ -0,0 +1,112 @@
+"""
+Pooled read-only access to the GitHub API docs database.
+
+The docs endpoints used to open and close a sqlite3 connection per request,
+paying for the open, schema parse and statement compilation every time. The
+pool keeps a few long-lived read-only connections (memory-mapped reads,
+prepared statement cache) and hands them out one at a time, so they can be
+shared safely by FastAPI's threadpool workers. Connections are opened with
+mode=ro and never write to the file; schema migrations are a separate step
+(see docs_migrations).
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+from urllib.parse import quote
+
+
+class ReadOnlyConnectionPool:
+    """Fixed-size pool of read-only SQLite connections, opened on demand."""
+
+    def __init__(self, path: str, size: int = 4, mmap_size: int = 64 * 1024 * 1024,
+                 cached_statements: int = 128, timeout: float = 30.0):
+        self.path = path
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        # LIFO keeps the most recently used (warmest) connections in play
+        self.idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.counters = {"checkouts": 0, "waits": 0, "discarded": 0}
+
+    def _open(self) -> sqlite3.Connection:
+        # mode=ro never creates the file, unlike a plain connect
+        conn = sqlite3.connect(
+            f"file:{quote(os.path.abspath(self.path))}?mode=ro",
+            uri=True,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+        if can_open:
+            try:
+                return self._open()
+            except sqlite3.Error:
+                with self.lock:
+                    self.opened -= 1
+                raise
+        with self.lock:
+            self.counters["waits"] += 1
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a docs database connection")
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a `with` block."""
+        conn = self._checkout()
+        with self.lock:
+            self.counters["checkouts"] += 1
+        try:
+            yield conn
+        except sqlite3.DatabaseError:
+            # The connection may be unusable (e.g. the file was replaced); open a fresh one next time
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+                self.counters["discarded"] += 1
+            conn = None
+            raise
+        finally:
+            if conn is not None:
+                self.idle.put(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {**self.counters, "size": self.size, "open": self.opened, "idle": self.idle.qsize()}
+
+
+docs_db = ReadOnlyConnectionPool(
+    os.getenv("DOCS_DB_PATH", "app/github_api_docs.db"),
+    size=int(os.getenv("DOCS_DB_POOL_SIZE", "4")),
+    mmap_size=int(os.getenv("DOCS_DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+)
@@ -0,0 +1,161 @@
+"""
+Versioned schema migrations for the GitHub API docs database.
+
+The applied version is kept in `PRAGMA user_version`. Each migration runs
+in its own transaction together with the version bump, so a database is
+always at exactly one version. DocumentationExtractor migrates the file it
+writes to. The backend only reads the database, so it is migrated explicitly:
+
+    python -m app.services.docs_migrations [path] [--wal]
+
+or at startup with DOCS_DB_MIGRATE=true. Like docs_search, this module only
+needs the standard library so the extractor can import it.
+"""
+import argparse
+import os
+import sqlite3
+from typing import Callable, List, Optional, Tuple
+
+from .docs_search import ensure_search_index
+
+
+def _create_docs_table(conn: sqlite3.Connection) -> None:
+    # The schema DocumentationExtractor used to create itself
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS github_api_docs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            method TEXT NOT NULL,
+            path TEXT NOT NULL,
+            summary TEXT,
+            operation_id TEXT,
+            doc_url TEXT,
+            documentation TEXT,
+            required_params TEXT,
+            response_schema TEXT,
+            code_examples TEXT,
+            category TEXT
+        )
+    """)
+
+
+def _unique_endpoints(conn: sqlite3.Connection) -> None:
+    # Keep one row per endpoint: successfully documented rows first, then the newest
+    conn.execute("""
+        DELETE FROM github_api_docs WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY method, path
+                    ORDER BY (documentation IS NULL OR documentation LIKE 'Error %'), id DESC
+                ) AS position
+                FROM github_api_docs
+            ) WHERE position > 1
+        )
+    """)
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS github_api_docs_method_path ON github_api_docs (method, path)"
+    )
+    # Method-only lookups use the leading column of the unique index
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS github_api_docs_category ON github_api_docs (category, method)"
+    )
+
+
+def _timestamps(conn: sqlite3.Connection) -> None:
+    # ALTER TABLE cannot add a column with a non-constant default, so triggers fill them in
+    conn.execute("ALTER TABLE github_api_docs ADD COLUMN created_at TEXT")
+    conn.execute("ALTER TABLE github_api_docs ADD COLUMN updated_at TEXT")
+    conn.execute("UPDATE github_api_docs SET created_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP")
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS github_api_docs_created AFTER INSERT ON github_api_docs
+        WHEN NEW.created_at IS NULL BEGIN
+            UPDATE github_api_docs
+            SET created_at = CURRENT_TIMESTAMP, updated_at = COALESCE(NEW.updated_at, CURRENT_TIMESTAMP)
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS github_api_docs_touched AFTER UPDATE ON github_api_docs
+        WHEN NEW.updated_at IS OLD.updated_at BEGIN
+            UPDATE github_api_docs SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS github_api_docs_updated_at ON github_api_docs (updated_at)")
+
+
+def _search_index(conn: sqlite3.Connection) -> None:
+    # Databases indexed before migrations existed have an update trigger that
+    # also fires on timestamp changes; recreate it
+    conn.execute("DROP TRIGGER IF EXISTS github_api_docs_fts_update")
+    ensure_search_index(conn)
+
+
+# (version, description, migration); versions are consecutive and never reused
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "create github_api_docs", _create_docs_table),
+    (2, "deduplicate and index (method, path); index category", _unique_endpoints),
+    (3, "add created_at/updated_at", _timestamps),
+    (4, "full-text search index", _search_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations on a writable connection; returns the resulting version."""
+    current = schema_version(conn)
+    if current >= SCHEMA_VERSION:
+        return current
+    # Manage transactions explicitly rather than through the sqlite3 module
+    isolation_level = conn.isolation_level
+    conn.commit()
+    conn.isolation_level = None
+    try:
+        for version, _, apply in MIGRATIONS:
+            # Re-read under the write lock, in case another process migrated meanwhile
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if schema_version(conn) >= version:
+                    conn.execute("COMMIT")
+                    continue
+                apply(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return schema_version(conn)
+    finally:
+        conn.isolation_level = isolation_level
+
+
+def migrate_file(path: str, wal: bool = False) -> int:
+    """
+    Migrate the database at `path`; returns the resulting version. `wal` also
+    switches the file to WAL, so readers never block on a writer's transactions.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        version = migrate(conn)
+        if wal:
+            conn.execute("PRAGMA journal_mode=WAL")
+        return version
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bring the GitHub API docs database schema up to date.")
+    parser.add_argument("path", nargs="?", default=os.getenv("DOCS_DB_PATH", "app/github_api_docs.db"))
+    parser.add_argument("--wal", action="store_true", help="also switch the database to WAL journaling")
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.path):
+        parser.error(f"{args.path} does not exist")
+    print(f"{args.path}: schema version {migrate_file(args.path, wal=args.wal)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Full-text search over the GitHub API docs.
+
+An FTS5 index mirrors github_api_docs (external content, kept in sync by
+triggers, so writers such as DocumentationExtractor need no changes). It is
+created by the docs database migrations.
+Results are ranked with BM25, weighting path and summary matches above the
+long-form documentation. Each search word matches as a prefix ("iss" finds
+"issues"), served from 2- and 3-character prefix indexes. This module only uses the standard library so the extractor CLI
+can import it too.
+"""
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+FTS_TABLE = "github_api_docs_fts"
+
+# Indexed columns and their BM25 weights, in table order
+FTS_COLUMNS = (("path", 8.0), ("summary", 4.0), ("operation_id", 2.0), ("documentation", 1.0))
+
+# Statements (not a script) so they can run inside a migration's transaction
+SEARCH_SCHEMA = (
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {", ".join(column for column, _ in FTS_COLUMNS)},
+        content='github_api_docs',
+        content_rowid='id',
+        tokenize="unicode61 remove_diacritics 2",
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS github_api_docs_fts_insert AFTER INSERT ON github_api_docs BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, path, summary, operation_id, documentation)
+        VALUES (new.id, new.path, new.summary, new.operation_id, new.documentation);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS github_api_docs_fts_delete AFTER DELETE ON github_api_docs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, path, summary, operation_id, documentation)
+        VALUES ('delete', old.id, old.path, old.summary, old.operation_id, old.documentation);
+    END""",
+    # Only changes to indexed columns reindex the row (not e.g. updated_at)
+    f"""CREATE TRIGGER IF NOT EXISTS github_api_docs_fts_update
+    AFTER UPDATE OF path, summary, operation_id, documentation ON github_api_docs BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, path, summary, operation_id, documentation)
+        VALUES ('delete', old.id, old.path, old.summary, old.operation_id, old.documentation);
+        INSERT INTO {FTS_TABLE}(rowid, path, summary, operation_id, documentation)
+        VALUES (new.id, new.path, new.summary, new.operation_id, new.documentation);
+    END""",
+)
+
+SEARCH_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Create the FTS index and its triggers if missing, filling a new index from
+    the existing rows. Needs a writable connection and leaves committing to
+    the caller; returns True if the index was created.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    for statement in SEARCH_SCHEMA:
+        conn.execute(statement)
+    if exists:
+        return False
+    # Persist the column weights as the default ranking, so `ORDER BY rank` uses them
+    weights = ", ".join(str(weight) for _, weight in FTS_COLUMNS)
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25({weights})')")
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, as a prefix
+    (single characters match whole words only, as a prefix of one letter
+    matches nearly everything). Words are quoted, so FTS operators and
+    punctuation in the input are inert.
+    """
+    words = SEARCH_WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' if len(word) > 1 else f'"{word}"' for word in words)
+
+
+def search_docs(conn: sqlite3.Connection, text: str, category: Optional[str] = None,
+                method: Optional[str] = None, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+    """BM25-ranked docs matching `text`, with a highlighted snippet per result."""
+    match = build_match_query(text)
+    if match is None:
+        return []
+
+    query = f"""
+        SELECT d.id, d.method, d.path, d.summary, d.category,
+               {FTS_TABLE}.rank AS score,
+               highlight({FTS_TABLE}, 0, '<mark>', '</mark>') AS path_highlight,
+               snippet({FTS_TABLE}, -1, '<mark>', '</mark>', '…', 16) AS snippet
+        FROM {FTS_TABLE}
+        JOIN github_api_docs AS d ON d.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+    """
+    params: List[Any] = [match]
+    if category:
+        query += " AND d.category = ?"
+        params.append(category)
+    if method:
+        query += " AND d.method = ? COLLATE NOCASE"
+        params.append(method)
+    query += f" ORDER BY {FTS_TABLE}.rank LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+
+    columns = ("id", "method", "path", "summary", "category", "score", "path_highlight", "snippet")
+    return [
+        # bm25() is lower-is-better; flip it so clients can sort descending
+        {**dict(zip(columns, row)), "score": round(-row[5], 4)}
+        for row in conn.execute(query, params)
+    ]
@@ -0,0 +1,104 @@
+"""
+Precomputed `/api-docs/structure` response.
+
+The docs only change when DocumentationExtractor runs, so the grouped
+category structure is built once, serialised to bytes and served as is
+with a strong ETag. The cached copy is rebuilt when the database file (or
+its WAL) changes on disk, when the schema version recorded by the docs
+migrations changes, or when STRUCTURE_VERSION is bumped for a new response shape.
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from .docs_db import ReadOnlyConnectionPool, docs_db
+
+# Bump when the shape of the structure response changes
+STRUCTURE_VERSION = 1
+
+
+def group_by_category(rows: List[Tuple[Any, ...]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group (id, method, path, summary, category) rows into {category: [endpoint, ...]}."""
+    structure: Dict[str, List[Dict[str, Any]]] = {}
+    for id, method, path, summary, category in rows:
+        structure.setdefault(category, []).append({
+            "id": id,
+            "method": method,
+            "path": path,
+            "summary": summary,
+            "category": category
+        })
+    return structure
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class DocsStructureCache:
+    """Serialised category structure plus its ETag, rebuilt only when the database changes."""
+
+    def __init__(self, pool: ReadOnlyConnectionPool):
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.file_state: Optional[Tuple[Any, ...]] = None
+        self.schema_version: Optional[int] = None
+        self.body = b""
+        self.etag = ""
+        self.counters = {"hits": 0, "rebuilds": 0}
+
+    def _file_state(self) -> Tuple[Any, ...]:
+        state = []
+        for path in (self.pool.path, f"{self.pool.path}-wal"):
+            try:
+                stat = os.stat(path)
+                state.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                state.append(None)
+        return tuple(state)
+
+    def get(self) -> Tuple[bytes, str]:
+        """Return the serialised structure and its ETag."""
+        file_state = self._file_state()
+        if file_state == self.file_state:
+            self.counters["hits"] += 1
+            return self.body, self.etag
+
+        with self.lock:
+            if file_state == self.file_state:
+                return self.body, self.etag
+            # The file state is taken before reading, so a write racing the
+            # rebuild leaves it stale and the next request rebuilds again
+            with self.pool.connection() as conn:
+                schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+                rows = conn.execute(
+                    "SELECT id, method, path, summary, category FROM github_api_docs ORDER BY category, path"
+                ).fetchall()
+            body = json.dumps(group_by_category(rows), separators=(',', ':')).encode('utf-8')
+            digest = hashlib.sha256(body)
+            digest.update(f"{schema_version}:{STRUCTURE_VERSION}".encode('ascii'))
+            self.body = body
+            self.etag = f'"{digest.hexdigest()[:32]}"'
+            self.schema_version = schema_version
+            self.file_state = file_state
+            self.counters["rebuilds"] += 1
+            return self.body, self.etag
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "etag": self.etag,
+            "bytes": len(self.body),
+            "schema_version": self.schema_version,
+            "structure_version": STRUCTURE_VERSION
+        }
+
+
+docs_structure = DocsStructureCache(docs_db)
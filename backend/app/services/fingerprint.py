@@ -0,0 +1,44 @@
+"""
+Canonical fingerprints for workflow nodes, ignoring layout-only fields.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List
+
+# Fields that only affect how a node is drawn, never what it computes
+LAYOUT_FIELDS = {"position", "positionAbsolute", "selected", "dragging", "width", "height", "zIndex"}
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize a value deterministically (sorted keys, no whitespace)."""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def body_hash(value: Any) -> str:
+    """Hash a response body (parsed JSON or text) independently of key order."""
+    return hashlib.sha256(canonical_json(value).encode('utf-8')).hexdigest()
+
+
+def strip_layout(node_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of a node (or node data) dict without layout-only fields."""
+    return {key: value for key, value in node_config.items() if key not in LAYOUT_FIELDS}
+
+
+def node_fingerprint(node_config: Dict[str, Any], input_fingerprints: Iterable[str] = ()) -> str:
+    """Fingerprint a node's configuration together with the fingerprints of its inputs."""
+    digest = hashlib.sha256()
+    digest.update(canonical_json(strip_layout(node_config)).encode('utf-8'))
+    for input_fingerprint in input_fingerprints:
+        digest.update(b'\0')
+        digest.update(input_fingerprint.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def workflow_fingerprint(nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> str:
+    """Fingerprint a whole workflow; moving nodes around the canvas does not change it."""
+    canonical_nodes = [
+        {**strip_layout(node), "data": strip_layout(node.get('data', {}))}
+        for node in nodes
+    ]
+    payload = {"nodes": canonical_nodes, "connections": connections}
+    return hashlib.sha256(canonical_json(payload).encode('utf-8')).hexdigest()
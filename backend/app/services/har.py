@@ -0,0 +1,200 @@
+"""
+HAR 1.2 export of a session's recorded calls.
+
+The document is produced incrementally: calls are read from the call store a
+page at a time and written out entry by entry, so memory use does not depend
+on the size of the session.
+"""
+import fnmatch
+import json
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+HAR_CREATOR = {"name": "API Sandbox", "version": "1.0.0"}
+
+# Calls read from the store per page while streaming an export
+HAR_PAGE_SIZE = 100
+
+
+class HarFilter:
+    """Time range, status and URL pattern filters for exported calls."""
+
+    def __init__(self, since: Optional[float] = None, until: Optional[float] = None,
+                 status: Optional[str] = None, url: Optional[str] = None):
+        self.since = since
+        self.until = until
+        self.status_ranges = self.parse_status(status) if status else None
+        self.url_pattern = url
+
+    @staticmethod
+    def parse_status(spec: str) -> List[Tuple[int, int]]:
+        """Parse "200", "4xx", "500-599" or a comma-separated mix into inclusive ranges."""
+        ranges = []
+        for part in spec.split(","):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if part.endswith("xx") and len(part) == 3 and part[0].isdigit():
+                base = int(part[0]) * 100
+                ranges.append((base, base + 99))
+            elif "-" in part:
+                low, high = part.split("-", 1)
+                ranges.append((int(low), int(high)))
+            else:
+                ranges.append((int(part), int(part)))
+        return ranges
+
+    def matches(self, call: Dict[str, Any]) -> bool:
+        timestamp = call.get("timestamp") or 0
+        if self.since is not None and timestamp < self.since:
+            return False
+        if self.until is not None and timestamp > self.until:
+            return False
+        if self.status_ranges is not None:
+            status = call.get("status") or 0
+            if not any(low <= status <= high for low, high in self.status_ranges):
+                return False
+        if self.url_pattern and not fnmatch.fnmatchcase(call.get("url", ""), self.url_pattern):
+            return False
+        return True
+
+
+def _name_values(pairs: Any) -> List[Dict[str, str]]:
+    if hasattr(pairs, "items"):
+        pairs = pairs.items()
+    return [{"name": str(name), "value": str(value)} for name, value in pairs or []]
+
+
+def _header_lookup(headers: Dict[str, Any], name: str) -> Optional[str]:
+    for key, value in dict(headers or {}).items():
+        if key.lower() == name:
+            return str(value)
+    return None
+
+
+def _har_timings(timing: Optional[Dict[str, Any]]) -> Tuple[Dict[str, float], float]:
+    """Map a recorded timing breakdown onto HAR timings (-1 marks unknown phases)."""
+    if not timing:
+        return {"send": 0, "wait": 0, "receive": 0}, 0
+
+    def phase(name: str) -> float:
+        value = timing.get(name)
+        return value if value is not None else -1
+
+    connect = phase("connect_ms")
+    tls = phase("tls_ms")
+    timings = {
+        "blocked": phase("queue_ms"),
+        "dns": -1,
+        # HAR counts the TLS handshake as part of connect
+        "connect": connect + tls if connect >= 0 and tls >= 0 else connect,
+        "ssl": tls,
+        "send": max(0, timing.get("send_ms") or 0),
+        "wait": max(0, timing.get("wait_ms") if timing.get("wait_ms") is not None else timing.get("ttfb_ms") or 0),
+        "receive": max(0, timing.get("transfer_ms") or 0),
+    }
+    total = timing.get("total_ms")
+    if total is None:
+        total = sum(value for key, value in timings.items() if value > 0 and key != "ssl")
+    return timings, total
+
+
+def call_to_har_entry(call: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a recorded call (with its body resolved) into a HAR entry."""
+    timings, total = _har_timings(call.get("timing"))
+    # Calls are timestamped when recorded, i.e. after the response arrived
+    started = (call.get("timestamp") or 0) - total / 1000
+    url = call.get("url", "")
+
+    request_info = call.get("request") if isinstance(call.get("request"), dict) else {}
+    request_headers = call.get("request_headers") or request_info.get("headers") or {}
+    query = parse_qsl(urlparse(url).query, keep_blank_values=True)
+    query += list(dict(call.get("query_params") or {}).items())
+
+    request = {
+        "method": call.get("method", "GET"),
+        "url": url,
+        "httpVersion": "HTTP/1.1",
+        "cookies": [],
+        "headers": _name_values(request_headers),
+        "queryString": _name_values(query),
+        "headersSize": -1,
+        "bodySize": -1,
+    }
+    request_body = call.get("request_body") or call.get("request_data") or request_info.get("data")
+    if request_body is not None:
+        text = request_body if isinstance(request_body, str) else json.dumps(request_body)
+        request["postData"] = {
+            "mimeType": _header_lookup(request_headers, "content-type") or "application/json",
+            "text": text
+        }
+        request["bodySize"] = len(text.encode('utf-8'))
+
+    status = call.get("status") or 0
+    response_headers = call.get("headers") or {}
+    body = call.get("response")
+    text = body if isinstance(body, str) or body is None else json.dumps(body)
+    try:
+        status_text = HTTPStatus(status).phrase
+    except ValueError:
+        status_text = ""
+    content = {
+        "size": len(text.encode('utf-8')) if text else 0,
+        "mimeType": _header_lookup(response_headers, "content-type") or "application/json",
+    }
+    if text:
+        content["text"] = text
+    if call.get("truncated"):
+        content["comment"] = f"Truncated; {call.get('response_bytes')} bytes were received"
+
+    entry = {
+        "startedDateTime": datetime.fromtimestamp(started, tz=timezone.utc).isoformat(),
+        "time": total,
+        "request": request,
+        "response": {
+            "status": status,
+            "statusText": status_text,
+            "httpVersion": "HTTP/1.1",
+            "cookies": [],
+            "headers": _name_values(response_headers),
+            "content": content,
+            "redirectURL": _header_lookup(response_headers, "location") or "",
+            "headersSize": -1,
+            "bodySize": (call.get("timing") or {}).get("response_bytes", -1) if call.get("timing") else -1,
+        },
+        "cache": {},
+        "timings": timings,
+    }
+    if call.get("error"):
+        entry["comment"] = str(call["error"])
+    return entry
+
+
+async def iter_har(fetch_page: Callable[[int], Awaitable[Dict[str, Any]]],
+                   har_filter: HarFilter, comment: str = "") -> AsyncIterator[str]:
+    """
+    Yield a HAR document in pieces. `fetch_page(after_id)` returns a page from
+    ApiProxy.get_calls_page() with bodies resolved.
+    """
+    log_header = {"version": "1.2", "creator": HAR_CREATOR, "pages": []}
+    if comment:
+        log_header["comment"] = comment
+    # Emit the log header without its closing brace, then append entries
+    yield '{"log": ' + json.dumps(log_header)[:-1] + ', "entries": ['
+
+    first = True
+    cursor = -1
+    while True:
+        page = await fetch_page(cursor)
+        for call in page["calls"]:
+            cursor = call["id"]
+            if not har_filter.matches(call):
+                continue
+            yield ("" if first else ",") + "\n" + json.dumps(call_to_har_entry(call), default=str)
+            first = False
+        if not page["has_more"]:
+            break
+
+    yield "\n]}}\n"
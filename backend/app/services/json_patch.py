@@ -0,0 +1,144 @@
+"""
+Minimal RFC 6902 JSON Patch: generate a patch between two JSON values and apply one.
+
+Only "add", "remove" and "replace" operations are produced. Array items are
+aligned with difflib, so the typical change to a GitHub listing (items added
+at the front, dropped off the end, or edited in place) yields a few
+operations rather than a rewrite of the whole array.
+"""
+import copy
+from difflib import SequenceMatcher
+from typing import Any, Dict, List
+
+from .fingerprint import canonical_json
+
+Patch = List[Dict[str, Any]]
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch cannot be applied to a document."""
+
+
+def escape_token(token: Any) -> str:
+    """Escape a key or index for use in an RFC 6901 JSON Pointer."""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _same(a: Any, b: Any) -> bool:
+    # True == 1 (and [True] == [1]) in Python, but they are different JSON values
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(value, b[key]) for key, value in a.items())
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> Patch:
+    """Return the operations that turn `old` into `new`."""
+    if _same(old, new):
+        return []
+
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch: Patch = []
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{escape_token(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{escape_token(key)}"
+            if key in old:
+                patch.extend(make_patch(old[key], value, child))
+            else:
+                patch.append({"op": "add", "path": child, "value": value})
+        return patch
+
+    if isinstance(old, list) and isinstance(new, list):
+        return _diff_lists(old, new, path)
+
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def _diff_lists(old: List[Any], new: List[Any], path: str) -> Patch:
+    # Align items by their canonical JSON so insertions and deletions anywhere
+    # in the array do not turn every following item into a replace
+    matcher = SequenceMatcher(None, [canonical_json(item) for item in old],
+                              [canonical_json(item) for item in new], autojunk=False)
+    patch: Patch = []
+    shift = 0  # Index change caused by the operations emitted so far
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        index = old_start + shift
+        old_count, new_count = old_end - old_start, new_end - new_start
+        # Pair up changed items, then add or remove the difference in length
+        for offset in range(min(old_count, new_count)):
+            patch.extend(make_patch(old[old_start + offset], new[new_start + offset], f"{path}/{index + offset}"))
+        for offset in range(old_count, new_count):
+            patch.append({"op": "add", "path": f"{path}/{index + offset}", "value": new[new_start + offset]})
+        # Each removal shifts the rest left, so they all target the same index
+        for _ in range(new_count, old_count):
+            patch.append({"op": "remove", "path": f"{path}/{index + new_count}"})
+        shift += new_count - old_count
+    return patch
+
+
+def _resolve_parent(document: Any, path: str):
+    if not path.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON Pointer: {path!r}")
+    *parents, last = [unescape_token(token) for token in path[1:].split("/")]
+    target = document
+    for token in parents:
+        try:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise JsonPatchError(f"Path not found: {path}")
+    return target, last
+
+
+def apply_patch(document: Any, patch: Patch) -> Any:
+    """
+    Apply add/remove/replace operations to a copy of `document`. This mirrors
+    the client's applyJsonPatch and is what generated patches are tested against.
+    """
+    document = copy.deepcopy(document)
+    for operation in patch:
+        op, path = operation.get("op"), operation.get("path", "")
+        if op not in ("add", "remove", "replace"):
+            raise JsonPatchError(f"Unsupported operation: {op}")
+        if path == "":
+            if op == "remove":
+                raise JsonPatchError("Cannot remove the whole document")
+            document = copy.deepcopy(operation["value"])
+            continue
+
+        parent, token = _resolve_parent(document, path)
+        try:
+            if isinstance(parent, list):
+                index = len(parent) if token == "-" and op == "add" else int(token)
+                if index < 0:
+                    raise IndexError(index)
+                if op == "add":
+                    if index > len(parent):
+                        raise IndexError(index)
+                    parent.insert(index, copy.deepcopy(operation["value"]))
+                elif op == "remove":
+                    del parent[index]
+                else:
+                    parent[index] = copy.deepcopy(operation["value"])
+            elif isinstance(parent, dict):
+                if op != "add" and token not in parent:
+                    raise KeyError(token)
+                if op == "remove":
+                    del parent[token]
+                else:
+                    parent[token] = copy.deepcopy(operation["value"])
+            else:
+                raise TypeError(type(parent).__name__)
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise JsonPatchError(f"Cannot {op} at {path}")
+    return document
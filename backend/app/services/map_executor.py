@@ -0,0 +1,155 @@
+"""
+Fan-out execution for MAP nodes: one API call per input item with bounded concurrency.
+"""
+import asyncio
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from .rate_limiter import RateLimitExceeded
+from .timing import response_timing
+from .upstream import build_request_params, send_request
+
+# A parameter value of exactly "{field}" is bound from the current item
+PLACEHOLDER_PATTERN = re.compile(r"^\{([^{}]+)\}$")
+
+
+def extract_item_value(item: Any, field_path: str) -> Any:
+    """Look up a dotted/indexed field path (e.g. "owner.login", "topics[0]") in an item."""
+    if field_path == 'item':
+        return item
+
+    current = item
+    for part in field_path.replace('[', '.').replace(']', '').split('.'):
+        if not part:
+            continue
+        if isinstance(current, list):
+            current = current[int(part)]
+        elif isinstance(current, dict):
+            current = current[part]
+        else:
+            raise KeyError(field_path)
+    return current
+
+
+def bind_item_params(params: Dict[str, Any], item: Any) -> Dict[str, str]:
+    """Replace "{field}" placeholders in a parameter dict with values from the item."""
+    bound = {}
+    for key, value in params.items():
+        match = PLACEHOLDER_PATTERN.match(value) if isinstance(value, str) else None
+        if match:
+            bound[key] = str(extract_item_value(item, match.group(1)))
+        else:
+            bound[key] = value
+    return bound
+
+
+class MapExecutor:
+    """Issue a templated API request for every element of an input array."""
+
+    def __init__(self, concurrency: int = 4, retries: int = 2, ordered: bool = True, backoff: float = 0.5):
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        self.ordered = ordered
+        self.backoff = backoff
+
+    async def _call_item(
+        self,
+        index: int,
+        item: Any,
+        request_template: Dict[str, Any],
+        on_call: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]],
+    ) -> Dict[str, Any]:
+        """Make the request for a single item, retrying transient failures."""
+        try:
+            request_params = build_request_params(
+                request_template.get('type', 'GET'),
+                request_template.get('url', ''),
+                request_template.get('headers', {}),
+                bind_item_params(request_template.get('query_params', {}), item),
+                bind_item_params(request_template.get('path_params', {}), item),
+                request_template.get('body'),
+            )
+        except (KeyError, IndexError, ValueError) as e:
+            return {"index": index, "result": None, "error": f"Could not bind item fields: {e}"}
+
+        last_error = None
+        for attempt in range(self.retries + 1):
+            try:
+                response = await send_request(request_params)
+                response.raise_for_status()
+                try:
+                    response_data = response.json()
+                except json.JSONDecodeError:
+                    response_data = response.text
+
+                if on_call:
+                    await on_call({
+                        "method": request_params["method"],
+                        "url": request_params["url"],
+                        "status": response.status_code,
+                        "response": response_data,
+                        "headers": dict(response.headers),
+                        "timestamp": time.time(),
+                        "query_params": request_params["params"],
+                        "timing": response_timing(response),
+                        "endpoint_template": request_template.get('url')
+                    })
+                return {"index": index, "result": response_data}
+            except RateLimitExceeded as e:
+                last_error = e
+                break
+            except httpx.HTTPError as e:
+                last_error = e
+                # Client errors other than rate limiting will not succeed on retry
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 0
+                if 400 <= status < 500 and status != 429:
+                    break
+                if attempt < self.retries:
+                    await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        if on_call:
+            await on_call({
+                "method": request_params["method"],
+                "url": request_params["url"],
+                "status": 0,
+                "response": None,
+                "headers": {},
+                "timestamp": time.time(),
+                "error": str(last_error)
+            })
+        return {"index": index, "result": None, "error": str(last_error)}
+
+    async def run(
+        self,
+        items: List[Any],
+        request_template: Dict[str, Any],
+        on_call: Optional[Callable[[Dict[str, Any]], Awaitable[Any]]] = None,
+    ) -> Dict[str, Any]:
+        """Run the request template over all items and collect the results."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(index: int, item: Any) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._call_item(index, item, request_template, on_call)
+
+        tasks = [bounded(index, item) for index, item in enumerate(items)]
+
+        if self.ordered:
+            outcomes = await asyncio.gather(*tasks)
+        else:
+            outcomes = []
+            for next_done in asyncio.as_completed(tasks):
+                outcomes.append(await next_done)
+
+        return {
+            "results": [outcome["result"] for outcome in outcomes],
+            "indices": [outcome["index"] for outcome in outcomes],
+            "errors": [
+                {"index": outcome["index"], "error": outcome["error"]}
+                for outcome in outcomes if "error" in outcome
+            ]
+        }
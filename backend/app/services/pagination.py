@@ -0,0 +1,77 @@
+"""
+Pagination over GitHub list endpoints by following `Link: rel="next"` headers.
+"""
+import asyncio
+import re
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Matches one `<url>; rel="name"` entry of a Link header
+LINK_PATTERN = re.compile(r'<([^>]+)>\s*;\s*rel="([^"]+)"')
+
+
+def parse_link_header(link_header: Optional[str]) -> Dict[str, str]:
+    """Parse a Link header into a {rel: url} dict."""
+    if not link_header:
+        return {}
+    return {rel: url for url, rel in LINK_PATTERN.findall(link_header)}
+
+
+def is_paginated(node_config: Dict[str, Any]) -> bool:
+    """Whether an API node should follow pagination links (GET nodes with pagination enabled)."""
+    return bool(node_config.get('pagination', {}).get('enabled')) and node_config.get('type', 'GET').upper() == 'GET'
+
+
+def extract_page_items(page_data: Any) -> List[Any]:
+    """Return the list of items in a page (search endpoints wrap them in "items")."""
+    if isinstance(page_data, list):
+        return page_data
+    if isinstance(page_data, dict) and isinstance(page_data.get('items'), list):
+        return page_data['items']
+    return [page_data]
+
+
+async def iter_pages(
+    request_params: Dict[str, Any],
+    send: Callable[[Dict[str, Any]], Awaitable[Any]],
+    max_items: Optional[int] = None,
+    prefetch: bool = False,
+) -> AsyncIterator[Tuple[Any, List[Any]]]:
+    """
+    Lazily yield (response, items) for each page of a list endpoint.
+
+    With prefetch, the request for the next page is started before the current
+    page is handed to the caller, so at most one extra page is held in memory.
+    Stops once max_items items have been yielded.
+    """
+    yielded = 0
+    pending: Optional[asyncio.Task] = None
+    response = await send(request_params)
+
+    try:
+        while True:
+            response.raise_for_status()
+            items = extract_page_items(response.json())
+            next_url = parse_link_header(response.headers.get('Link')).get('next')
+
+            if max_items is not None and yielded + len(items) >= max_items:
+                items = items[:max_items - yielded]
+                next_url = None
+
+            # The next link already carries the query string, including per_page
+            next_params = {**request_params, "url": next_url, "params": None} if next_url else None
+            if prefetch and next_params:
+                pending = asyncio.ensure_future(send(next_params))
+
+            yielded += len(items)
+            yield response, items
+
+            if not next_params:
+                return
+            if pending is not None:
+                response = await pending
+                pending = None
+            else:
+                response = await send(next_params)
+    finally:
+        if pending is not None:
+            pending.cancel()
@@ -0,0 +1,22 @@
+"""
+Owner-only directories for on-disk caches.
+
+Cached and spilled response bodies can hold data fetched with a user's
+credentials, and the default locations are under the shared temp directory,
+so they are kept in directories only the backend's own user can open.
+"""
+import os
+
+
+def make_private_dir(path: str) -> str:
+    """
+    Create `path` with mode 0700, or tighten an existing directory to it.
+    Refuses a directory owned by another user, which could read or plant entries.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    stat = os.stat(path)
+    if hasattr(os, "getuid") and stat.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    if stat.st_mode & 0o077:
+        os.chmod(path, 0o700)
+    return path
@@ -1,33 +1,185 @@
-import requests
+import anyio
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import uuid
 import time
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+from .call_events import CallEventBroker, call_event_broker
+from .call_store import CallStore, create_call_store
+from .timing import TimingStats, endpoint_template, response_timing, timing_stats
+from .upstream import open_stream, send_request
+
+# Call fields left out of summaries and served by the body endpoint instead
+BODY_FIELDS = ("response", "response_ref", "responseData", "request")
+
+# Bodies longer than this are truncated in the session record
+MAX_RECORDED_BODY = 10000
+
+# Response headers not forwarded by the streaming proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length",
+    "proxy-authenticate", "proxy-authorization", "te", "trailer", "upgrade"
+}
+
+
+def summarize_call(call: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop request/response bodies from a call, keeping the size of the response."""
+    summary = {key: value for key, value in call.items() if key not in BODY_FIELDS}
+    if "response_ref" in call:
+        summary["response_size"] = call["response_ref"]["size"]
+    else:
+        response = call.get("response")
+        summary["response_size"] = len(response) if isinstance(response, str) else len(json.dumps(response, default=str))
+    return summary
+
+
+def build_recorded_call(call_data: Any) -> Dict[str, Any]:
+    """
+    Validate a call reported by a client (sandbox, VS Code extension) and
+    normalise it into a call record. Raises ValueError on malformed input.
+    """
+    if not isinstance(call_data, dict):
+        raise ValueError("call must be a JSON object")
+    method = call_data.get("method", "UNKNOWN")
+    url = call_data.get("url", "")
+    status = call_data.get("status", 0)
+    headers = call_data.get("headers", {})
+    timing = call_data.get("timing")
+    if not isinstance(method, str) or not isinstance(url, str):
+        raise ValueError("method and url must be strings")
+    if not isinstance(status, int) or isinstance(status, bool):
+        raise ValueError("status must be an integer")
+    if not isinstance(headers, dict):
+        raise ValueError("headers must be an object")
+    if timing is not None and not isinstance(timing, dict):
+        raise ValueError("timing must be an object")
+    return {
+        "method": method,
+        "url": url,
+        "status": status,
+        "response": call_data.get("response", ""),
+        "headers": headers,
+        "timestamp": time.time(),
+        "error": call_data.get("error"),
+        "timing": timing
+    }
+
 
 class ApiProxy:
-    def __init__(self):
-        self.intercepted_calls: Dict[str, List[Dict[str, Any]]] = {}
+    def __init__(self, store: CallStore, broker: CallEventBroker, timings: TimingStats):
+        self.store = store
+        self.broker = broker
+        self.timings = timings
     
     def create_session_id(self) -> str:
         """Create a unique session ID for tracking API calls."""
         session_id = str(uuid.uuid4())
-        self.intercepted_calls[session_id] = []
+        self.store.create_session(session_id)
         return session_id
     
+    def has_session(self, session_id: str) -> bool:
+        """Whether a session exists (and has not expired)."""
+        return self.store.has_session(session_id)
+    
     def get_calls(self, session_id: str) -> List[Dict[str, Any]]:
         """Get all intercepted calls for a session."""
-        return self.intercepted_calls.get(session_id, [])
+        return [self.store.resolve(call) for call in self.store.get_calls(session_id)]
+
+    def resolve_call(self, call: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a stored call's response body back in from the blob store."""
+        return self.store.resolve(call)
+    
+    def get_calls_page(self, session_id: str, after_id: int = -1, limit: int = 100,
+                       summary: bool = False) -> Dict[str, Any]:
+        """Return the calls after a cursor, optionally without their bodies."""
+        # Fetch one extra call to know whether another page follows
+        calls = self.store.get_calls_after(session_id, after_id, limit + 1)
+        has_more = len(calls) > limit
+        calls = calls[:limit]
+        if summary:
+            calls = [summarize_call(call) for call in calls]
+        else:
+            calls = [self.store.resolve(call) for call in calls]
+        if calls:
+            next_after_id = calls[-1]["id"]
+        elif after_id >= 0 and self.store.get_call(session_id, after_id) is None \
+                and self.store.get_calls_after(session_id, -1, 1):
+            # Calls exist but none reach the cursor: the session was recreated and
+            # its ids restarted, so send the client back to the start
+            next_after_id = -1
+        else:
+            next_after_id = after_id
+        return {
+            "calls": calls,
+            "next_after_id": next_after_id,
+            "has_more": has_more
+        }
+    
+    def get_call_body(self, session_id: str, call_id: int) -> Optional[Dict[str, Any]]:
+        """Return the body fields of one call, or None if it is not stored."""
+        call = self.store.get_call(session_id, call_id)
+        if call is None:
+            return None
+        call = self.store.resolve(call)
+        return {"id": call_id, **{field: call.get(field) for field in BODY_FIELDS if field in call}}
+    
+    def find_response(self, session_id: str, response_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the most recent call in a session whose body has the given `response_hash`."""
+        for call in reversed(self.store.get_calls(session_id)):
+            if call.get("response_hash") == response_hash:
+                return self.store.resolve(call)
+        return None
+    
+    def record_call(self, session_id: str, call_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a call to a session (creating it if needed) and notify live subscribers."""
+        if call_data.get("timing"):
+            self.timings.observe(
+                call_data.get("method", "GET"),
+                endpoint_template(call_data.get("url", ""), call_data.get("endpoint_template")),
+                call_data["timing"],
+                call_data.get("status", 0)
+            )
+        call = self.store.append(session_id, call_data)
+        self.broker.publish(session_id, call)
+        return call
+    
+    async def record_call_async(self, session_id: str, call_data: Dict[str, Any]) -> Dict[str, Any]:
+        """record_call() on a worker thread, so SQLite/Redis stores do not block the event loop."""
+        return await run_in_threadpool(self.record_call, session_id, call_data)
+    
+    def _record_if_session(self, session_id: str, call_data: Dict[str, Any]) -> None:
+        if self.has_session(session_id):
+            self.record_call(session_id, call_data)
+    
+    def record_calls(self, session_id: str, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Append a batch of calls in one store operation and notify live subscribers."""
+        for call_data in calls:
+            if call_data.get("timing"):
+                self.timings.observe(
+                    call_data.get("method", "GET"),
+                    endpoint_template(call_data.get("url", ""), call_data.get("endpoint_template")),
+                    call_data["timing"],
+                    call_data.get("status", 0)
+                )
+        stored = self.store.append_many(session_id, calls)
+        for call in stored:
+            self.broker.publish(session_id, call)
+        return stored
     
     def clear_calls(self, session_id: str) -> None:
         """Clear all intercepted calls for a session."""
-        if session_id in self.intercepted_calls:
-            self.intercepted_calls[session_id] = []
+        self.store.clear(session_id)
     
-    async def proxy_request(self, request: Request, session_id: str) -> dict:
-        """Proxy an HTTP request and capture details."""
-        # Extract request information
-        method = request.method
+    def stats(self) -> Dict[str, Any]:
+        """Return call storage usage and eviction counters."""
+        return self.store.stats()
+    
+    async def _read_request(self, request: Request) -> Dict[str, Any]:
+        """Extract the target URL, forwarded headers and body from an incoming proxy request."""
+        # Extract request information; ?method= overrides the method of the proxy call itself
+        method = request.query_params.get("method", request.method).upper()
         url = str(request.query_params.get("url"))
         if not url:
             raise HTTPException(status_code=400, detail="URL parameter is required")
@@ -35,68 +187,72 @@ class ApiProxy:
         # Extract headers and body
         headers = {}
         for header, value in request.headers.items():
-            # Skip headers that might interfere with the proxy
-            if header.lower() not in ["host", "content-length"]:
+            # Skip headers that might interfere with the proxy; httpx negotiates
+            # Accept-Encoding itself, offering only the encodings it can decode
+            if header.lower() not in ["host", "content-length", "accept-encoding"]:
                 headers[header] = value
         
         # Get request body if any
         try:
-            body = await request.json() if request.method in ["POST", "PUT", "PATCH"] else None
+            body = await request.json() if method in ["POST", "PUT", "PATCH"] else None
         except:
             body = None
         
         # Prepare request data for logging
-        request_data = {
+        return {
             "method": method,
             "url": url,
             "headers": headers,
             "data": body,
             "timestamp": time.time(),
         }
+    
+    async def proxy_request(self, request: Request, session_id: str) -> dict:
+        """Proxy an HTTP request and capture details."""
+        request_data = await self._read_request(request)
+        method, url, headers, body = (request_data[key] for key in ("method", "url", "headers", "data"))
         
         # Make the actual request
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=body if body else None,
-                timeout=10
-            )
+            response = await send_request({
+                "method": method,
+                "url": url,
+                "headers": headers,
+                "json": body if body else None,
+                "timeout": 10
+            })
             
-            # Extract response information
-            response_data = {
-                "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "content": response.text[:10000] if len(response.text) > 10000 else response.text
-            }
+            # Decode the body once; the record keeps a single (truncated) copy
+            response_text = response.text
+            response_headers = dict(response.headers)
             
-            # Create complete call record
+            # Create complete call record; responseData.content is restored from `response` on read
             call_data = {
-                "id": len(self.intercepted_calls.get(session_id, [])),
                 "method": method,
                 "url": url,
                 "status": response.status_code,
-                "response": response.text[:10000] if len(response.text) > 10000 else response.text,
-                "headers": dict(response.headers),
+                "response": response_text[:MAX_RECORDED_BODY],
+                "headers": response_headers,
                 "timestamp": time.time(),
                 "request": request_data,
-                "responseData": response_data
+                "responseData": {
+                    "status_code": response.status_code,
+                    "headers": response_headers
+                },
+                "timing": response_timing(response)
             }
             
             # Store the call
-            if session_id in self.intercepted_calls:
-                self.intercepted_calls[session_id].append(call_data)
+            await run_in_threadpool(self._record_if_session, session_id, call_data)
             
             return {
                 "status_code": response.status_code,
-                "headers": dict(response.headers),
-                "content": response.text
+                "headers": response_headers,
+                "content": response_text
             }
             
         except Exception as e:
             error_data = {
-                "id": len(self.intercepted_calls.get(session_id, [])),
                 "method": method,
                 "url": url,
                 "status": 500,
@@ -109,12 +265,78 @@ class ApiProxy:
                 }
             }
             
-            if session_id in self.intercepted_calls:
-                self.intercepted_calls[session_id].append(error_data)
+            await run_in_threadpool(self._record_if_session, session_id, error_data)
             
             return {
                 "status_code": 500,
                 "error": str(e)
             }
 
-api_proxy = ApiProxy()
\ No newline at end of file
+    async def proxy_stream(self, request: Request, session_id: str) -> StreamingResponse:
+        """
+        Proxy a request, piping the upstream body straight through to the client.
+        Only the first MAX_RECORDED_BODY bytes are kept for the session record.
+        """
+        request_data = await self._read_request(request)
+        try:
+            response = await open_stream({
+                "method": request_data["method"],
+                "url": request_data["url"],
+                "headers": request_data["headers"],
+                "json": request_data["data"] if request_data["data"] else None,
+                "timeout": 10
+            })
+        except Exception as e:
+            await run_in_threadpool(self._record_if_session, session_id, {
+                "method": request_data["method"],
+                "url": request_data["url"],
+                "status": 500,
+                "response": str(e),
+                "timestamp": time.time(),
+                "request": request_data,
+                "responseData": {"status_code": 500, "content": str(e)}
+            })
+            raise HTTPException(status_code=502, detail=f"Upstream request failed: {e}")
+        
+        response_headers = dict(response.headers)
+        # The body is re-framed and decoded by us, so drop headers describing the upstream wire format
+        passthrough_headers = {
+            name: value for name, value in response_headers.items()
+            if name.lower() not in HOP_BY_HOP_HEADERS
+        }
+        
+        async def body():
+            prefix = bytearray()
+            total = 0
+            completed = False
+            try:
+                async for chunk in response.aiter_bytes():
+                    total += len(chunk)
+                    if len(prefix) < MAX_RECORDED_BODY:
+                        prefix.extend(chunk[:MAX_RECORDED_BODY - len(prefix)])
+                    yield chunk
+                completed = True
+            finally:
+                # A client disconnect cancels the stream; shield the cleanup so the
+                # connection still goes back to the pool and the call is recorded
+                with anyio.CancelScope(shield=True):
+                    await response.aclose()
+                    await run_in_threadpool(self._record_if_session, session_id, {
+                        "method": request_data["method"],
+                        "url": request_data["url"],
+                        "status": response.status_code,
+                        "response": prefix.decode('utf-8', errors='replace'),
+                        "headers": response_headers,
+                        "timestamp": time.time(),
+                        "request": request_data,
+                        "responseData": {"status_code": response.status_code, "headers": response_headers},
+                        "streamed": True,
+                        "response_bytes": total,
+                        "truncated": total > len(prefix),
+                        "completed": completed,
+                        "timing": response_timing(response)
+                    })
+        
+        return StreamingResponse(body(), status_code=response.status_code, headers=passthrough_headers)
+
+api_proxy = ApiProxy(create_call_store(), call_event_broker, timing_stats)
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Rate-limit-aware scheduling of upstream API calls.
+
+Every outbound call goes through a per-(credential, host) token bucket whose
+tokens are the remaining quota reported by `X-RateLimit-*` headers. Calls are
+free while plenty of quota is left and get paced evenly over the rest of the
+window once it runs low. `Retry-After` and secondary rate limits (403/429) are
+retried with jittered exponential backoff. Buckets are kept as an LRU capped
+at max_buckets, so one-off credentials do not accumulate.
+"""
+import asyncio
+import hashlib
+import math
+import os
+import random
+import time
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# Methods that are safe to resend after a 5xx
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_SERVER_STATUSES = {502, 503, 504}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than the scheduler allows."""
+
+    def __init__(self, message: str, retry_at: float):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+def credential_key(headers: Optional[Dict[str, str]]) -> str:
+    """Identify the credential a request uses without keeping the secret itself."""
+    for name, value in (headers or {}).items():
+        if name.lower() == 'authorization' and value:
+            return "token:" + hashlib.sha256(value.encode('utf-8')).hexdigest()[:12]
+    return "anonymous"
+
+
+class TokenBucket:
+    """Quota for one credential on one host, refilled when the rate-limit window resets."""
+
+    def __init__(self, pacing_threshold: float):
+        self.pacing_threshold = pacing_threshold
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: float = 0.0
+        self.blocked_until: float = 0.0
+        self.next_slot: float = 0.0
+        self.resource: Optional[str] = None
+        self.throttled = 0
+
+    def reserve(self, now: float, max_wait: float = math.inf) -> float:
+        """
+        Take a token and return how many seconds to wait before using it. If the
+        wait would be longer than max_wait, nothing is taken, so rejected calls
+        do not push back the calls that follow.
+        """
+        if self.blocked_until > now:
+            return self.blocked_until - now
+
+        # Nothing known yet, or the window has rolled over since the last response
+        if self.limit is None:
+            return 0.0
+        if self.reset_at <= now or self.remaining is None:
+            self.remaining = self.limit
+
+        if self.remaining <= 0:
+            return self.reset_at - now
+
+        remaining = self.remaining - 1
+        if remaining >= self.limit * self.pacing_threshold:
+            self.remaining = remaining
+            return 0.0
+
+        # Low on quota: spread what is left evenly over the rest of the window
+        slot = max(now, self.next_slot)
+        if slot - now > max_wait:
+            return slot - now
+        self.remaining = remaining
+        self.next_slot = slot + (self.reset_at - now) / (remaining + 1)
+        return slot - now
+
+    def observe(self, status: int, headers: Dict[str, str], now: float) -> None:
+        """Update the bucket from an upstream response."""
+        limit = headers.get('X-RateLimit-Limit') or headers.get('x-ratelimit-limit')
+        remaining = headers.get('X-RateLimit-Remaining') or headers.get('x-ratelimit-remaining')
+        reset = headers.get('X-RateLimit-Reset') or headers.get('x-ratelimit-reset')
+        resource = headers.get('X-RateLimit-Resource') or headers.get('x-ratelimit-resource')
+
+        try:
+            if limit is not None:
+                self.limit = int(limit)
+            if remaining is not None:
+                self.remaining = int(remaining)
+            if reset is not None:
+                self.reset_at = float(reset)
+        except ValueError:
+            pass
+        if resource:
+            self.resource = resource
+
+        retry_after = parse_retry_after(headers, now)
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        elif status in (403, 429) and self.remaining == 0:
+            self.blocked_until = max(self.blocked_until, self.reset_at)
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_at": self.reset_at or None,
+            "reset_in": max(0.0, self.reset_at - now) if self.reset_at else None,
+            "blocked_for": max(0.0, self.blocked_until - now),
+            "resource": self.resource,
+            "throttled_calls": self.throttled
+        }
+
+
+def parse_retry_after(headers: Dict[str, str], now: float) -> Optional[float]:
+    """Return the Retry-After delay in seconds (delta-seconds or an HTTP-date), if present."""
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        # HTTP-dates are always GMT ("-0000" parses as naive)
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, retry_at.timestamp() - now)
+
+
+def is_rate_limited(status: int, headers: Dict[str, str]) -> bool:
+    """Whether a response is a primary or secondary rate-limit rejection."""
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    remaining = headers.get('X-RateLimit-Remaining') or headers.get('x-ratelimit-remaining')
+    return remaining == '0' or parse_retry_after(headers, 0) is not None
+
+
+class UpstreamScheduler:
+    """Shared scheduler that paces and retries upstream calls per credential and host."""
+
+    def __init__(self, max_retries: int = 3, max_wait: float = 60.0,
+                 backoff_base: float = 1.0, pacing_threshold: float = 0.1, max_buckets: int = 1000):
+        self.max_retries = max_retries
+        self.max_wait = max_wait
+        self.backoff_base = backoff_base
+        self.pacing_threshold = pacing_threshold
+        self.max_buckets = max_buckets
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.evicted_buckets = 0
+        self.retries = 0
+
+    def bucket_for(self, headers: Optional[Dict[str, str]], url: str) -> TokenBucket:
+        key = (credential_key(headers), urlparse(url).netloc)
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            self.buckets.move_to_end(key)
+            return bucket
+        # Calls in flight keep their own reference to an evicted bucket
+        while len(self.buckets) >= self.max_buckets:
+            self.buckets.popitem(last=False)
+            self.evicted_buckets += 1
+        bucket = TokenBucket(self.pacing_threshold)
+        self.buckets[key] = bucket
+        return bucket
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: uniform between 0 and the exponential ceiling
+        return random.uniform(0, min(self.max_wait, self.backoff_base * (2 ** attempt)))
+
+    async def execute(self, request_params: Dict[str, Any],
+                      send: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        """Send a request through the bucket for its credential and host, retrying rate limits."""
+        bucket = self.bucket_for(request_params.get("headers"), request_params["url"])
+        method = request_params.get("method", "GET").upper()
+
+        attempt = 0
+        while True:
+            now = time.time()
+            wait = bucket.reserve(now, self.max_wait)
+            if wait > self.max_wait:
+                raise RateLimitExceeded(
+                    f"Rate limit for {urlparse(request_params['url']).netloc} exhausted; "
+                    f"retry in {int(wait)}s",
+                    retry_at=now + wait
+                )
+            if wait > 0:
+                bucket.throttled += 1
+                await asyncio.sleep(wait)
+
+            response = await send(request_params)
+            headers = response.headers
+            bucket.observe(response.status_code, headers, time.time())
+
+            if attempt >= self.max_retries:
+                return response
+
+            if is_rate_limited(response.status_code, headers):
+                blocked_for = bucket.blocked_until - time.time()
+                if blocked_for > self.max_wait:
+                    return response
+                # Retry-After/reset waits happen in reserve(); otherwise back off with jitter
+                if blocked_for <= 0:
+                    await asyncio.sleep(self._backoff(attempt))
+            elif response.status_code in RETRYABLE_SERVER_STATUSES and method in IDEMPOTENT_METHODS:
+                await asyncio.sleep(self._backoff(attempt))
+            else:
+                return response
+
+            # Release the discarded attempt's connection (matters for streamed responses)
+            close = getattr(response, "aclose", None)
+            if close is not None:
+                await close()
+            attempt += 1
+            self.retries += 1
+
+    def budgets(self) -> Dict[str, Any]:
+        """Current quota per credential and host."""
+        now = time.time()
+        return {
+            "buckets": [
+                {"credential": credential, "host": host, **bucket.snapshot(now)}
+                for (credential, host), bucket in self.buckets.items()
+            ],
+            "max_buckets": self.max_buckets,
+            "evicted_buckets": self.evicted_buckets,
+            "retries": self.retries
+        }
+
+
+upstream_scheduler = UpstreamScheduler(
+    max_retries=int(os.getenv("UPSTREAM_MAX_RETRIES", "3")),
+    max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT", "60")),
+    pacing_threshold=float(os.getenv("RATE_LIMIT_PACING_THRESHOLD", "0.1")),
+    max_buckets=int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "1000"))
+)
@@ -0,0 +1,331 @@
+"""
+Conditional-request (ETag / Last-Modified) cache for upstream GETs.
+
+Responses carrying validators are stored per credential. Repeat requests are
+sent with If-None-Match / If-Modified-Since, and a `304 Not Modified` (which
+GitHub does not count against the rate limit) is answered from the cached body.
+Entries live in a memory tier and a disk tier, each an LRU bounded by bytes.
+The disk tier is read and written in the threadpool, off the event loop.
+Responses marked `Cache-Control: private` are only kept in memory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from .fingerprint import canonical_json
+from .private_dir import make_private_dir
+from .rate_limiter import credential_key
+
+# Request headers that mean the caller is doing its own revalidation
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+def cache_directives(cache_control: str) -> set:
+    """Directive names in a Cache-Control header, lower-cased (values dropped)."""
+    return {
+        directive.split('=', 1)[0].strip().lower()
+        for directive in cache_control.split(',') if directive.strip()
+    }
+
+
+class CachedResponse:
+    """A stored response plus the validators needed to revalidate it."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body: bytes):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get('last-modified')
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+    def to_bytes(self) -> bytes:
+        meta = json.dumps({"status_code": self.status_code, "headers": self.headers}).encode('utf-8')
+        return meta + b"\n" + self.body
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CachedResponse":
+        meta, _, body = raw.partition(b"\n")
+        parsed = json.loads(meta)
+        return cls(parsed["status_code"], parsed["headers"], body)
+
+
+class ConditionalResponseCache:
+    """Two-tier (memory, disk) LRU cache of validated upstream responses."""
+
+    def __init__(self, memory_bytes: int, disk_bytes: int, cache_dir: Optional[str], max_entry_bytes: int):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.cache_dir = cache_dir
+        self.memory: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.memory_used = 0
+        self.disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self.disk_used = 0
+        # Guards the disk index, which threadpool workers update concurrently
+        self.disk_lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "stores": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+        if self.cache_dir and self.disk_bytes > 0:
+            make_private_dir(self.cache_dir)
+            self._load_disk_index()
+
+    # --- keys -----------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(request_params: Dict[str, Any]) -> str:
+        """Key a request by credential, method, URL, query and Accept header."""
+        headers = {name.lower(): value for name, value in (request_params.get("headers") or {}).items()}
+        payload = {
+            "credential": credential_key(request_params.get("headers")),
+            "method": request_params.get("method", "GET").upper(),
+            "url": request_params["url"],
+            "params": request_params.get("params") or {},
+            "accept": headers.get("accept", "")
+        }
+        return hashlib.sha256(canonical_json(payload).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def is_cacheable_request(request_params: Dict[str, Any]) -> bool:
+        if request_params.get("method", "GET").upper() != "GET":
+            return False
+        if request_params.get("json") is not None or request_params.get("data") is not None:
+            return False
+        headers = request_params.get("headers") or {}
+        return not any(name.lower() in CONDITIONAL_HEADERS for name in headers)
+
+    # --- tiers ----------------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.cache")
+
+    def _load_disk_index(self) -> None:
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".cache"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-len(".cache")], stat.st_size))
+        # Oldest access first, so popitem(last=False) evicts the least recently used
+        for _, key, size in sorted(files):
+            self.disk_index[key] = size
+            self.disk_used += size
+
+    def _memory_put(self, key: str, entry: CachedResponse) -> None:
+        previous = self.memory.pop(key, None)
+        if previous is not None:
+            self.memory_used -= previous.size
+        self.memory[key] = entry
+        self.memory_used += entry.size
+        while self.memory_used > self.memory_bytes and self.memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_used -= evicted.size
+            self.counters["memory_evictions"] += 1
+
+    def _disk_put(self, key: str, entry: CachedResponse) -> None:
+        if not self.cache_dir or self.disk_bytes <= 0:
+            return
+        raw = entry.to_bytes()
+        # Write then rename so a concurrent read never sees a partial entry
+        temp_path = f"{self._disk_path(key)}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(raw)
+        os.replace(temp_path, self._disk_path(key))
+        evicted = []
+        with self.disk_lock:
+            self.disk_used -= self.disk_index.pop(key, 0)
+            self.disk_index[key] = len(raw)
+            self.disk_used += len(raw)
+            while self.disk_used > self.disk_bytes and self.disk_index:
+                evicted_key, evicted_size = self.disk_index.popitem(last=False)
+                self.disk_used -= evicted_size
+                self.counters["disk_evictions"] += 1
+                evicted.append(evicted_key)
+        for evicted_key in evicted:
+            try:
+                os.unlink(self._disk_path(evicted_key))
+            except FileNotFoundError:
+                pass
+
+    def _disk_drop(self, key: str) -> None:
+        with self.disk_lock:
+            if key not in self.disk_index:
+                return
+            self.disk_used -= self.disk_index.pop(key)
+        try:
+            os.unlink(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _disk_get(self, key: str) -> Optional[CachedResponse]:
+        if key not in self.disk_index:
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                entry = CachedResponse.from_bytes(f.read())
+            os.utime(self._disk_path(key))
+        except (OSError, ValueError):
+            with self.disk_lock:
+                self.disk_used -= self.disk_index.pop(key, 0)
+            return None
+        with self.disk_lock:
+            if key in self.disk_index:
+                self.disk_index.move_to_end(key)
+        return entry
+
+    def _memory_get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+        return entry
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Look an entry up in memory, then on disk (promoting it to memory)."""
+        entry = self._memory_get(key)
+        if entry is None:
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._memory_put(key, entry)
+        return entry
+
+    async def get_async(self, key: str) -> Optional[CachedResponse]:
+        """`get()`, reading the disk tier in the threadpool."""
+        entry = self._memory_get(key)
+        if entry is None and key in self.disk_index:
+            entry = await run_in_threadpool(self._disk_get, key)
+            if entry is not None:
+                self._memory_put(key, entry)
+        return entry
+
+    def _entry_for(self, response: httpx.Response) -> Optional[Tuple[CachedResponse, bool]]:
+        """The entry to store for a response and whether it is private, or None if it is not cacheable."""
+        headers = {name.lower(): value for name, value in response.headers.items()}
+        if 'etag' not in headers and 'last-modified' not in headers:
+            return None
+        directives = cache_directives(headers.get('cache-control', ''))
+        if 'no-store' in directives:
+            return None
+
+        # Bodies are stored decoded, so drop headers that describe the wire encoding
+        headers.pop('content-encoding', None)
+        headers.pop('content-length', None)
+        headers.pop('transfer-encoding', None)
+
+        entry = CachedResponse(response.status_code, headers, response.content)
+        if entry.size > self.max_entry_bytes:
+            return None
+        return entry, 'private' in directives
+
+    def _disk_store(self, key: str, entry: CachedResponse, private: bool) -> None:
+        # Private responses (e.g. GitHub's for authenticated requests) never touch the disk
+        if private:
+            self._disk_drop(key)
+        else:
+            self._disk_put(key, entry)
+
+    def put(self, key: str, response: httpx.Response) -> None:
+        """Store a response if it carries validators and is allowed to be cached."""
+        prepared = self._entry_for(response)
+        if prepared is None:
+            return
+        self._memory_put(key, prepared[0])
+        self._disk_store(key, *prepared)
+        self.counters["stores"] += 1
+
+    async def put_async(self, key: str, response: httpx.Response) -> None:
+        """`put()`, writing the disk tier in the threadpool."""
+        prepared = self._entry_for(response)
+        if prepared is None:
+            return
+        self._memory_put(key, prepared[0])
+        await run_in_threadpool(self._disk_store, key, *prepared)
+        self.counters["stores"] += 1
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.memory_used = 0
+        with self.disk_lock:
+            keys = list(self.disk_index)
+            self.disk_index.clear()
+            self.disk_used = 0
+        for key in keys:
+            try:
+                os.unlink(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    # --- request flow ---------------------------------------------------------
+
+    async def fetch(self, request_params: Dict[str, Any],
+                    send: Callable[[Dict[str, Any]], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Send a GET, revalidating a cached copy when there is one."""
+        key = self.cache_key(request_params)
+        entry = await self.get_async(key)
+
+        if entry is None:
+            self.counters["misses"] += 1
+            response = await send(request_params)
+            if response.status_code == 200:
+                await self.put_async(key, response)
+            return response
+
+        conditional_headers = dict(request_params.get("headers") or {})
+        if entry.etag:
+            conditional_headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            conditional_headers["If-Modified-Since"] = entry.last_modified
+        response = await send({**request_params, "headers": conditional_headers})
+
+        if response.status_code == 304:
+            self.counters["hits"] += 1
+            # Fresh rate-limit headers from the 304 override the stored ones
+            headers = {**entry.headers, **{k.lower(): v for k, v in response.headers.items()
+                                           if k.lower().startswith('x-ratelimit')}}
+            headers['x-sandbox-cache'] = 'revalidated'
+            return httpx.Response(
+                entry.status_code,
+                headers=headers,
+                content=entry.body,
+                request=response.request,
+                extensions=response.extensions
+            )
+
+        self.counters["misses"] += 1
+        if response.status_code == 200:
+            await self.put_async(key, response)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_used,
+            "memory_limit": self.memory_bytes,
+            "disk_entries": len(self.disk_index),
+            "disk_bytes": self.disk_used,
+            "disk_limit": self.disk_bytes
+        }
+
+
+response_cache = ConditionalResponseCache(
+    memory_bytes=int(os.getenv("HTTP_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024))),
+    disk_bytes=int(os.getenv("HTTP_CACHE_DISK_BYTES", str(256 * 1024 * 1024))),
+    cache_dir=os.getenv("HTTP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "api-sandbox-http-cache")),
+    max_entry_bytes=int(os.getenv("HTTP_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 * 1024)))
+)
@@ -0,0 +1,270 @@
+"""
+Disk spill for oversized node responses.
+
+Responses above the inline cap are not returned (or recorded) whole. They are
+written to disk and the caller gets a preview plus a handle, and reads the
+rest a slice at a time. Arrays are stored as NDJSON, one item per line, with
+a fixed-width offset index beside them, so reading items 100-200 touches only
+those lines. Other bodies are stored as their JSON text and sliced by byte range.
+Response bodies can hold private data, so the directory is owner-only (0o700).
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from array import array
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from .private_dir import make_private_dir
+
+# Handles are uuid4 hex strings; anything else never reaches the filesystem
+HANDLE_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# Size in bytes of one offset index entry (array typecode "Q")
+OFFSET_SIZE = array("Q").itemsize
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, default=str, separators=(',', ':')).encode('utf-8')
+
+
+class ArraySpill:
+    """
+    An array body built up item by item (e.g. page by page). Items stay in
+    memory while they fit under the inline cap; past it they are written
+    straight to disk and only the preview is kept.
+    """
+
+    def __init__(self, store: "SpillStore"):
+        self.store = store
+        self.handle: Optional[str] = None
+        self.preview: List[Any] = []
+        self.preview_bytes = 0
+        self.preview_full = False
+        self.item_count = 0
+        self.size = 0
+        self.data_file: Optional[BinaryIO] = None
+        self.index_file: Optional[BinaryIO] = None
+
+    def open(self) -> None:
+        """Move to disk, writing out the items held so far."""
+        make_private_dir(self.store.directory)
+        self.store._prune()
+        self.handle = uuid.uuid4().hex
+        self.data_file = open(self.store._path(self.handle, "ndjson"), "wb")
+        self.index_file = open(self.store._path(self.handle, "idx"), "wb")
+        self.size = 0
+        array("Q", [0]).tofile(self.index_file)
+        for item in self.preview:
+            self._write(_encode(item) + b"\n")
+
+    def _write(self, line: bytes) -> None:
+        self.data_file.write(line)
+        self.size += len(line)
+        array("Q", [self.size]).tofile(self.index_file)
+
+    def append(self, item: Any) -> None:
+        line = _encode(item) + b"\n"
+        self.item_count += 1
+        if self.handle is None and self.size + len(line) > self.store.inline_max_bytes:
+            self.open()
+        if self.handle is not None:
+            self._write(line)
+        else:
+            self.size += len(line)
+        # The preview is as many leading items as fit under the inline cap
+        if not self.preview_full and self.preview_bytes + len(line) <= self.store.inline_max_bytes:
+            self.preview.append(item)
+            self.preview_bytes += len(line)
+        else:
+            self.preview_full = True
+
+    def extend(self, items: List[Any]) -> None:
+        for item in items:
+            self.append(item)
+
+    def _close_files(self) -> None:
+        for f in (self.data_file, self.index_file):
+            if f is not None:
+                f.close()
+
+    def finish(self) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+        """`(items, None)` if everything fit inline, otherwise `(preview, handle)`."""
+        if self.handle is None:
+            return self.preview, None
+        self._close_files()
+        meta = {"kind": "array", "item_count": self.item_count, "preview_count": len(self.preview), "size": self.size}
+        return self.preview, self.store._save_meta(self.handle, meta)
+
+    def discard(self) -> None:
+        """Drop a body that will not be finished (e.g. the upstream call failed)."""
+        self._close_files()
+        if self.handle is not None:
+            self.store._delete(self.handle)
+
+
+class SpillStore:
+    """Directory of spilled responses, pruned by age and total size."""
+
+    def __init__(self, directory: str, inline_max_bytes: int, max_age: float, max_bytes: int):
+        self.directory = directory
+        self.inline_max_bytes = inline_max_bytes
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.counters = {"spilled": 0, "spilled_bytes": 0, "slices": 0, "expired": 0}
+
+    def _path(self, handle: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{handle}.{suffix}")
+
+    def cap(self, value: Any, size: Optional[int] = None) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """
+        Return `(value, None)` if the body fits inline, otherwise spill it and
+        return `(preview, handle)`. `size` is the encoded size when already known
+        (e.g. the length of the upstream body), which saves re-encoding small bodies.
+        """
+        if size is None:
+            size = len(value.encode('utf-8')) if isinstance(value, str) else len(_encode(value))
+        if size <= self.inline_max_bytes:
+            return value, None
+        return self.spill(value)
+
+    def spill(self, value: Any) -> Tuple[Any, Dict[str, Any]]:
+        """Write a body to disk; returns the inline preview and the handle describing it."""
+        if isinstance(value, list):
+            body = ArraySpill(self)
+            body.open()
+            body.extend(value)
+            return body.finish()
+
+        make_private_dir(self.directory)
+        self._prune()
+        handle = uuid.uuid4().hex
+        raw = value.encode('utf-8') if isinstance(value, str) else _encode(value)
+        with open(self._path(handle, "data"), "wb") as f:
+            f.write(raw)
+        # Cut on a character boundary so the preview is valid text
+        preview = raw[:self.inline_max_bytes].decode('utf-8', errors='ignore')
+        return preview, self._save_meta(handle, {
+            "kind": "text" if isinstance(value, str) else "json",
+            "size": len(raw),
+            "preview_bytes": len(preview.encode('utf-8'))
+        })
+
+    def array(self) -> ArraySpill:
+        """Start an array body that is spilled once it outgrows the inline cap."""
+        return ArraySpill(self)
+
+    def _save_meta(self, handle: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta = {"handle": handle, "created_at": time.time(), **meta}
+        with open(self._path(handle, "meta"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        with self.lock:
+            self.counters["spilled"] += 1
+            self.counters["spilled_bytes"] += meta["size"]
+        return meta
+
+    def describe(self, handle: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a spilled response, or None if the handle is unknown or expired."""
+        if not HANDLE_PATTERN.match(handle):
+            return None
+        try:
+            with open(self._path(handle, "meta"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_items(self, handle: str, start: int, end: int) -> Optional[List[Any]]:
+        """Items [start, end) of a spilled array, read via the offset index."""
+        meta = self.describe(handle)
+        if meta is None or meta["kind"] != "array":
+            return None
+        start = max(0, min(start, meta["item_count"]))
+        end = max(start, min(end, meta["item_count"]))
+        if start == end:
+            return []
+
+        offsets = array("Q")
+        try:
+            with open(self._path(handle, "idx"), "rb") as f:
+                f.seek(start * OFFSET_SIZE)
+                offsets.fromfile(f, end - start + 1)
+            with open(self._path(handle, "ndjson"), "rb") as f:
+                f.seek(offsets[0])
+                chunk = f.read(offsets[-1] - offsets[0])
+        except (OSError, EOFError):  # Pruned while being read
+            return None
+        with self.lock:
+            self.counters["slices"] += 1
+        return [json.loads(line) for line in chunk.splitlines()]
+
+    def read_bytes(self, handle: str, start: int, end: int) -> Optional[str]:
+        """Bytes [start, end) of a spilled text/JSON body, decoded leniently at the edges."""
+        meta = self.describe(handle)
+        if meta is None or meta["kind"] == "array":
+            return None
+        start = max(0, start)
+        try:
+            with open(self._path(handle, "data"), "rb") as f:
+                f.seek(start)
+                chunk = f.read(max(0, end - start))
+        except OSError:
+            return None
+        with self.lock:
+            self.counters["slices"] += 1
+        return chunk.decode('utf-8', errors='replace')
+
+    def _prune(self) -> None:
+        """Drop spills older than max_age, then the oldest ones while over max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            handle, _, suffix = name.partition(".")
+            if suffix != "meta":
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+                size = sum(
+                    os.path.getsize(self._path(handle, s))
+                    for s in ("ndjson", "idx", "data") if os.path.exists(self._path(handle, s))
+                )
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, handle, size))
+
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        cutoff = time.time() - self.max_age
+        for mtime, handle, size in entries:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            self._delete(handle)
+            total -= size
+            with self.lock:
+                self.counters["expired"] += 1
+
+    def _delete(self, handle: str) -> None:
+        # Metadata goes first so a half-deleted spill is never served
+        for suffix in ("meta", "ndjson", "idx", "data"):
+            try:
+                os.unlink(self._path(handle, suffix))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                **self.counters,
+                "directory": self.directory,
+                "inline_max_bytes": self.inline_max_bytes
+            }
+
+
+spill_store = SpillStore(
+    directory=os.getenv("RESPONSE_SPILL_DIR", os.path.join(tempfile.gettempdir(), "api-sandbox-spill")),
+    inline_max_bytes=int(os.getenv("RESPONSE_INLINE_MAX_BYTES", str(256 * 1024))),
+    max_age=float(os.getenv("RESPONSE_SPILL_TTL", "3600")),
+    max_bytes=int(os.getenv("RESPONSE_SPILL_MAX_BYTES", str(1024 * 1024 * 1024)))
+)
@@ -0,0 +1,196 @@
+"""
+Network timing capture for outbound calls and per-endpoint aggregation.
+
+Phases come from httpx/httpcore trace events: connect (TCP, including DNS
+resolution, which httpcore does not report separately), TLS handshake,
+request send, server wait, time to first byte and body transfer, plus the
+time spent queued before any network activity. A reused keep-alive
+connection shows no connect/TLS phases.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+# Key under which the timer travels with an httpx.Response
+TIMER_EXTENSION = "sandbox_timer"
+
+# (phase, started event, completed event); HTTP/1.1 and HTTP/2 events share suffixes
+PHASES = (
+    ("connect", "connection.connect_tcp.started", "connection.connect_tcp.complete"),
+    ("tls", "connection.start_tls.started", "connection.start_tls.complete"),
+    ("send", "send_request_headers.started", "send_request_body.complete"),
+    ("wait", "send_request_body.complete", "receive_response_headers.complete"),
+    ("transfer", "receive_response_body.started", "receive_response_body.complete"),
+)
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 3) if seconds is not None else None
+
+
+class RequestTimer:
+    """Collects trace events for one request; pass `trace` as the httpx trace extension."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: Dict[str, float] = {}
+
+    async def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        # "http11.receive_response_body.started" -> "receive_response_body.started"
+        if event_name.startswith(("http11.", "http2.")):
+            event_name = event_name.split(".", 1)[1]
+        # Keep the first occurrence (HTTP/2 may emit events per stream and connection)
+        self.events.setdefault(event_name, time.perf_counter())
+
+    def _between(self, start: str, end: str) -> Optional[float]:
+        if start in self.events and end in self.events:
+            return self.events[end] - self.events[start]
+        return None
+
+    def breakdown(self, response: Optional[httpx.Response] = None) -> Dict[str, Any]:
+        """Phase durations in milliseconds plus request/response byte counts."""
+        timing = {f"{phase}_ms": _ms(self._between(start, end)) for phase, start, end in PHASES}
+        # Time spent before the first network event, e.g. waiting for a pooled connection
+        timing["queue_ms"] = _ms(min(self.events.values()) - self.started) if self.events else None
+        headers_done = self.events.get("receive_response_headers.complete")
+        body_done = self.events.get("receive_response_body.complete")
+        timing["ttfb_ms"] = _ms(headers_done - self.started) if headers_done else None
+        timing["total_ms"] = _ms((body_done or time.perf_counter()) - self.started)
+        timing["reused_connection"] = "connection.connect_tcp.started" not in self.events
+
+        if response is not None:
+            request = response.request
+            timing["request_bytes"] = header_bytes(request.headers) + len(request.content or b"")
+            timing["response_bytes"] = header_bytes(response.headers) + response.num_bytes_downloaded
+        return timing
+
+
+def header_bytes(headers: httpx.Headers) -> int:
+    return sum(len(name) + len(value) + 4 for name, value in headers.raw)
+
+
+def response_timing(response: httpx.Response) -> Optional[Dict[str, Any]]:
+    """Timing breakdown of a response sent through the upstream client, if it was traced."""
+    timer = response.extensions.get(TIMER_EXTENSION)
+    return timer.breakdown(response) if timer is not None else None
+
+
+# Path segments that identify a resource rather than an endpoint
+ID_SEGMENT = re.compile(r"^\d+$")
+SHA_SEGMENT = re.compile(r"^[0-9a-f]{7,40}$")
+
+
+def endpoint_template(url: str, template: Optional[str] = None) -> str:
+    """
+    Group key for a call: the node's URL template when known (e.g. "/repos/{owner}/{repo}"),
+    otherwise the concrete path with numeric ids and commit SHAs replaced.
+    """
+    if template:
+        path = urlparse(template).path if "://" in template else template
+        return path.split("?", 1)[0]
+    segments = []
+    for segment in urlparse(url).path.split("/"):
+        if ID_SEGMENT.match(segment):
+            segment = "{id}"
+        elif SHA_SEGMENT.match(segment):
+            segment = "{sha}"
+        segments.append(segment)
+    return "/".join(segments)
+
+
+class TimingStats:
+    """
+    Rolling per-endpoint timing samples. Calls without a node template are keyed
+    by their concrete path (owner, repo and user names included), so endpoints
+    are kept as an LRU capped at max_endpoints.
+    """
+
+    METRICS = ("total_ms", "ttfb_ms", "connect_ms", "tls_ms", "transfer_ms")
+
+    def __init__(self, max_samples: int = 500, max_endpoints: int = 1000):
+        self.max_samples = max_samples
+        self.max_endpoints = max_endpoints
+        self.endpoints: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self.evicted_endpoints = 0
+        self.lock = threading.Lock()
+
+    def observe(self, method: str, template: str, timing: Dict[str, Any], status: int = 0) -> None:
+        key = (method.upper(), template)
+        with self.lock:
+            entry = self.endpoints.get(key)
+            if entry is not None:
+                self.endpoints.move_to_end(key)
+            else:
+                while len(self.endpoints) >= self.max_endpoints:
+                    self.endpoints.popitem(last=False)
+                    self.evicted_endpoints += 1
+                entry = {
+                    "calls": 0,
+                    "errors": 0,
+                    "reused_connections": 0,
+                    "request_bytes": 0,
+                    "response_bytes": 0,
+                    "samples": {metric: deque(maxlen=self.max_samples) for metric in self.METRICS}
+                }
+                self.endpoints[key] = entry
+            entry["calls"] += 1
+            if not status or status >= 400:
+                entry["errors"] += 1
+            if timing.get("reused_connection"):
+                entry["reused_connections"] += 1
+            entry["request_bytes"] += timing.get("request_bytes") or 0
+            entry["response_bytes"] += timing.get("response_bytes") or 0
+            for metric in self.METRICS:
+                if timing.get(metric) is not None:
+                    entry["samples"][metric].append(timing[metric])
+
+    @staticmethod
+    def _summary(samples: Deque[float]) -> Optional[Dict[str, float]]:
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max": ordered[-1],
+            "mean": round(sum(ordered) / len(ordered), 3)
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            endpoints = [
+                {
+                    "method": method,
+                    "template": template,
+                    "calls": entry["calls"],
+                    "errors": entry["errors"],
+                    "reused_connections": entry["reused_connections"],
+                    "request_bytes": entry["request_bytes"],
+                    "response_bytes": entry["response_bytes"],
+                    **{metric: self._summary(entry["samples"][metric]) for metric in self.METRICS}
+                }
+                for (method, template), entry in self.endpoints.items()
+            ]
+            evicted_endpoints = self.evicted_endpoints
+        endpoints.sort(key=lambda e: -(e["total_ms"] or {}).get("p95", 0))
+        return {
+            "endpoints": endpoints,
+            "max_endpoints": self.max_endpoints,
+            "evicted_endpoints": evicted_endpoints
+        }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.endpoints.clear()
+
+
+timing_stats = TimingStats(
+    max_samples=int(os.getenv("TIMING_MAX_SAMPLES", "500")),
+    max_endpoints=int(os.getenv("TIMING_MAX_ENDPOINTS", "1000"))
+)
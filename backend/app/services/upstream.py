@@ -0,0 +1,205 @@
+"""
+Helpers for building and sending outbound API requests on behalf of workflow nodes.
+"""
+import asyncio
+import importlib.util
+import json
+import os
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from .cassettes import (
+    UPSTREAM_MODE, RecordingTransport, ReplayTransport, cassette_store, parse_replay_latency
+)
+from .coalescing import COALESCABLE_METHODS, single_flight
+from .rate_limiter import upstream_scheduler
+from .response_cache import response_cache
+from .timing import TIMER_EXTENSION, RequestTimer
+
+# GitHub API base URL used for relative node URLs
+GITHUB_API_BASE = "https://api.github.com"
+
+
+def resolve_url(url: str, path_params: Dict[str, str]) -> str:
+    """Prefix relative URLs with the GitHub API base and substitute path parameters."""
+    if url.startswith('/'):
+        url = f"{GITHUB_API_BASE}{url}"
+
+    for param_name, param_value in path_params.items():
+        url = url.replace(f"{{{param_name}}}", str(param_value))
+
+    return url
+
+
+def build_request_params(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    query_params: Dict[str, str],
+    path_params: Dict[str, str],
+    body: Optional[str] = None,
+    timeout: int = 30,
+) -> Dict[str, Any]:
+    """Build keyword arguments for an outbound request from a node configuration."""
+    method = method.upper()
+    request_params = {
+        "method": method,
+        "url": resolve_url(url, path_params),
+        "headers": headers,
+        "params": query_params,
+        "timeout": timeout
+    }
+
+    # Add body for POST, PUT, PATCH requests
+    if method in ["POST", "PUT", "PATCH"] and body:
+        try:
+            # Try to parse as JSON
+            request_params["json"] = json.loads(body)
+        except json.JSONDecodeError:
+            # If not JSON, send as text
+            request_params["data"] = body
+
+    return request_params
+
+
+class UpstreamHttpClient:
+    """
+    Shared async HTTP client with a keep-alive connection pool.
+
+    Connections are reused across calls, concurrency per upstream host is
+    capped, and HTTP/2 is negotiated when enabled and the h2 package is installed.
+    In record/replay mode the network transport is wrapped by, or replaced with,
+    a cassette transport.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 max_per_host: int = 20, timeout: float = 30.0, connect_timeout: float = 10.0,
+                 http2: bool = False, mode: str = "live", replay_latency: Optional[float] = 0.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.max_per_host = max_per_host
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.mode = mode
+        self.replay_latency = replay_latency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _transport(self) -> Optional[httpx.AsyncBaseTransport]:
+        if self.mode == "replay":
+            return ReplayTransport(cassette_store, self.replay_latency)
+        if self.mode == "record":
+            return RecordingTransport(
+                cassette_store,
+                httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            )
+        return None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=self.timeout,
+                http2=self.http2,
+                follow_redirects=True,
+                transport=self._transport()
+            )
+        return self._client
+
+    def _host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_host)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, request_params: Dict[str, Any]) -> httpx.Response:
+        """Send a request described by build_request_params() over the pool."""
+        timeout = request_params.get("timeout")
+        timer = RequestTimer()
+        async with self._host_semaphore(request_params["url"]):
+            response = await self.client.request(
+                request_params.get("method", "GET"),
+                request_params["url"],
+                headers=request_params.get("headers"),
+                params=request_params.get("params") or None,
+                json=request_params.get("json"),
+                content=request_params.get("data"),
+                timeout=timeout if timeout is not None else self.timeout,
+                extensions={"trace": timer.trace}
+            )
+        response.extensions[TIMER_EXTENSION] = timer
+        return response
+
+    async def open_stream(self, request_params: Dict[str, Any]) -> httpx.Response:
+        """Send a request and return once headers arrive; the caller must aclose() the response."""
+        timeout = request_params.get("timeout")
+        timer = RequestTimer()
+        request = self.client.build_request(
+            request_params.get("method", "GET"),
+            request_params["url"],
+            headers=request_params.get("headers"),
+            params=request_params.get("params") or None,
+            json=request_params.get("json"),
+            content=request_params.get("data"),
+            timeout=timeout if timeout is not None else self.timeout,
+            extensions={"trace": timer.trace}
+        )
+        async with self._host_semaphore(request_params["url"]):
+            response = await self.client.send(request, stream=True)
+        response.extensions[TIMER_EXTENSION] = timer
+        return response
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+upstream_client = UpstreamHttpClient(
+    max_connections=int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20")),
+    max_per_host=int(os.getenv("UPSTREAM_MAX_PER_HOST", "20")),
+    timeout=float(os.getenv("UPSTREAM_TIMEOUT", "30")),
+    connect_timeout=float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "10")),
+    http2=os.getenv("UPSTREAM_HTTP2", "false").lower() == "true",
+    mode=UPSTREAM_MODE,
+    replay_latency=parse_replay_latency(os.getenv("UPSTREAM_REPLAY_LATENCY", "0"))
+)
+
+
+async def _send_scheduled(request_params: Dict[str, Any]) -> httpx.Response:
+    return await upstream_scheduler.execute(request_params, upstream_client.request)
+
+
+async def _send_cached(request_params: Dict[str, Any]) -> httpx.Response:
+    if response_cache.is_cacheable_request(request_params):
+        return await response_cache.fetch(request_params, _send_scheduled)
+    return await _send_scheduled(request_params)
+
+
+async def send_request(request_params: Dict[str, Any]) -> httpx.Response:
+    """
+    Send a request through the shared rate-limit-aware scheduler and connection pool.
+    Identical concurrent GETs share one upstream call, and GETs are revalidated
+    against the conditional-request cache.
+    """
+    method = request_params.get("method", "GET").upper()
+    if method in COALESCABLE_METHODS and request_params.get("json") is None and request_params.get("data") is None:
+        key = f"{method}:{response_cache.cache_key(request_params)}"
+        return await single_flight.do(key, lambda: _send_cached(request_params))
+    return await _send_cached(request_params)
+
+
+async def open_stream(request_params: Dict[str, Any]) -> httpx.Response:
+    """
+    Like send_request(), but the body is left unread so it can be streamed.
+    Streams bypass the response cache and coalescing; close them with aclose().
+    """
+    return await upstream_scheduler.execute(request_params, upstream_client.open_stream)
@@ -0,0 +1,342 @@
+"""
+Incremental workflow execution with per-node output caching.
+
+Each node's output is cached under a fingerprint of its configuration plus the
+fingerprints of its inputs, so re-running a workflow only executes the nodes
+whose configuration (or any upstream configuration) changed.
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .data_processor import DataProcessorCodeGenerator
+from .executor import executor
+from .fingerprint import canonical_json, node_fingerprint
+from .map_executor import MapExecutor, extract_item_value
+from .pagination import is_paginated, iter_pages
+from .timing import response_timing
+from .upstream import build_request_params, send_request
+
+# Only idempotent API calls are served from the cache
+CACHEABLE_API_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class NodeOutputCache:
+    """LRU cache of node outputs bounded by the approximate serialized size."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, fingerprint: str) -> Tuple[bool, Any]:
+        """Return (found, output) and mark the entry as recently used."""
+        entry = self.entries.get(fingerprint)
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(fingerprint)
+        self.hits += 1
+        return True, entry[0]
+
+    def put(self, fingerprint: str, output: Any) -> None:
+        """Store a node output, evicting least recently used entries to fit."""
+        size = len(canonical_json(output))
+        if size > self.max_bytes:
+            return
+
+        self.invalidate([fingerprint])
+        self.entries[fingerprint] = (output, size)
+        self.current_bytes += size
+
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def invalidate(self, fingerprints: Optional[List[str]] = None) -> int:
+        """Drop the given fingerprints (or everything) and return how many were removed."""
+        if fingerprints is None:
+            removed = len(self.entries)
+            self.entries.clear()
+            self.current_bytes = 0
+            return removed
+
+        removed = 0
+        for fingerprint in fingerprints:
+            entry = self.entries.pop(fingerprint, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+                removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache usage counters."""
+        return {
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+def topological_order(nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order nodes so every node comes after its inputs, keeping the given order for ties."""
+    node_ids = [node['id'] for node in nodes]
+    nodes_by_id = {node['id']: node for node in nodes}
+    in_degree = {node_id: 0 for node_id in node_ids}
+    downstream: Dict[str, List[str]] = {node_id: [] for node_id in node_ids}
+
+    for conn in connections:
+        source, target = conn.get('sourceNodeId'), conn.get('targetNodeId')
+        if source in nodes_by_id and target in nodes_by_id:
+            downstream[source].append(target)
+            in_degree[target] += 1
+
+    ready = [node_id for node_id in node_ids if in_degree[node_id] == 0]
+    ordered = []
+    while ready:
+        node_id = ready.pop(0)
+        ordered.append(nodes_by_id[node_id])
+        for target in downstream[node_id]:
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                ready.append(target)
+
+    if len(ordered) != len(nodes):
+        raise ValueError("Workflow contains a cycle")
+    return ordered
+
+
+def select_output_fields(data: Any, selected_fields: List[str]) -> Any:
+    """Apply outputFieldSelections the same way the generated code does."""
+    if not selected_fields:
+        return data
+    if len(selected_fields) == 1:
+        return extract_item_value(data, selected_fields[0])
+
+    result = {}
+    for field_path in selected_fields:
+        safe_field_name = field_path.replace('.', '_').replace('-', '_').replace(' ', '_').replace('[', '_').replace(']', '_')
+        result[safe_field_name] = extract_item_value(data, field_path)
+    return result
+
+
+def substitute_inputs(params: Dict[str, str], input_data: Dict[str, Any]) -> Dict[str, str]:
+    """Replace "{key}" parameter values with scalar fields of upstream outputs."""
+    substituted = dict(params)
+    for value in input_data.values():
+        if not isinstance(value, dict):
+            continue
+        for sub_key, sub_value in value.items():
+            if isinstance(sub_value, (str, int, float)):
+                for param_key in list(substituted.keys()):
+                    if substituted[param_key] == f"{{{sub_key}}}":
+                        substituted[param_key] = str(sub_value)
+    return substituted
+
+
+class WorkflowExecutor:
+    """Execute workflow nodes in dependency order, reusing cached outputs."""
+
+    def __init__(self, cache: NodeOutputCache):
+        self.cache = cache
+
+    async def _run_api_node(self, node_config: Dict[str, Any], input_data: Dict[str, Any],
+                            on_call: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        path_params = node_config.get('resolvedPathParams') or node_config.get('path_params', {})
+        request_params = build_request_params(
+            node_config.get('type', 'GET'),
+            node_config.get('url', ''),
+            node_config.get('headers', {}),
+            substitute_inputs(node_config.get('query_params', {}), input_data),
+            substitute_inputs(path_params, input_data),
+            node_config.get('body')
+        )
+        output_fields = node_config.get('outputFieldSelections', [])
+        if is_paginated(node_config):
+            return await self._run_paginated_api_node(node_config, request_params, output_fields, on_call)
+
+        response = await send_request(request_params)
+        response.raise_for_status()
+        try:
+            response_data = response.json()
+        except json.JSONDecodeError:
+            response_data = response.text
+
+        await on_call({
+            "method": request_params["method"],
+            "url": request_params["url"],
+            "status": response.status_code,
+            "response": response_data,
+            "headers": dict(response.headers),
+            "timestamp": time.time(),
+            "query_params": request_params["params"],
+            "timing": response_timing(response),
+            "endpoint_template": node_config.get('url')
+        })
+        return select_output_fields(response_data, output_fields)
+
+    async def _run_paginated_api_node(self, node_config: Dict[str, Any], request_params: Dict[str, Any],
+                                      output_fields: List[str],
+                                      on_call: Callable[[Dict[str, Any]], Awaitable[Any]]) -> List[Any]:
+        """Follow Link: rel="next" like the generated code, selecting fields from each item."""
+        pagination = node_config.get('pagination', {})
+        request_params["params"] = {**request_params["params"], "per_page": str(int(pagination.get('perPage', 100)))}
+
+        items = []
+        first_page = True
+        async for response, page_items in iter_pages(request_params, send_request, pagination.get('maxItems'),
+                                                     bool(pagination.get('prefetch', False))):
+            await on_call({
+                "method": "GET",
+                "url": str(response.url),
+                "status": response.status_code,
+                "response": page_items,
+                "headers": dict(response.headers),
+                "timestamp": time.time(),
+                "query_params": request_params["params"] if first_page else {},
+                "timing": response_timing(response),
+                "endpoint_template": node_config.get('url')
+            })
+            first_page = False
+            items.extend(select_output_fields(item, output_fields) for item in page_items)
+        return items
+
+    async def _run_data_processing_node(self, node_config: Dict[str, Any], data: Any) -> Any:
+        data_processing = node_config.get('dataProcessing', {})
+        python_code = DataProcessorCodeGenerator.generate_code(
+            data_processing.get('operation', 'custom_code'),
+            data_processing.get('config', {})
+        )
+        full_code = f"""
+import json
+
+# Input data
+data = {repr(data)}
+
+{python_code}
+"""
+        result = await executor.execute_code(full_code, "python")
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("output") or "Unknown execution error")
+
+        output = result.get("output", "")
+        try:
+            processed = json.loads(output)
+        except json.JSONDecodeError:
+            processed = output.strip()
+        return select_output_fields(processed, node_config.get('outputFieldSelections', []))
+
+    async def _run_map_node(self, node_config: Dict[str, Any], data: Any,
+                            on_call: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        map_config = node_config.get('mapConfig', {})
+        items_path = map_config.get('itemsPath')
+        items = extract_item_value(data, items_path) if items_path else data
+        if not isinstance(items, list):
+            raise ValueError("MAP node input must be an array")
+
+        map_executor = MapExecutor(
+            concurrency=int(map_config.get('concurrency', 4)),
+            retries=int(map_config.get('retries', 2)),
+            ordered=map_config.get('ordered', True)
+        )
+        outcome = await map_executor.run(items, map_config.get('request', {}), on_call)
+        if outcome["errors"]:
+            raise RuntimeError(f"{len(outcome['errors'])} of {len(items)} mapped requests failed")
+        output_fields = node_config.get('outputFieldSelections', [])
+        return [select_output_fields(result, output_fields) for result in outcome["results"]]
+
+    def _is_cacheable(self, node_config: Dict[str, Any]) -> bool:
+        node_type = (node_config.get('type') or 'GET').upper()
+        if node_type == 'MAP':
+            request_type = node_config.get('mapConfig', {}).get('request', {}).get('type', 'GET')
+            return request_type.upper() in CACHEABLE_API_METHODS
+        return node_type == 'DATA_PROCESSING' or node_type in CACHEABLE_API_METHODS
+
+    async def run(self, nodes: List[Dict[str, Any]], connections: List[Dict[str, Any]],
+                  on_call: Callable[[Dict[str, Any]], Awaitable[Any]], use_cache: bool = True) -> Dict[str, Any]:
+        """Execute the workflow and report per-node outputs, fingerprints and cache hits."""
+        ordered_nodes = topological_order(nodes, connections)
+
+        input_connections: Dict[str, List[Dict[str, Any]]] = {}
+        for conn in connections:
+            input_connections.setdefault(conn.get('targetNodeId'), []).append(conn)
+
+        outputs: Dict[str, Any] = {}
+        fingerprints: Dict[str, str] = {}
+        cache_hits: List[str] = []
+        executed: List[str] = []
+
+        for node in ordered_nodes:
+            node_id = node['id']
+            node_config = node.get('data', {})
+            node_type = node_config.get('type')
+            inputs = input_connections.get(node_id, [])
+
+            # Make-style fingerprint: own config plus the fingerprints of every input edge
+            input_fingerprints = sorted(
+                f"{conn.get('sourceField', '')}>{conn.get('targetField', '')}:{fingerprints[conn['sourceNodeId']]}"
+                for conn in inputs if conn['sourceNodeId'] in fingerprints
+            )
+            fingerprint = node_fingerprint(node_config, input_fingerprints)
+            fingerprints[node_id] = fingerprint
+
+            cacheable = self._is_cacheable(node_config)
+            if cacheable and use_cache:
+                found, cached_output = self.cache.get(fingerprint)
+                if found:
+                    outputs[node_id] = cached_output
+                    cache_hits.append(node_id)
+                    continue
+
+            input_data = {conn['sourceNodeId']: outputs[conn['sourceNodeId']]
+                          for conn in inputs if conn['sourceNodeId'] in outputs}
+            if len(input_data) == 1:
+                data = next(iter(input_data.values()))
+            else:
+                data = input_data or None
+
+            try:
+                if node_type == 'DATA_PROCESSING':
+                    output = await self._run_data_processing_node(node_config, data)
+                elif node_type == 'MAP':
+                    output = await self._run_map_node(node_config, data, on_call)
+                else:
+                    output = await self._run_api_node(node_config, input_data, on_call)
+            except Exception as e:
+                return {
+                    "success": False,
+                    "error": str(e),
+                    "failed_node": node_id,
+                    "results": outputs,
+                    "fingerprints": fingerprints,
+                    "cache_hits": cache_hits,
+                    "executed": executed
+                }
+
+            outputs[node_id] = output
+            executed.append(node_id)
+            if cacheable:
+                self.cache.put(fingerprint, output)
+
+        return {
+            "success": True,
+            "results": outputs,
+            "fingerprints": fingerprints,
+            "cache_hits": cache_hits,
+            "executed": executed
+        }
+
+
+node_output_cache = NodeOutputCache(
+    max_bytes=int(os.getenv("WORKFLOW_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
+workflow_executor = WorkflowExecutor(node_output_cache)
@@ -0,0 +1,181 @@
+"""
+Time docs search and the docs endpoints.
+
+    python -m benchmarks.docs_db [--search-rows 2000] [--requests 1500] [--rounds 5] [--search-only]
+
+Run from the backend directory. Search is timed first, through the read-only
+pool, on a synthetic docs table of --search-rows operations (FTS5 against the
+LIKE scan it replaced). The endpoints are then timed through the app, which
+needs the Docker daemon since app.main connects to it on import: the median
+requests per second over --rounds rounds for /api-docs/{id} with a connection
+per request and with the pool, and for /api-docs/structure with and without
+If-None-Match. Databases are copied or created in a temporary directory, so
+the tracked file is never touched.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from app.services.docs_db import ReadOnlyConnectionPool
+from app.services.docs_migrations import migrate_file
+from app.services.docs_search import search_docs
+
+RESOURCES = ("issues", "pulls", "commits", "branches", "releases", "hooks", "deployments", "environments",
+             "secrets", "variables", "runners", "artifacts", "workflows", "milestones", "labels", "comments",
+             "reviews", "collaborators", "invitations", "teams", "projects", "packages", "pages", "traffic")
+VERBS = (("GET", "List"), ("POST", "Create"), ("GET", "Get"), ("PATCH", "Update"), ("DELETE", "Delete"))
+WORDS = ("repository", "organization", "authenticated", "user", "token", "permission", "webhook", "event",
+         "status", "check", "rate", "limit", "pagination", "response", "request", "scope", "access", "admin")
+SEARCH_QUERIES = ("issues comments", "create release", "workflow runs", "delete hook", "iss",
+                  "update environment variables", "list teams", "rate limit", "secrets", "pull reviews")
+
+
+class PerRequestConnections:
+    """Stand-in for the pool that opens and closes a connection per request, as before it."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def connection(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close(self):
+        pass
+
+
+def synthetic_docs_db(path, rows, seed=0):
+    """Create a docs database of `rows` operations at the current schema version."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE github_api_docs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, method TEXT NOT NULL, path TEXT NOT NULL, summary TEXT,
+            operation_id TEXT, doc_url TEXT, documentation TEXT, required_params TEXT, response_schema TEXT,
+            code_examples TEXT, category TEXT
+        )
+    """)
+    for index in range(rows):
+        resource = RESOURCES[index % len(RESOURCES)]
+        method, verb = VERBS[(index // len(RESOURCES)) % len(VERBS)]
+        scope = ("repos/{owner}/{repo}", "orgs/{org}", "user")[index % 3]
+        endpoint = f"/{scope}/{resource}/group-{index // (len(RESOURCES) * len(VERBS))}"
+        if verb not in ("List", "Create"):
+            endpoint += "/{id}"
+        summary = f"{verb} {resource} for a {scope.split('/')[0].rstrip('s')}"
+        documentation = " ".join(rng.choice(WORDS) for _ in range(80))
+        conn.execute(
+            "INSERT INTO github_api_docs (method, path, summary, operation_id, documentation, category) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (method, endpoint, summary, f"{resource}/{verb.lower()}-{index}", documentation, resource)
+        )
+    conn.commit()
+    conn.close()
+    migrate_file(path)
+    return path
+
+
+def like_search(conn, text, limit=20):
+    """The scan search replaced: every word as a substring of path, summary or documentation."""
+    query = "SELECT id, method, path, summary, category FROM github_api_docs WHERE 1"
+    params = []
+    for word in text.split():
+        query += " AND (path LIKE ? OR summary LIKE ? OR documentation LIKE ?)"
+        params.extend([f"%{word}%"] * 3)
+    return conn.execute(query + " LIMIT ?", params + [limit]).fetchall()
+
+
+def benchmark_search(directory, rows, rounds):
+    pool = ReadOnlyConnectionPool(synthetic_docs_db(os.path.join(directory, "search.db"), rows))
+    timings = {"FTS5 search": [], "LIKE scan": []}
+    try:
+        with pool.connection() as conn:
+            for _ in range(rounds):
+                for name, search in (("FTS5 search", search_docs), ("LIKE scan", like_search)):
+                    started = time.perf_counter()
+                    for text in SEARCH_QUERIES:
+                        assert search(conn, text) is not None
+                    timings[name].append((time.perf_counter() - started) / len(SEARCH_QUERIES) * 1000)
+    finally:
+        pool.close()
+    print(f"search over {rows} operations ({len(SEARCH_QUERIES)} queries)")
+    for name, values in timings.items():
+        print(f"{name:44s} {statistics.median(values):8.2f} ms/query")
+
+
+def requests_per_second(count, send):
+    started = time.perf_counter()
+    for index in range(count):
+        send(index)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=os.getenv("DOCS_DB_PATH", "app/github_api_docs.db"))
+    parser.add_argument("--search-rows", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=1500)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--search-only", action="store_true", help="skip the endpoints (no Docker needed)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="docs-bench-")
+    try:
+        benchmark_search(directory, args.search_rows, args.rounds)
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    if args.search_only:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+
+    path = shutil.copy(args.db, os.path.join(directory, "docs.db"))
+    # The pool reads DOCS_DB_PATH when app.main is first imported
+    os.environ["DOCS_DB_PATH"] = path
+    from fastapi.testclient import TestClient
+    from app import main as app_main
+
+    conn = sqlite3.connect(path)
+    ids = [row[0] for row in conn.execute("SELECT id FROM github_api_docs")]
+    conn.close()
+    print(f"{len(ids)} documented endpoints")
+
+    pool = app_main.docs_db
+    results = {}
+    try:
+        with TestClient(app_main.app) as client:
+            def get_doc(index):
+                assert client.get(f"/api-docs/{ids[index % len(ids)]}").status_code == 200
+
+            etag = client.get("/api-docs/structure").headers["etag"]
+            for _ in range(args.rounds):
+                for label, docs_db in (("connection per request", PerRequestConnections(path)), ("pooled", pool)):
+                    app_main.docs_db = docs_db
+                    results.setdefault(f"/api-docs/{{id}}, {label}", []).append(
+                        requests_per_second(args.requests, get_doc))
+                app_main.docs_db = pool
+                results.setdefault("/api-docs/structure, 200", []).append(
+                    requests_per_second(args.requests, lambda _: client.get("/api-docs/structure")))
+                results.setdefault("/api-docs/structure, 304", []).append(
+                    requests_per_second(args.requests, lambda _: client.get(
+                        "/api-docs/structure", headers={"If-None-Match": etag})))
+    finally:
+        app_main.docs_db = pool
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for name, rates in results.items():
+        print(f"{name:44s} {statistics.median(rates):8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""
+Synthetic workflows for the code generation benchmark and tests.
+
+A chain of API nodes (each taking the previous node's output as input) with
+every third node a DATA_PROCESSING step, in the shape the frontend sends.
+"""
+from typing import Any, Dict, List, Tuple
+
+
+def synthetic_workflow(node_count: int = 5000) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Return (nodes, connections) for a linear workflow of node_count nodes."""
+    nodes = []
+    connections = []
+    for i in range(node_count):
+        if i % 3 == 2:
+            data = {
+                "type": "DATA_PROCESSING",
+                "dataProcessing": {"operation": "filter_fields", "config": {"selectedFields": ["id", "name"]}}
+            }
+        else:
+            data = {
+                "type": "GET",
+                "url": "/repos/{owner}/{repo}",
+                "path_params": {"owner": "{owner}", "repo": f"repo-{i}"},
+                "query_params": {"per_page": "100"},
+                "outputFieldSelections": ["owner", "name"]
+            }
+        nodes.append({"id": f"node-{i}", "data": data, "position": {"x": i * 200, "y": 0}})
+        if i:
+            connections.append({
+                "sourceNodeId": f"node-{i - 1}",
+                "targetNodeId": f"node-{i}",
+                "sourceField": "",
+                "targetField": ""
+            })
+    return nodes, connections
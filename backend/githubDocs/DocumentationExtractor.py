@@ -6,8 +6,14 @@ from openai import OpenAI
 import argparse
 from tqdm import tqdm
 import re
+import sys
 from dotenv import load_dotenv
 
+# The docs schema and search index are shared with the backend (app/services/docs_*.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.services.docs_migrations import migrate
+from app.services.docs_search import FTS_TABLE, build_match_query
+
 # Load environment variables
 load_dotenv()
 
@@ -25,27 +31,10 @@ class GitHubAPIDocRetriever:
         self.setup_database()
     
     def setup_database(self):
-        """Create SQLite database with required schema if it doesn't exist."""
+        """Create the SQLite database or bring its schema up to date."""
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Create table for storing endpoints and their documentation
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS github_api_docs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                method TEXT NOT NULL,
-                path TEXT NOT NULL,
-                summary TEXT,
-                operation_id TEXT,
-                doc_url TEXT,
-                documentation TEXT,
-                required_params TEXT,
-                response_schema TEXT,
-                code_examples TEXT,
-                category TEXT);
-            ''')
-        
-        conn.commit()
+        version = migrate(conn)
+        print(f"Database schema version: {version}")
         conn.close()
     
     def load_endpoints(self, json_file):
@@ -152,10 +141,20 @@ class GitHubAPIDocRetriever:
 
         # Convert code examples to JSON
         try: 
+            # Upsert on the (method, path) key, keeping the row's id and created_at
             cursor.execute('''
-            INSERT OR REPLACE INTO github_api_docs 
+            INSERT INTO github_api_docs 
             (method, path, summary, operation_id, doc_url, documentation, required_params, response_schema, code_examples, category)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(method, path) DO UPDATE SET
+                summary = excluded.summary,
+                operation_id = excluded.operation_id,
+                doc_url = excluded.doc_url,
+                documentation = excluded.documentation,
+                required_params = excluded.required_params,
+                response_schema = excluded.response_schema,
+                code_examples = excluded.code_examples,
+                category = excluded.category
             ''', (method, path, summary, operation_id, doc_url, description, required_params, response_schema, code_examples, category))
 
             
@@ -171,21 +170,17 @@ class GitHubAPIDocRetriever:
     def process_endpoints(self, json_file):
         endpoints = self.load_endpoints(json_file)
         
-        # Check how many endpoints are already in the database
+        # Process endpoints that aren't already in the database (one scan of the (method, path) index)
         conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT method, path FROM github_api_docs")
-        existing = {(method, path) for method, path in cursor.fetchall()}
+        documented = set(conn.execute("SELECT method, path FROM github_api_docs"))
         conn.close()
-        
-        # Process endpoints that aren't already in the database
-        pending_endpoints = []
-        for key, data in endpoints.items():
-            if (data["method"], data["path"]) not in existing:
-                pending_endpoints.append((key, data))
+        pending_endpoints = [
+            (key, data) for key, data in endpoints.items()
+            if (data["method"], data["path"]) not in documented
+        ]
         
         print(f"Found {len(endpoints)} endpoints in JSON file")
-        print(f"Already processed: {len(existing)}")
+        print(f"Already processed: {len(endpoints) - len(pending_endpoints)}")
         print(f"Endpoints to process: {len(pending_endpoints)}")
         
         for key, data in tqdm(pending_endpoints, desc="Processing endpoints"):
@@ -204,23 +199,31 @@ class GitHubAPIDocRetriever:
     def search_endpoints(self, search_term=None, method=None):
         """
         Query the database for endpoints matching search criteria.
+        Search terms are matched as word prefixes and results ranked by relevance.
         """
         conn = sqlite3.connect(self.db_path)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        query = "SELECT * FROM github_api_docs WHERE 1=1"
-        params = []
-        
-        if search_term:
-            query += " AND (path LIKE ? OR summary LIKE ? OR documentation LIKE ?)"
-            term = f"%{search_term}%"
-            params.extend([term, term, term])
+        match = build_match_query(search_term) if search_term else None
+        if match:
+            query = f"""
+                SELECT d.* FROM {FTS_TABLE}
+                JOIN github_api_docs AS d ON d.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH ?
+            """
+            params = [match]
+        else:
+            query = "SELECT d.* FROM github_api_docs AS d WHERE 1=1"
+            params = []
         
         if method:
-            query += " AND method = ?"
+            query += " AND d.method = ?"
             params.append(method)
         
+        if match:
+            query += f" ORDER BY {FTS_TABLE}.rank"
+        
         cursor.execute(query, params)
         results = [dict(row) for row in cursor.fetchall()]
         conn.close()
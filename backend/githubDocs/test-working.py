@@ -1,15 +1,27 @@
+import os
 import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.services.docs_migrations import SCHEMA_VERSION, schema_version
 
 def print_github_api_docs(db_path, limit=10):
-    """Print a limited number of records from the github_api_docs table."""
+    """Print the most recently added records from the github_api_docs table."""
     try:
-        conn = sqlite3.connect(db_path)
+        # Read-only: inspecting the database must never change it
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        # created_at only exists once the schema migrations have run
+        version = schema_version(conn)
+        if version < SCHEMA_VERSION:
+            conn.close()
+            sys.exit(f"{db_path} is at schema version {version}, expected {SCHEMA_VERSION}; "
+                     f"run `python -m app.services.docs_migrations {db_path}` first")
         cursor = conn.cursor()
 
         cursor.execute('''
             SELECT method, path, summary, documentation
             FROM github_api_docs
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
         ''', (limit,))
         
@@ -0,0 +1,23 @@
+import asyncio
+
+from app.services.call_events import CallEventBroker
+
+
+def test_every_overflow_is_counted():
+    async def scenario():
+        broker = CallEventBroker(max_queue=2)
+        subscription = broker.subscribe("s1")
+        for burst in range(3):
+            for index in range(3):
+                broker.publish("s1", {"id": burst * 3 + index})
+            await asyncio.sleep(0)
+            assert subscription.overflowed
+            # The feed clears the flag after catching up from the store
+            subscription.overflowed = False
+        stats = broker.stats()
+        broker.unsubscribe(subscription)
+        return stats, broker.stats()
+
+    during, after = asyncio.run(scenario())
+    assert during["overflows"] == 3
+    assert after["overflows"] == 3 and after["subscribers"] == 0
@@ -0,0 +1,30 @@
+import time
+
+from app.services.call_store import MemoryCallStore, SQLiteCallStore
+
+
+def test_memory_store_applies_the_session_ttl(monkeypatch):
+    store = MemoryCallStore(session_ttl=60, sweep_interval=3600)
+    store.create_session("abc")
+    assert store.has_session("abc")
+
+    # Not swept yet, but already past the TTL, as the SQLite store reports it
+    later = time.time() + 61
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert "abc" in store.sessions
+    assert not store.has_session("abc")
+
+
+def test_sqlite_reads_touch_the_session_at_most_once_per_interval(tmp_path):
+    store = SQLiteCallStore(str(tmp_path / "calls.db"), session_ttl=3600, touch_interval=60)
+    store.append("abc", {"method": "GET", "url": "https://api.github.com/user", "response": {"login": "octocat"}})
+
+    statements = []
+    store._connection().set_trace_callback(statements.append)
+    for _ in range(5):
+        assert len(store.get_calls("abc")) == 1
+        assert store.get_calls_after("abc", -1, 10)[0]["id"] == 0
+
+    updates = [sql for sql in statements if sql.startswith("UPDATE call_sessions")]
+    assert len(updates) == 1
+    assert store.has_session("abc")
@@ -0,0 +1,66 @@
+import asyncio
+import gzip
+import json
+import os
+import stat
+import threading
+
+import httpx
+
+from app.services.cassettes import CassetteStore, RecordingTransport, ReplayTransport
+
+PAYLOAD = {"login": "octocat", "repos": list(range(100))}
+
+
+def gzip_upstream(request):
+    return httpx.Response(
+        200,
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip", "ETag": '"v1"'},
+        content=gzip.compress(json.dumps(PAYLOAD).encode('utf-8'))
+    )
+
+
+def test_gzip_round_trip(tmp_path):
+    store = CassetteStore(str(tmp_path))
+
+    async def fetch(transport):
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://api.test/users/octocat")
+
+    recorded = asyncio.run(fetch(RecordingTransport(store, httpx.MockTransport(gzip_upstream))))
+    assert recorded.json() == PAYLOAD
+    assert recorded.headers["content-encoding"] == "gzip"
+
+    replayed = asyncio.run(fetch(ReplayTransport(store)))
+    assert replayed.headers["x-sandbox-replay"] == "hit"
+    assert replayed.json() == PAYLOAD
+    assert store.stats()["recorded"] == 1 and store.stats()["replayed"] == 1
+
+
+class ThreadRecordingStore(CassetteStore):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.threads = set()
+
+    def load(self, key):
+        self.threads.add(threading.get_ident())
+        return super().load(key)
+
+    def save(self, key, entry):
+        self.threads.add(threading.get_ident())
+        super().save(key, entry)
+
+
+def test_cassettes_are_private_and_written_off_the_loop(tmp_path):
+    directory = tmp_path / "cassettes"
+    store = ThreadRecordingStore(str(directory))
+
+    async def record_and_replay():
+        async with httpx.AsyncClient(transport=RecordingTransport(store, httpx.MockTransport(gzip_upstream))) as client:
+            await client.get("https://api.test/users/octocat")
+        async with httpx.AsyncClient(transport=ReplayTransport(store)) as client:
+            return await client.get("https://api.test/users/octocat")
+
+    assert asyncio.run(record_and_replay()).json() == PAYLOAD
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert store.threads and threading.get_ident() not in store.threads
@@ -0,0 +1,56 @@
+import json
+from urllib.parse import parse_qs, urlparse
+
+from app.services.code_cache import CodeGenerationCache
+from app.services.code_generator import WorkflowCodeGenerator
+from benchmarks.workflows import synthetic_workflow
+
+
+def test_large_workflow_generates_valid_code():
+    nodes, connections = synthetic_workflow(5000)
+    code = WorkflowCodeGenerator.generate_simple_workflow_code(nodes, connections)
+    compile(code, "<generated>", "exec")
+    assert code.count("# Prepare input data for node") == len(connections)
+    assert "input_data['node-4998'] = data" in code
+    # API nodes with inputs substitute them into their parameters
+    assert code.count("# Substitute input data into parameters") == sum(
+        1 for node in nodes[1:] if node["data"]["type"] == "GET"
+    )
+
+
+def test_fragment_cache_reproduces_uncached_code():
+    nodes, connections = synthetic_workflow(50)
+    cache = CodeGenerationCache()
+    code, _, cached = cache.generate(nodes, connections)
+    assert not cached
+    assert code == WorkflowCodeGenerator.generate_simple_workflow_code(nodes, connections)
+
+    nodes[10]["data"]["query_params"] = {"per_page": "50"}
+    code, _, cached = cache.generate(nodes, connections)
+    assert not cached
+    assert code == WorkflowCodeGenerator.generate_simple_workflow_code(nodes, connections)
+    assert cache.generate(nodes, connections)[2]
+
+
+def test_paginated_node_selects_fields_item_by_item(serve):
+    def respond(request):
+        page = int(parse_qs(urlparse(request.path).query).get("page", ["1"])[0])
+        body = json.dumps([{"id": page * 10 + i, "name": f"repo-{i}", "owner": {"login": "octocat"}} for i in range(3)])
+        headers = {"Content-Type": "application/json"}
+        if page < 3:
+            headers["Link"] = f'<{base_url}/repos?page={page + 1}>; rel="next"'
+        return 200, headers, body.encode()
+
+    base_url = serve(respond)
+    node_config = {
+        "type": "GET",
+        "url": f"{base_url}/repos",
+        "pagination": {"enabled": True, "perPage": 3, "maxItems": 8},
+        "outputFieldSelections": ["id", "owner.login"]
+    }
+    code = WorkflowCodeGenerator.generate_imports() + WorkflowCodeGenerator._generate_helpers([{"data": node_config}])
+    code += WorkflowCodeGenerator.generate_api_call_code(node_config, 1)
+    namespace = {}
+    exec(code, namespace)
+    assert "list(iter_pages(" not in code
+    assert namespace["data"] == [{"id": id, "owner_login": "octocat"} for id in (10, 11, 12, 20, 21, 22, 30, 31)]
@@ -0,0 +1,104 @@
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from app.services.docs_db import ReadOnlyConnectionPool
+from app.services.docs_migrations import SCHEMA_VERSION, main, migrate_file, schema_version
+from app.services.docs_search import search_docs
+
+TRACKED_DB = os.path.join(os.path.dirname(__file__), "..", "app", "github_api_docs.db")
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture
+def docs_copy(tmp_path):
+    """A copy of the tracked docs database; the tracked file itself must never change."""
+    before = digest(TRACKED_DB)
+    path = str(tmp_path / "docs.db")
+    shutil.copy(TRACKED_DB, path)
+    yield path
+    assert digest(TRACKED_DB) == before
+    assert not os.path.exists(f"{TRACKED_DB}-wal") and not os.path.exists(f"{TRACKED_DB}-shm")
+
+
+LEGACY_COLUMNS = ("method", "path", "summary", "operation_id", "doc_url", "documentation",
+                  "required_params", "response_schema", "code_examples", "category")
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """The shipped rows in a version 0 database, as DocumentationExtractor used to create them."""
+    source = sqlite3.connect(f"file:{TRACKED_DB}?mode=ro", uri=True)
+    rows = source.execute(f"SELECT {', '.join(LEGACY_COLUMNS)} FROM github_api_docs ORDER BY id").fetchall()
+    source.close()
+
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"""
+        CREATE TABLE github_api_docs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, {', '.join(f'{column} TEXT' for column in LEGACY_COLUMNS)}
+        )
+    """)
+    placeholders = ", ".join("?" for _ in LEGACY_COLUMNS)
+    conn.executemany(f"INSERT INTO github_api_docs ({', '.join(LEGACY_COLUMNS)}) VALUES ({placeholders})", rows)
+    # A failed re-run used to add duplicates; the documented row must win
+    conn.execute(f"INSERT INTO github_api_docs ({', '.join(LEGACY_COLUMNS)}) VALUES ({placeholders})",
+                 rows[0][:5] + ("Error 500",) + rows[0][6:])
+    conn.commit()
+    conn.close()
+    return path, rows
+
+
+def test_shipped_database_is_current(docs_copy):
+    conn = sqlite3.connect(docs_copy)
+    assert schema_version(conn) == SCHEMA_VERSION
+    assert search_docs(conn, "repositories user")
+    conn.close()
+
+
+def test_migrates_a_legacy_database(legacy_db):
+    path, rows = legacy_db
+    assert migrate_file(path) == SCHEMA_VERSION
+    # Running again is a no-op
+    assert migrate_file(path) == SCHEMA_VERSION
+
+    conn = sqlite3.connect(path)
+    assert schema_version(conn) == SCHEMA_VERSION
+    migrated = conn.execute(f"SELECT {', '.join(LEGACY_COLUMNS)} FROM github_api_docs").fetchall()
+    assert sorted(migrated, key=repr) == sorted(rows, key=repr)
+    assert conn.execute("SELECT COUNT(*) FROM github_api_docs WHERE created_at IS NULL").fetchone()[0] == 0
+    results = search_docs(conn, "repositories user")
+    assert results and results[0]["path"] == "/users/{username}/repos"
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO github_api_docs (method, path) VALUES (?, ?)", rows[0][:2])
+    conn.close()
+
+
+def test_pool_never_writes(docs_copy):
+    before = digest(docs_copy)
+    pool = ReadOnlyConnectionPool(docs_copy, size=2)
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM github_api_docs").fetchone()[0] > 0
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM github_api_docs")
+    pool.close()
+
+    assert digest(docs_copy) == before
+    assert os.listdir(os.path.dirname(docs_copy)) == ["docs.db"]
+
+
+def test_cli_migrates_and_switches_to_wal(legacy_db, capsys):
+    path, _ = legacy_db
+    main([path, "--wal"])
+    assert f"schema version {SCHEMA_VERSION}" in capsys.readouterr().out
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
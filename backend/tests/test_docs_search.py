@@ -0,0 +1,26 @@
+from benchmarks.docs_db import synthetic_docs_db
+from app.services.docs_db import ReadOnlyConnectionPool
+from app.services.docs_search import search_docs
+
+
+def test_search_over_more_than_a_thousand_operations(tmp_path):
+    pool = ReadOnlyConnectionPool(synthetic_docs_db(str(tmp_path / "docs.db"), 1500))
+    with pool.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM github_api_docs").fetchone()[0] == 1500
+
+        releases = search_docs(conn, "create release", limit=100)
+        assert releases and all(
+            result["summary"].startswith("Create releases") for result in releases
+        )
+
+        # Prefixes match, and filters apply before the limit
+        issues = search_docs(conn, "iss", method="delete", limit=100)
+        assert issues and all(
+            result["category"] == "issues" and result["method"] == "DELETE" for result in issues
+        )
+
+        # Path matches outrank words that only appear in the documentation
+        ranked = search_docs(conn, "hooks")
+        assert ranked[0]["category"] == "hooks"
+        assert [result["score"] for result in ranked] == sorted((result["score"] for result in ranked), reverse=True)
+    pool.close()
@@ -0,0 +1,84 @@
+import json
+import random
+
+import pytest
+
+from app.services.json_patch import JsonPatchError, apply_patch, make_patch
+
+CASES = [
+    ({"a": 1}, {"a": 2}),
+    ({"a": 1, "b": 2}, {"b": 2, "c": 3}),
+    ({"a/b": 1, "m~n": 2}, {"a/b": 3}),
+    ([1, 2, 3], [0, 1, 2, 3]),
+    ([1, 2, 3], [1, 2]),
+    ([1, 2, 3, 4, 5], [1, 9, 3, 5, 6, 7]),
+    ([{"id": 1}, {"id": 2}], [{"id": 3}, {"id": 1, "x": True}, {"id": 2}]),
+    ({"items": [1, 2]}, {"items": []}),
+    ([True, 1], [1, True]),
+    ({"a": None}, {"a": {"b": [None]}}),
+    ([1, 2], {"a": 1}),
+    ("text", ["text"]),
+]
+
+
+@pytest.mark.parametrize("old, new", CASES)
+def test_round_trip(old, new):
+    # Compare as JSON text, since True == 1 in Python
+    assert json.dumps(apply_patch(old, make_patch(old, new))) == json.dumps(new)
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(6 if depth < 3 else 3)
+    if kind == 0:
+        return rng.randrange(5)
+    if kind == 1:
+        return rng.choice(["a", "b", "c/d", "e~f"])
+    if kind == 2:
+        return rng.choice([None, True, False])
+    if kind == 3:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(6))]
+    return {rng.choice("abcde"): random_value(rng, depth + 1) for _ in range(rng.randrange(5))}
+
+
+def mutate(rng, value):
+    if isinstance(value, list):
+        value = [mutate(rng, item) if rng.random() < 0.3 else item for item in value]
+        for _ in range(rng.randrange(3)):
+            if value and rng.random() < 0.5:
+                del value[rng.randrange(len(value))]
+            else:
+                value.insert(rng.randrange(len(value) + 1), random_value(rng, 2))
+        return value
+    if isinstance(value, dict):
+        value = {key: mutate(rng, item) if rng.random() < 0.3 else item for key, item in value.items()}
+        if value and rng.random() < 0.3:
+            del value[rng.choice(list(value))]
+        if rng.random() < 0.3:
+            value[rng.choice("abcdef")] = random_value(rng, 2)
+        return value
+    return random_value(rng, 2) if rng.random() < 0.5 else value
+
+
+def test_round_trip_random_documents():
+    rng = random.Random(6902)
+    for _ in range(500):
+        old = random_value(rng)
+        new = mutate(rng, old)
+        assert apply_patch(old, make_patch(old, new)) == new
+
+
+def test_apply_leaves_the_input_alone():
+    old = {"items": [{"id": 1}]}
+    apply_patch(old, [{"op": "add", "path": "/items/0/name", "value": "x"}])
+    assert old == {"items": [{"id": 1}]}
+
+
+@pytest.mark.parametrize("patch", [
+    [{"op": "move", "path": "/a", "from": "/b"}],
+    [{"op": "remove", "path": "/missing"}],
+    [{"op": "add", "path": "/items/5", "value": 1}],
+    [{"op": "replace", "path": "no-slash", "value": 1}],
+])
+def test_invalid_patches_are_rejected(patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"a": 1, "items": []}, patch)
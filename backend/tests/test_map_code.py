@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from app.services.code_generator import WorkflowCodeGenerator
+
+
+@pytest.fixture
+def upstream(serve):
+    """Local server answering /status/<code> with that status, counting requests per path."""
+    hits = {}
+
+    def respond(request):
+        hits[request.path] = hits.get(request.path, 0) + 1
+        return int(request.path.rsplit('/', 1)[-1]), {'Content-Type': 'application/json'}, b'{}'
+
+    return serve(respond), hits
+
+
+def run_map(base_url, items, retries=2):
+    node_config = {
+        'mapConfig': {
+            'request': {'type': 'GET', 'url': f'{base_url}/status/{{code}}', 'path_params': {'code': '{item}'}},
+            'retries': retries,
+            'concurrency': 2
+        }
+    }
+    code = WorkflowCodeGenerator.generate_imports() + WorkflowCodeGenerator.generate_map_code(node_config, 1)
+    # Retries back off for 0.5s, 1s, ...; skip the wait
+    namespace = {'data': items}
+    exec(code.replace('time.sleep(0.5 * (2 ** attempt))', 'pass'), namespace)
+    return namespace['data']
+
+
+def test_generated_map_code_does_not_retry_client_errors(upstream):
+    base_url, hits = upstream
+    with pytest.raises(Exception) as error:
+        run_map(base_url, ['404'])
+    assert error.value.response.status_code == 404
+    assert hits == {'/status/404': 1}
+
+
+def test_generated_map_code_retries_server_errors(upstream):
+    base_url, hits = upstream
+    with pytest.raises(Exception):
+        run_map(base_url, ['503'], retries=2)
+    assert hits == {'/status/503': 3}
+
+
+def test_generated_map_code_returns_results_in_order(upstream):
+    base_url, hits = upstream
+    assert run_map(base_url, ['200', '201']) == [{}, {}]
+
+
+def test_generated_map_code_selects_fields_from_each_result(serve):
+    def respond(request):
+        number = request.path.rsplit('/', 1)[-1]
+        body = {'number': int(number), 'user': {'login': 'octocat'}, 'body': 'x' * 100}
+        return 200, {'Content-Type': 'application/json'}, json.dumps(body).encode()
+
+    base_url = serve(respond)
+    node_config = {
+        'mapConfig': {
+            'request': {'type': 'GET', 'url': f'{base_url}/issues/{{number}}', 'path_params': {'number': '{item}'}}
+        },
+        'outputFieldSelections': ['number', 'user.login']
+    }
+    code = WorkflowCodeGenerator.generate_imports() + WorkflowCodeGenerator.generate_map_code(node_config, 1)
+    namespace = {'data': [1, 2]}
+    exec(code, namespace)
+    assert namespace['data'] == [{'number': 1, 'user_login': 'octocat'}, {'number': 2, 'user_login': 'octocat'}]
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import stat
+import threading
+import time
+
+import httpx
+
+from app.services import call_store
+from app.services.call_events import CallEventBroker
+from app.services.call_store import MemoryCallStore, SQLiteCallStore, create_call_store
+from app.services.map_executor import MapExecutor
+from app.services.proxy import ApiProxy
+from app.services.timing import TimingStats
+
+STORE_DELAY = 0.2
+
+
+class SlowStore(MemoryCallStore):
+    """A store whose writes block like a contended SQLite or a remote Redis."""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def append(self, session_id, call):
+        self.threads.add(threading.get_ident())
+        time.sleep(STORE_DELAY)
+        return super().append(session_id, call)
+
+
+def make_proxy(store):
+    return ApiProxy(store, CallEventBroker(), TimingStats())
+
+
+def test_recording_does_not_block_the_event_loop():
+    store = SlowStore()
+    proxy = make_proxy(store)
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticking = asyncio.ensure_future(ticker())
+        started = time.perf_counter()
+        await asyncio.gather(*(proxy.record_call_async("session", {"url": f"/{i}"}) for i in range(5)))
+        elapsed = time.perf_counter() - started
+        ticking.cancel()
+        return elapsed
+
+    elapsed = asyncio.run(main())
+    assert threading.get_ident() not in store.threads
+    assert len(store.get_calls("session")) == 5
+    # Five blocking writes on the loop would take 1s and stop the ticker for all of it
+    assert elapsed < STORE_DELAY * 3
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < STORE_DELAY
+
+
+def test_map_executor_awaits_recording(monkeypatch):
+    from app.services import map_executor
+
+    async def send_request(request_params):
+        return httpx.Response(200, json={"url": request_params["url"]},
+                              request=httpx.Request("GET", request_params["url"]))
+
+    monkeypatch.setattr(map_executor, "send_request", send_request)
+    store = SlowStore()
+    proxy = make_proxy(store)
+    outcome = asyncio.run(MapExecutor(concurrency=4).run(
+        ["a", "b", "c", "d"],
+        {"type": "GET", "url": "https://api.github.com/users/{login}", "path_params": {"login": "{item}"}},
+        on_call=lambda call: proxy.record_call_async("session", call)
+    ))
+    assert [result["url"] for result in outcome["results"]] == [
+        f"https://api.github.com/users/{login}" for login in "abcd"
+    ]
+    assert [call["url"] for call in sorted(store.get_calls("session"), key=lambda call: call["url"])] == [
+        f"https://api.github.com/users/{login}" for login in "abcd"
+    ]
+    assert threading.get_ident() not in store.threads
+
+
+def test_sqlite_store_defaults_to_a_fixed_private_path(tmp_path, monkeypatch):
+    monkeypatch.setenv("CALL_STORE_BACKEND", "sqlite")
+    monkeypatch.delenv("CALL_STORE_SQLITE_PATH", raising=False)
+    monkeypatch.setattr(call_store, "DEFAULT_SQLITE_DIR", str(tmp_path / "calls"))
+    monkeypatch.chdir(tmp_path)
+
+    store = create_call_store()
+    assert isinstance(store, SQLiteCallStore)
+    assert store.path == str(tmp_path / "calls" / "calls.db")
+    assert stat.S_IMODE(os.stat(tmp_path / "calls").st_mode) == 0o700
+
+
+def test_cursor_resets_when_session_ids_restart():
+    store = MemoryCallStore()
+    proxy = make_proxy(store)
+    for index in range(3):
+        proxy.record_call("s1", {"method": "GET", "url": f"https://api.test/{index}", "status": 200})
+    page = proxy.get_calls_page("s1", after_id=-1)
+    assert page["next_after_id"] == 2
+
+    # Clearing keeps the id sequence going, so the cursor stays put
+    store.clear("s1")
+    assert proxy.get_calls_page("s1", after_id=2)["next_after_id"] == 2
+
+    # An expired session starts again from id 0
+    with store.lock:
+        store._drop_session("s1")
+    proxy.record_call("s1", {"method": "GET", "url": "https://api.test/again", "status": 200})
+    page = proxy.get_calls_page("s1", after_id=2)
+    assert page["calls"] == [] and page["next_after_id"] == -1
+    assert [call["id"] for call in proxy.get_calls_page("s1", after_id=-1)["calls"]] == [0]
+
+
+def test_stream_disconnect_still_records_the_call(monkeypatch):
+    from starlette.requests import Request
+
+    from app.services import proxy as proxy_module
+
+    chunk = b"x" * 4096
+    chunks_before_stall = 5
+    closed = []
+
+    async def upstream_body():
+        for _ in range(chunks_before_stall):
+            yield chunk
+        # A slow upstream: the client goes away while we wait for the next chunk
+        await asyncio.Event().wait()
+
+    async def open_stream(request_params):
+        response = httpx.Response(200, headers={"Content-Type": "text/plain"}, content=upstream_body(),
+                                  request=httpx.Request("GET", request_params["url"]))
+        original_close = response.aclose
+
+        async def aclose():
+            closed.append(True)
+            await original_close()
+
+        response.aclose = aclose
+        return response
+
+    monkeypatch.setattr(proxy_module, "open_stream", open_stream)
+    store = SlowStore()
+    proxy = make_proxy(store)
+    session_id = proxy.create_session_id()
+
+    async def main():
+        scope = {
+            "type": "http", "method": "GET", "path": f"/api-proxy/stream/{session_id}", "headers": [],
+            "query_string": b"url=https://api.test/big", "asgi": {"version": "3.0", "spec_version": "2.3"}
+        }
+        request = Request(scope)
+        response = await proxy.proxy_stream(request, session_id)
+
+        sent = []
+        enough = asyncio.Event()
+
+        async def send(message):
+            if message["type"] == "http.response.body":
+                sent.append(message["body"])
+                if len(sent) == chunks_before_stall:
+                    enough.set()
+
+        async def receive():
+            await enough.wait()
+            return {"type": "http.disconnect"}
+
+        await response(scope, receive, send)
+        return sum(len(body) for body in sent)
+
+    sent_bytes = asyncio.run(main())
+    assert sent_bytes == chunks_before_stall * len(chunk)
+    assert closed
+    [call] = [store.resolve(call) for call in store.get_calls(session_id)]
+    assert call["streamed"] and not call["completed"]
+    assert call["truncated"]
+    assert call["response_bytes"] == sent_bytes
+    assert len(call["response"]) == proxy_module.MAX_RECORDED_BODY
+
+
+def test_client_accept_encoding_is_not_forwarded():
+    from starlette.requests import Request
+
+    request = Request({
+        "type": "http", "method": "GET", "path": "/api-proxy/s1", "query_string": b"url=https://api.test/x",
+        "headers": [(b"accept-encoding", b"br, zstd"), (b"accept", b"application/json"), (b"host", b"localhost")]
+    })
+    request_data = asyncio.run(make_proxy(MemoryCallStore())._read_request(request))
+    assert {name.lower() for name in request_data["headers"]} == {"accept"}
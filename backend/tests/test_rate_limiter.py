@@ -0,0 +1,104 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+
+from app.services.rate_limiter import (
+    RateLimitExceeded, TokenBucket, UpstreamScheduler, credential_key, parse_retry_after
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def low_quota_bucket(now, remaining=100, reset_in=1000.0):
+    bucket = TokenBucket(pacing_threshold=0.1)
+    bucket.observe(200, {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(now + reset_in)
+    }, now)
+    return bucket
+
+
+def test_rejected_reservations_take_nothing():
+    now = 1_000_000.0
+    bucket = low_quota_bucket(now)
+    waits = [bucket.reserve(now, max_wait=60) for _ in range(20)]
+
+    accepted = [wait for wait in waits if wait <= 60]
+    # About 10s apart (1000s over the 100 calls left), so 6 fit within a minute
+    assert len(accepted) == 6
+    assert bucket.remaining == 100 - len(accepted)
+    assert now + 60 < bucket.next_slot < now + 62
+
+    # Two minutes later the queue has drained; a new call goes straight through
+    assert bucket.reserve(now + 120, max_wait=60) == 0.0
+
+
+def test_limit_without_remaining_does_not_fail():
+    bucket = TokenBucket(pacing_threshold=0.1)
+    bucket.observe(200, {"X-RateLimit-Limit": "60"}, time.time())
+    assert bucket.remaining is None
+    assert bucket.reserve(time.time()) == 0.0
+    assert bucket.remaining == 59
+
+
+def test_scheduler_rejects_without_consuming_quota():
+    scheduler = UpstreamScheduler(max_wait=60)
+    request_params = {"method": "GET", "url": "https://api.github.com/user", "headers": {}}
+    now = time.time()
+    bucket = scheduler.bucket_for(request_params["headers"], request_params["url"])
+    bucket.observe(200, {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": "100",
+        "X-RateLimit-Reset": str(now + 1000)
+    }, now)
+    # Pretend the paced queue is already two minutes deep
+    bucket.next_slot = now + 120
+    sent = []
+
+    async def send(params):
+        sent.append(params)
+        return FakeResponse()
+
+    for _ in range(5):
+        with pytest.raises(RateLimitExceeded) as error:
+            asyncio.run(scheduler.execute(request_params, send))
+        assert error.value.retry_at == pytest.approx(now + 120, abs=1)
+    assert sent == []
+    assert bucket.remaining == 100
+    assert bucket.next_slot == now + 120
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    now = 1_000_000.0
+    assert parse_retry_after({"Retry-After": "30"}, now) == 30.0
+    assert parse_retry_after({"Retry-After": formatdate(now + 90, usegmt=True)}, now) == 90.0
+    # A date in the past means retry now
+    assert parse_retry_after({"retry-after": formatdate(now - 90, usegmt=True)}, now) == 0.0
+    assert parse_retry_after({"Retry-After": "soon"}, now) is None
+
+    bucket = TokenBucket(pacing_threshold=0.1)
+    bucket.observe(429, {"Retry-After": formatdate(now + 90, usegmt=True)}, now)
+    assert bucket.reserve(now) == 90.0
+
+
+def test_scheduler_evicts_least_recently_used_buckets():
+    scheduler = UpstreamScheduler(max_buckets=2)
+    first = scheduler.bucket_for({"Authorization": "token a"}, "https://api.github.com/user")
+    scheduler.bucket_for({"Authorization": "token b"}, "https://api.github.com/user")
+    # Using the first bucket again makes the second the least recently used
+    assert scheduler.bucket_for({"Authorization": "token a"}, "https://api.github.com/repos") is first
+    scheduler.bucket_for({"Authorization": "token c"}, "https://api.github.com/user")
+
+    budgets = scheduler.budgets()
+    assert len(scheduler.buckets) == 2
+    assert budgets["evicted_buckets"] == 1
+    assert {bucket["credential"] for bucket in budgets["buckets"]} == {
+        credential_key({"Authorization": value}) for value in ("token a", "token c")
+    }
@@ -0,0 +1,155 @@
+import asyncio
+import os
+import stat
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.services.response_cache import ConditionalResponseCache
+
+URL = "https://api.github.com/repos/octocat/hello-world"
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    return str(tmp_path / "http-cache")
+
+
+def make_cache(cache_dir):
+    return ConditionalResponseCache(
+        memory_bytes=1024 * 1024, disk_bytes=1024 * 1024, cache_dir=cache_dir, max_entry_bytes=64 * 1024
+    )
+
+
+class Upstream:
+    """Answers with an ETag'd body, or 304 when the request revalidates the current ETag."""
+
+    def __init__(self, cache_control="public, max-age=60"):
+        self.etag = '"v1"'
+        self.body = b'{"name": "hello-world"}'
+        self.cache_control = cache_control
+        self.requests = []
+
+    async def send(self, request_params):
+        self.requests.append(request_params)
+        request = httpx.Request("GET", request_params["url"], headers=request_params.get("headers"))
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag, "X-RateLimit-Remaining": "4999"}, request=request)
+        return httpx.Response(200, headers={
+            "ETag": self.etag,
+            "Cache-Control": self.cache_control,
+            "Content-Type": "application/json",
+            "X-RateLimit-Remaining": "5000"
+        }, content=self.body, request=request)
+
+
+def fetch(cache, upstream, headers=None):
+    return asyncio.run(cache.fetch({"method": "GET", "url": URL, "headers": headers or {}}, upstream.send))
+
+
+def test_repeat_get_is_revalidated(cache_dir):
+    cache = make_cache(cache_dir)
+    upstream = Upstream()
+
+    first = fetch(cache, upstream)
+    assert first.status_code == 200
+    assert "if-none-match" not in {name.lower() for name in upstream.requests[0]["headers"]}
+
+    second = fetch(cache, upstream)
+    assert upstream.requests[1]["headers"]["If-None-Match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.content == upstream.body
+    assert second.headers["x-sandbox-cache"] == "revalidated"
+    assert second.headers["x-ratelimit-remaining"] == "4999"
+    assert cache.counters["hits"] == 1
+
+
+def test_changed_resource_replaces_the_entry(cache_dir):
+    cache = make_cache(cache_dir)
+    upstream = Upstream()
+    fetch(cache, upstream)
+
+    upstream.etag, upstream.body = '"v2"', b'{"name": "renamed"}'
+    changed = fetch(cache, upstream)
+    assert changed.content == b'{"name": "renamed"}'
+    assert "x-sandbox-cache" not in changed.headers
+    assert fetch(cache, upstream).headers["x-sandbox-cache"] == "revalidated"
+
+
+def test_disk_tier_survives_restart_in_a_private_directory(cache_dir):
+    fetch(make_cache(cache_dir), Upstream())
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    assert len(os.listdir(cache_dir)) == 1
+
+    upstream = Upstream()
+    restarted = make_cache(cache_dir)
+    assert fetch(restarted, upstream).headers["x-sandbox-cache"] == "revalidated"
+
+
+def test_existing_directory_is_made_private(cache_dir):
+    os.makedirs(cache_dir, mode=0o777)
+    os.chmod(cache_dir, 0o777)
+    make_cache(cache_dir)
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+
+
+def test_private_responses_stay_in_memory(cache_dir):
+    cache = make_cache(cache_dir)
+    upstream = Upstream(cache_control="private, max-age=60")
+    headers = {"Authorization": "token secret"}
+    fetch(cache, upstream, headers)
+
+    assert os.listdir(cache_dir) == []
+    assert fetch(cache, upstream, headers).headers["x-sandbox-cache"] == "revalidated"
+    assert make_cache(cache_dir).get(cache.cache_key({"method": "GET", "url": URL, "headers": headers})) is None
+
+
+DISK_DELAY = 0.2
+
+
+class SlowDiskCache(ConditionalResponseCache):
+    """A cache whose disk tier blocks like a large entry on a slow disk."""
+
+    def __init__(self, cache_dir):
+        super().__init__(memory_bytes=1024 * 1024, disk_bytes=1024 * 1024, cache_dir=cache_dir,
+                         max_entry_bytes=64 * 1024)
+        self.threads = set()
+
+    def _disk_put(self, key, entry):
+        self.threads.add(threading.get_ident())
+        time.sleep(DISK_DELAY)
+        super()._disk_put(key, entry)
+
+    def _disk_get(self, key):
+        self.threads.add(threading.get_ident())
+        time.sleep(DISK_DELAY)
+        return super()._disk_get(key)
+
+
+def test_disk_tier_does_not_block_the_event_loop(cache_dir):
+    cache = SlowDiskCache(cache_dir)
+    upstream = Upstream()
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        ticking = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0.02)
+        await cache.fetch({"method": "GET", "url": URL, "headers": {}}, upstream.send)
+        # Only the disk tier has the entry now
+        cache.memory.clear()
+        cache.memory_used = 0
+        revalidated = await cache.fetch({"method": "GET", "url": URL, "headers": {}}, upstream.send)
+        ticking.cancel()
+        return revalidated
+
+    revalidated = asyncio.run(main())
+    assert revalidated.headers["x-sandbox-cache"] == "revalidated"
+    assert cache.threads and threading.get_ident() not in cache.threads
+    assert max(b - a for a, b in zip(ticks, ticks[1:])) < DISK_DELAY
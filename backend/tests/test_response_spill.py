@@ -0,0 +1,69 @@
+import os
+import stat
+
+import pytest
+
+from app.services.response_spill import SpillStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SpillStore(str(tmp_path / "spill"), inline_max_bytes=1024, max_age=3600, max_bytes=1024 * 1024)
+
+
+def items(count, start=0):
+    return [{"id": i, "name": f"item-{i:04d}"} for i in range(start, start + count)]
+
+
+def test_small_array_stays_inline(store):
+    body = store.array()
+    body.extend(items(5))
+    assert body.finish() == (items(5), None)
+    assert not os.path.exists(store.directory)
+
+
+def test_array_spills_page_by_page(store):
+    body = store.array()
+    for page in range(10):
+        body.extend(items(50, start=page * 50))
+    preview, meta = body.finish()
+
+    assert meta["kind"] == "array"
+    assert meta["item_count"] == body.item_count == 500
+    assert preview == items(meta["preview_count"])
+    assert 0 < len(preview) < 500
+    assert store.read_items(meta["handle"], 0, 500) == items(500)
+    assert store.read_items(meta["handle"], 120, 125) == items(5, start=120)
+
+
+def test_incremental_spill_matches_whole_array_spill(store):
+    body = store.array()
+    body.extend(items(300))
+    incremental_preview, incremental = body.finish()
+    whole_preview, whole = store.spill(items(300))
+
+    assert incremental_preview == whole_preview
+    assert {k: v for k, v in incremental.items() if k not in ("handle", "created_at")} == \
+        {k: v for k, v in whole.items() if k not in ("handle", "created_at")}
+    for suffix in ("ndjson", "idx"):
+        with open(os.path.join(store.directory, f"{incremental['handle']}.{suffix}"), "rb") as a, \
+                open(os.path.join(store.directory, f"{whole['handle']}.{suffix}"), "rb") as b:
+            assert a.read() == b.read()
+
+
+def test_discarded_array_leaves_no_files(store):
+    body = store.array()
+    body.extend(items(300))
+    body.discard()
+    assert os.listdir(store.directory) == []
+
+
+def test_spill_directory_is_owner_only(tmp_path):
+    directory = tmp_path / "spill"
+    directory.mkdir(mode=0o755)
+    os.chmod(directory, 0o755)
+    store = SpillStore(str(directory), inline_max_bytes=64, max_age=3600, max_bytes=1024 * 1024)
+
+    preview, meta = store.cap("x" * 1000)
+    assert meta["kind"] == "text"
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
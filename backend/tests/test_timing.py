@@ -0,0 +1,18 @@
+from app.services.timing import TimingStats, endpoint_template
+
+
+def test_endpoints_are_capped_least_recently_used_first():
+    stats = TimingStats(max_samples=10, max_endpoints=3)
+    timing = {"total_ms": 12.5, "ttfb_ms": 10.0}
+    for owner in ("a", "b", "c"):
+        stats.observe("GET", endpoint_template(f"https://api.github.com/repos/{owner}/app"), timing, 200)
+    # Touching "a" makes "b" the least recently used
+    stats.observe("GET", "/repos/a/app", timing, 200)
+    stats.observe("GET", "/repos/d/app", timing, 200)
+
+    snapshot = stats.snapshot()
+    assert sorted(endpoint["template"] for endpoint in snapshot["endpoints"]) == [
+        "/repos/a/app", "/repos/c/app", "/repos/d/app"
+    ]
+    assert snapshot["evicted_endpoints"] == 1 and snapshot["max_endpoints"] == 3
+    assert next(e for e in snapshot["endpoints"] if e["template"] == "/repos/a/app")["calls"] == 2
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.rate_limiter import UpstreamScheduler
+from app.services.upstream import UpstreamHttpClient
+
+LATENCY = 0.2
+
+
+def slow_upstream(max_per_host=20):
+    """A pooled client whose upstream answers every request after LATENCY seconds."""
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(LATENCY)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"path": request.url.path})
+
+    client = UpstreamHttpClient(max_per_host=max_per_host)
+    client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client, in_flight
+
+
+def run_calls(client, count, scheduler=None):
+    async def call(i):
+        request_params = {"method": "GET", "url": f"https://api.github.com/items/{i}", "headers": {}}
+        if scheduler is not None:
+            return await scheduler.execute(request_params, client.request)
+        return await client.request(request_params)
+
+    async def main():
+        try:
+            return await asyncio.gather(*(call(i) for i in range(count)))
+        finally:
+            await client.aclose()
+
+    started = time.perf_counter()
+    responses = asyncio.run(main())
+    return responses, time.perf_counter() - started
+
+
+def test_slow_calls_run_concurrently():
+    client, in_flight = slow_upstream()
+    responses, elapsed = run_calls(client, 20, scheduler=UpstreamScheduler())
+    assert [response.json()["path"] for response in responses] == [f"/items/{i}" for i in range(20)]
+    assert in_flight["peak"] == 20
+    # 20 sequential calls would take 4s
+    assert elapsed < LATENCY * 3
+
+
+def test_concurrency_is_capped_per_host():
+    client, in_flight = slow_upstream(max_per_host=5)
+    _, elapsed = run_calls(client, 20)
+    assert in_flight["peak"] == 5
+    assert LATENCY * 4 <= elapsed < LATENCY * 7